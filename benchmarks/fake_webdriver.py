@@ -0,0 +1,487 @@
+"""
+@file benchmarks/fake_webdriver.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief In-memory WebDriver which loads the pages with HTTP and evaluates the locators with lxml
+
+It implements the part of the Selenium WebDriver used by the helpers (get, find_element(s), execute_script,
+switch_to, window handles, W3C actions and the network performance log) and counts every command as a round trip.
+The '<script data-fetch="...">' elements of a page are fetched when it loads, like the JSON calls of its scripts. An optional latency per command
+simulates the HTTP round trip of a real WebDriver. The children of an element with 'data-virtual-rows="N"' are a
+virtualized list: only N of them are rendered, around the last one scrolled into view.
+"""
+
+
+import os
+import json
+import time
+import urllib.request
+from urllib.parse import urljoin
+
+import lxml.html
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.common.exceptions import (
+	NoSuchElementException, NoSuchFrameException, NoSuchWindowException, StaleElementReferenceException, WebDriverException
+)
+
+import src.browser_web_scrapping as browser_ws
+from src.static_fetcher import inner_text, node_displayed, read_node_attribute, find_nodes, extract_elements_in_document
+
+
+
+class _Document:
+	"""
+	A loaded HTML document, its version changes on each navigation to detect stale elements.
+	"""
+
+	version_counter = 0
+
+	def __init__(self, url: str, html: str):
+		_Document.version_counter += 1
+		self.version = _Document.version_counter
+		self.url = url
+		self.root = lxml.html.document_fromstring(html)
+		self.frames = {}
+		self.ready_at = 0.0
+
+		# The virtualized lists keep all their rows and render only a window of them
+		self.virtual_lists = {}
+		for container in self.root.xpath('//*[@data-virtual-rows]'):
+			rows = list(container)
+			self.virtual_lists[container] = {'rows': rows, 'size': int(container.get('data-virtual-rows'))}
+			for row in rows[self.virtual_lists[container]['size']:]:
+				container.remove(row)
+
+
+	def scroll_into_view(self, node):
+		"""
+		Renders the rows of a virtualized list around the row of a node scrolled into view, if it is in one.
+		"""
+
+		while node is not None and node.getparent() not in self.virtual_lists:
+			node = node.getparent()
+		if node is None:
+			return
+
+		container = node.getparent()
+		rows, size = self.virtual_lists[container]['rows'], self.virtual_lists[container]['size']
+		first = max(0, min(rows.index(node) - size // 2, len(rows) - size))
+		for row in list(container):
+			container.remove(row)
+		for row in rows[first:first + size]:
+			container.append(row)
+
+
+
+class FakeWebElement(WebElement):
+	"""
+	Element of a fake document, it raises StaleElementReferenceException after its document is replaced.
+	"""
+
+	def __init__(self, driver, document: _Document, node):
+		super().__init__(driver, f"fake-{document.version}-{id(node)}")
+		self._document = document
+		self._node = node
+
+
+	def _check(self):
+		self._parent._round_trip()
+		# The rows removed from a virtualized list are detached like the nodes of a replaced document
+		if not self._parent._is_alive(self._document) or self._node.getroottree().getroot() is not self._document.root:
+			raise StaleElementReferenceException(f"The element {self._id} is not attached to the page document")
+
+
+	@property
+	def tag_name(self) -> str:
+		self._check()
+		return self._node.tag
+
+
+	@property
+	def text(self) -> str:
+		self._check()
+		return inner_text(self._node) if self._parent._is_node_displayed(self._node) else ''
+
+
+	def get_attribute(self, name: str):
+		self._check()
+		return self._parent._read_attribute(self._document, self._node, name)
+
+
+	def get_dom_attribute(self, name: str):
+		self._check()
+		return self._node.get(name)
+
+
+	def is_displayed(self) -> bool:
+		self._check()
+		return self._parent._is_node_displayed(self._node)
+
+
+	def is_enabled(self) -> bool:
+		self._check()
+		return self._node.get('disabled') is None and self._node.get('aria-disabled') != 'true'
+
+
+	def click(self):
+		self._check()
+		self._parent._click(self._document, self._node)
+
+
+	def find_element(self, by = 'id', value: str = None):
+		self._check()
+		return self._parent._find(self._document, self._node, by, value, many=False)
+
+
+	def find_elements(self, by = 'id', value: str = None):
+		self._check()
+		return self._parent._find(self._document, self._node, by, value, many=True)
+
+
+
+class _FakeSwitchTo:
+	"""
+	Implementation of 'driver.switch_to' for frames and windows.
+	"""
+
+	def __init__(self, driver):
+		self._driver = driver
+
+
+	def frame(self, frame):
+		self._driver._round_trip()
+		self._driver._enter_frame(frame)
+
+
+	def default_content(self):
+		self._driver._round_trip()
+		self._driver._window['frames'] = []
+
+
+	def parent_frame(self):
+		self._driver._round_trip()
+		if self._driver._window['frames']:
+			self._driver._window['frames'].pop()
+
+
+	def window(self, handle: str):
+		self._driver._round_trip()
+		if handle not in self._driver._windows:
+			raise NoSuchWindowException(f"No window with handle {handle}")
+		self._driver._current_handle = handle
+
+
+	def new_window(self, type_hint: str = 'tab'):
+		self._driver._round_trip()
+		self._driver._current_handle = self._driver._open_window()
+
+
+
+class FakeWebDriver:
+	"""
+	In-memory WebDriver for the benchmarks, see the brief of the file.
+	"""
+
+	def __init__(self, command_latency: float = 0.0, download_folder: str = None, page_load_latency: float = 0.0):
+		"""
+		@param command_latency The time in seconds added to each command, simulating the WebDriver round trip.
+		@param page_load_latency The time in seconds a page takes to load, 'get' waits it and the navigations
+			started with JavaScript are 'loading' until it passes.
+		@param download_folder Optional folder where the clicks on download buttons save the files.
+		"""
+
+		self.command_latency = command_latency
+		self.page_load_latency = page_load_latency
+		self.download_folder = download_folder
+		self.round_trips = 0
+		self.page_loads = 0
+		self.downloads = []
+		self._performance_log = []
+		self._response_bodies = {}
+		self._windows = {}
+		self._window_counter = 0
+		self._current_handle = self._open_window()
+
+
+	# Internal state
+
+	def _open_window(self) -> str:
+		self._window_counter += 1
+		handle = f"window-{self._window_counter}"
+		self._windows[handle] = {'document': _Document('about:blank', '<html><body></body></html>'), 'frames': []}
+		return handle
+
+
+	@property
+	def _window(self) -> dict:
+		return self._windows[self._current_handle]
+
+
+	def _round_trip(self):
+		self.round_trips += 1
+		if self.command_latency > 0:
+			time.sleep(self.command_latency)
+
+
+	def _is_alive(self, document: _Document) -> bool:
+		def contains(parent: _Document) -> bool:
+			return parent is document or any(contains(frame) for frame in parent.frames.values())
+
+		return any(contains(window['document']) for window in self._windows.values())
+
+
+	def _context(self) -> _Document:
+		window = self._window
+		return window['frames'][-1] if window['frames'] else window['document']
+
+
+	def _load(self, url: str) -> _Document:
+		with urllib.request.urlopen(url) as response:
+			html = response.read().decode('utf-8')
+		self.page_loads += 1
+		return _Document(url, html)
+
+
+	def _navigate(self, url: str, blocking: bool = True):
+		document = self._load(url)
+		if blocking:
+			time.sleep(self.page_load_latency)
+		else:
+			document.ready_at = time.monotonic() + self.page_load_latency
+		self._window['document'] = document
+		self._window['frames'] = []
+		self._fetch_scripts(document)
+
+
+	def _fetch_scripts(self, document: _Document):
+		"""
+		Fetches the calls of the page and writes them in the performance log, like Chrome with the network log enabled.
+		"""
+
+		for node in document.root.xpath('//script[@data-fetch]'):
+			url = urljoin(document.url, node.get('data-fetch'))
+			with urllib.request.urlopen(url) as response:
+				body = response.read().decode('utf-8')
+				status = response.status
+				mime_type = response.headers.get_content_type()
+
+			request_id = f"request-{len(self._response_bodies) + 1}"
+			self._response_bodies[request_id] = body
+			for method, parameters in [
+					('Network.responseReceived', {'requestId': request_id, 'type': 'Fetch',
+						'response': {'url': url, 'status': status, 'mimeType': mime_type}}),
+					('Network.loadingFinished', {'requestId': request_id, 'encodedDataLength': len(body)})]:
+				message = {'message': {'method': method, 'params': parameters}, 'webview': self._current_handle}
+				self._performance_log.append({'level': 'INFO', 'message': json.dumps(message), 'timestamp': time.time()})
+
+
+	def _enter_frame(self, frame):
+		document = self._context()
+		if isinstance(frame, FakeWebElement):
+			# Like a browser, a frame element of a replaced document is rejected
+			if not self._is_alive(frame._document):
+				raise StaleElementReferenceException(f"The element {frame._id} is not attached to the page document")
+			node = frame._node
+		else:
+			nodes = document.root.xpath(f"//iframe[@id='{frame}' or @name='{frame}']") if isinstance(frame, str) \
+				else document.root.xpath("//iframe")[frame:frame + 1]
+			if not nodes:
+				raise NoSuchFrameException(f"No frame '{frame}'")
+			node = nodes[0]
+
+		# Like a browser, the document of an iframe is loaded once and kept while its parent is alive
+		if node not in document.frames:
+			document.frames[node] = self._load(urljoin(document.url, node.get('src')))
+		self._window['frames'].append(document.frames[node])
+
+
+	def _is_node_displayed(self, node) -> bool:
+		return node_displayed(node)
+
+
+	def _read_attribute(self, document: _Document, node, name: str):
+		return read_node_attribute(node, name, document.url)
+
+
+	def _find(self, document: _Document, node, by: str, value: str, many: bool):
+		elements = [FakeWebElement(self, document, found) for found in find_nodes(node, by, value)]
+		if many:
+			return elements
+		if not elements:
+			raise NoSuchElementException(f"Unable to locate element: {by}={value}")
+		return elements[0]
+
+
+	def _click(self, document: _Document, node):
+		"""
+		Emulates the behaviour of the clicked element: follow links, open the controlled panel or download a file.
+		"""
+
+		while node is not None:
+			if node.get('data-download-url') is not None:
+				self._download(urljoin(document.url, node.get('data-download-url')))
+				return
+			if node.get('aria-controls') is not None:
+				panels = document.root.xpath(f"//*[@id='{node.get('aria-controls')}']")
+				for panel in panels:
+					panel.attrib.pop('hidden', None)
+				return
+			if node.tag == 'a' and node.get('href') is not None:
+				target = urljoin(document.url, node.get('href'))
+				if self._window['frames']:
+					frame = self._load(target)
+					parent = self._window['frames'][-2] if len(self._window['frames']) > 1 else self._window['document']
+					for frame_node, frame_document in parent.frames.items():
+						if frame_document is self._window['frames'][-1]:
+							parent.frames[frame_node] = frame
+					self._window['frames'][-1] = frame
+				else:
+					self._navigate(target)
+				return
+			node = node.getparent()
+
+
+	def _download(self, url: str):
+		self.downloads.append(url)
+		if self.download_folder is None:
+			return
+
+		with urllib.request.urlopen(url) as response:
+			data = response.read()
+			disposition = response.headers.get('Content-Disposition', '')
+		file_name = disposition.split('filename=')[-1].strip('"') if 'filename=' in disposition else 'download.bin'
+
+		# Write it like Chrome, in a temporary file renamed at the end
+		partial_path = os.path.join(self.download_folder, f"{file_name}.crdownload")
+		with open(partial_path, 'wb') as file:
+			file.write(data)
+		os.replace(partial_path, os.path.join(self.download_folder, file_name))
+
+
+	def _extract(self, specs: dict, root) -> dict:
+		document = root._document if isinstance(root, FakeWebElement) else self._context()
+		node = root._node if isinstance(root, FakeWebElement) else document.root
+		return extract_elements_in_document(node, specs, document.url)
+
+
+	# WebDriver API
+
+	def get(self, url: str):
+		self._round_trip()
+		self._navigate(url)
+
+
+	@property
+	def current_url(self) -> str:
+		self._round_trip()
+		return self._window['document'].url
+
+
+	@property
+	def page_source(self) -> str:
+		self._round_trip()
+		return lxml.html.tostring(self._context().root, encoding='unicode')
+
+
+	@property
+	def title(self) -> str:
+		self._round_trip()
+		titles = self._window['document'].root.xpath('//title/text()')
+		return titles[0] if titles else ''
+
+
+	def find_element(self, by = 'id', value: str = None):
+		self._round_trip()
+		document = self._context()
+		return self._find(document, document.root, by, value, many=False)
+
+
+	def find_elements(self, by = 'id', value: str = None):
+		self._round_trip()
+		document = self._context()
+		return self._find(document, document.root, by, value, many=True)
+
+
+	def execute_script(self, script: str, *args):
+		self._round_trip()
+
+		if script == browser_ws.extraction_script:
+			return self._extract(args[0], args[1] if len(args) > 1 else None)
+		if '__wst_pending' in script and 'location.href' in script:
+			self._navigate(args[0], blocking=False)
+			return None
+		if 'document.readyState' in script:
+			ready_state = 'complete' if time.monotonic() >= self._window['document'].ready_at else 'loading'
+			return ready_state in args[0] if '__wst_pending' in script else ready_state
+		if 'navigator.userAgent' in script:
+			return 'FakeWebDriver/1.0'
+		if 'scrollIntoView' in script and args and isinstance(args[0], FakeWebElement):
+			args[0]._document.scroll_into_view(args[0]._node)
+			return None
+
+		# Scrolls and other scripts without result
+		return None
+
+
+	def execute(self, driver_command: str, params: dict = None) -> dict:
+		"""
+		Generic command, used by ActionChains for the W3C actions.
+		"""
+
+		self._round_trip()
+		return {'value': None}
+
+
+	def get_log(self, log_type: str) -> list:
+		self._round_trip()
+		if log_type != 'performance':
+			return []
+		entries, self._performance_log = self._performance_log, []
+		return entries
+
+
+	def execute_cdp_cmd(self, cmd: str, cmd_args: dict) -> dict:
+		self._round_trip()
+		if cmd == 'Network.getResponseBody':
+			if cmd_args['requestId'] not in self._response_bodies:
+				raise WebDriverException(f"No resource with given identifier found: {cmd_args['requestId']}")
+			return {'body': self._response_bodies[cmd_args['requestId']], 'base64Encoded': False}
+
+		# Network.enable, Network.setCookie and the other commands without result
+		return {}
+
+
+	@property
+	def switch_to(self) -> _FakeSwitchTo:
+		return _FakeSwitchTo(self)
+
+
+	@property
+	def window_handles(self) -> list:
+		self._round_trip()
+		return list(self._windows)
+
+
+	@property
+	def current_window_handle(self) -> str:
+		self._round_trip()
+		return self._current_handle
+
+
+	def close(self):
+		self._round_trip()
+		del self._windows[self._current_handle]
+
+
+	def get_cookies(self) -> list:
+		self._round_trip()
+		return []
+
+
+	def delete_all_cookies(self):
+		self._round_trip()
+
+
+	def quit(self):
+		self._windows = {}
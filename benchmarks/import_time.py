@@ -0,0 +1,105 @@
+"""
+@file benchmarks/import_time.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Benchmark of the import time of the modules, the start up cost of the worker processes and the command lines
+
+Each import is measured in a new interpreter, so nothing is cached between repetitions except the bytecode files.
+It also reports how many Selenium modules were loaded by the import. Run it from the root of the repository:
+
+	python -m benchmarks.import_time --repetitions 10 --json imports.json
+"""
+
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+from benchmarks.run_benchmarks import percentile
+
+
+# Modules imported by the examples, the workers and the command lines
+default_modules = [
+	'src.browser_web_scrapping',
+	'src.async_browser',
+	'src.static_fetcher',
+	'src.step_flow',
+	'src.tab_multiplexer',
+	'src.crawl_runner',
+	'src.work_queue',
+	'examples.NGA.crawl_image_pages'
+]
+
+# Script run in the new interpreter, it prints the time of the import and the Selenium modules loaded
+child_script = """
+import sys, time, json
+start = time.perf_counter()
+__import__(sys.argv[1])
+duration = time.perf_counter() - start
+print(json.dumps({'seconds': duration, 'selenium_modules': sum(1 for name in sys.modules if name.startswith('selenium'))}))
+"""
+
+
+
+def measure_import(module: str, repetitions: int) -> dict:
+	"""
+	Imports a module in new interpreters.
+
+	@param module The name of the module.
+	@param repetitions The number of interpreters.
+	@return The dictionary with the latency percentiles and the loaded Selenium modules.
+	"""
+
+	environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.environ.get('PYTHONPATH')])))
+
+	# A first import writes the bytecode files, it is not measured
+	samples = []
+	for repetition in range(repetitions + 1):
+		completed = subprocess.run([sys.executable, '-c', child_script, module], capture_output=True, text=True,
+			env=environment)
+		if completed.returncode != 0:
+			raise Exception(f"An error occurred importing '{module}': {completed.stderr.strip().splitlines()[-1:]}")
+		if repetition > 0:
+			samples.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+	durations = [sample['seconds'] for sample in samples]
+	return {
+		'module': module,
+		'count': len(durations),
+		'p50_ms': percentile(durations, 0.50) * 1000,
+		'p95_ms': percentile(durations, 0.95) * 1000,
+		'selenium_modules': samples[-1]['selenium_modules']
+	}
+
+
+def print_results(results: list):
+	print(f"{'module':<44}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'selenium':>10}")
+	for result in results:
+		print(
+			f"{result['module']:<44}{result['count']:>7}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+			f"{result['selenium_modules']:>10}"
+		)
+
+
+def main(argv: list = None):
+	parser = argparse.ArgumentParser(description="Import time of the modules, each one in a new interpreter")
+	parser.add_argument('modules', nargs='*', default=default_modules, help="Modules to import")
+	parser.add_argument('--repetitions', type=int, default=10, help="Number of imports of each module")
+	parser.add_argument('--json', help="Optional path of a JSON file with the results")
+	args = parser.parse_args(argv)
+
+	results = [measure_import(module, args.repetitions) for module in args.modules]
+
+	print_results(results)
+	if args.json:
+		with open(args.json, 'w', encoding='utf-8') as file:
+			json.dump({'settings': vars(args), 'results': results}, file, indent=2)
+
+	return results
+
+
+if __name__ == '__main__':
+	main()
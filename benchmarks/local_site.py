@@ -0,0 +1,273 @@
+"""
+@file benchmarks/local_site.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Local HTTP server with pages that mimic the markup of the sites scrapped in the examples
+
+It serves NGA search results with pagination (and the JSON call which fills them in), NGA object pages, a SharePoint
+folder list and a SharePoint Word document inside the 'WacFrame_Word_0' iframe, so the helpers and the example flows
+can be measured offline.
+"""
+
+
+import io
+import re
+import json
+import zipfile
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def nga_search_results(page: int, search_pages: int, results_per_page: int) -> dict:
+	"""
+	Builds the JSON of a page of NGA search results, which the script of the search page renders.
+
+	@param page The number of the page, starting in 1.
+	@param search_pages The total number of pages.
+	@param results_per_page The number of objects in each page.
+	@return The dictionary with the page, the total of pages and the results.
+	"""
+
+	first_id = (page - 1) * results_per_page + 1000
+	return {
+		'page': page,
+		'pages': search_pages,
+		'results': [
+			{'id': object_id, 'title': f"Painting {object_id}", 'url': f"/collection/art-object-page.{object_id}.html",
+				'image': f"/img/{object_id}.jpg"}
+			for object_id in range(first_id, first_id + results_per_page)
+		]
+	}
+
+
+def nga_search_page(page: int, search_pages: int, results_per_page: int) -> str:
+	"""
+	Builds a page of NGA search results, with links to the object pages and the 'results-next' link.
+
+	@param page The number of the page, starting in 1.
+	@param search_pages The total number of pages.
+	@param results_per_page The number of objects in each page.
+	@return The HTML of the page.
+	"""
+
+	results = '\n'.join(
+		f'<li class="result"><a href="{result["url"]}"><img src="{result["image"]}"/>'
+		f'<span>{result["title"]}</span></a><a href="{result["url"]}">More</a></li>'
+		for result in nga_search_results(page, search_pages, results_per_page)['results']
+	)
+	next_link = (
+		f'<a class="results-next" href="/collection-search-result.html?classification=painting&amp;page={page + 1}">Next</a>'
+		if page < search_pages else ''
+	)
+
+	return f"""<!DOCTYPE html>
+<html><head><title>Collection Search Results - page {page}</title><link rel="stylesheet" href="/css/site.css"/></head>
+<body>
+<script data-fetch="/api/collection-search?classification=painting&amp;page={page}"></script>
+<header><nav><a href="/">Home</a><a href="/collection.html">Collection</a><a href="/visit.html">Visit</a></nav></header>
+<main><ul class="results">
+{results}
+</ul>
+<div class="pagination">{next_link}</div></main>
+<footer><a href="/about.html">About</a><a href="/contact.html">Contact</a></footer>
+</body></html>"""
+
+
+def nga_object_page(object_id: int) -> str:
+	"""
+	Builds an NGA object page with the attributes, drawers and download link read by the image example.
+
+	@param object_id The ID of the object.
+	@return The HTML of the page.
+	"""
+
+	return f"""<!DOCTYPE html>
+<html><head><title>Painting {object_id}</title></head>
+<body>
+<div id="oe-strip-wrap"><span>Paintings</span> <span>Collection {object_id % 7}</span></div>
+<section class="object-info">
+<div class="object-attr medium"><h3>Medium</h3><p>oil on canvas</p></div>
+<div class="object-attr dimensions"><h3>Dimensions</h3><p>{40 + object_id % 50} x {30 + object_id % 40} cm</p></div>
+<div class="object-attr credit"><h3>Credit Line</h3><p>Gift of a Benefactor {object_id}</p></div>
+<div class="object-attr accession"><h3>Accession</h3><p>1937.1.{object_id}</p></div>
+<div class="object-attr artists-makers"><h3>Artist</h3><p>Painter Number {object_id % 13}</p></div>
+</section>
+<a title="download image" href="/download/image?filename=painting-{object_id}.jpg">Download</a>
+<button id="drawer-control-0" aria-controls="drawer-content-0">Overview</button>
+<div id="drawer-content-0" hidden="hidden"><p>Description of the painting {object_id}, painted with care.</p></div>
+<button id="tab-entry" aria-controls="entry-panel">Entry</button>
+<div id="entry-panel" data-id="entry" hidden="hidden"><p>Analysis of the painting {object_id}.</p></div>
+</body></html>"""
+
+
+def sharepoint_folder_page(files: int, rendered_rows: int = None) -> str:
+	"""
+	Builds a SharePoint folder list with one row per file and the download command.
+
+	@param files The number of files in the folder.
+	@param rendered_rows Optional number of rows the FakeWebDriver renders at once, like the virtualized list of
+		SharePoint.
+	@return The HTML of the page.
+	"""
+
+	rows = '\n'.join(
+		f'<div role="row" data-automationkey="{index}"><div role="gridcell"><span role="checkbox" aria-checked="false"></span></div>'
+		f'<div role="gridcell"><button data-file-url="/download/file?filename=Report{index}.docx">Report{index}.docx</button></div>'
+		f'<div role="gridcell" data-automationkey="modified"><span title="1/{1 + index % 28}/2025 10:00 AM">January {1 + index % 28}</span></div></div>'
+		for index in range(files)
+	)
+
+	return f"""<!DOCTYPE html>
+<html><head><title>Documents</title></head>
+<body>
+<div class="commandBar"><button data-automationid="downloadCommand" aria-disabled="false"
+	data-download-url="/download/file?filename=Documents.zip">Download</button></div>
+<div role="grid"{f' data-virtual-rows="{rendered_rows}"' if rendered_rows else ''}>
+{rows}
+</div>
+</body></html>"""
+
+
+def folder_archive(files: int) -> bytes:
+	"""
+	Builds the ZIP sent by the download command of the SharePoint folder, with all the files of the folder.
+	"""
+
+	buffer = io.BytesIO()
+	with zipfile.ZipFile(buffer, 'w') as archive:
+		for index in range(files):
+			archive.writestr(f"Documents/Report{index}.docx", b'\0' * 16)
+	return buffer.getvalue()
+
+
+def sharepoint_document_page() -> str:
+	return """<!DOCTYPE html>
+<html><head><title>Document.docx</title></head>
+<body><iframe id="WacFrame_Word_0" name="WacFrame_Word_0" src="/sites/docs/word_frame.html"></iframe></body></html>"""
+
+
+def sharepoint_word_frame() -> str:
+	return """<!DOCTYPE html>
+<html><head><title>Word</title></head>
+<body>
+<button id="FileMenuFlyoutLauncher" aria-controls="file-menu">File</button>
+<div id="file-menu" hidden="hidden">
+	<button aria-controls="export-panel"><span>Export</span></button>
+	<button aria-controls="copy-panel"><span>Create a Copy</span></button>
+</div>
+<div id="export-panel" hidden="hidden"><button aria-controls="confirm-dialog"><span>Download as PDF</span></button></div>
+<div id="copy-panel" hidden="hidden"><button aria-controls="confirm-dialog"><span>Download a copy</span></button></div>
+<div id="confirm-dialog" hidden="hidden"><button data-download-url="/download/file?filename=Document.pdf"><span>Download</span></button></div>
+</body></html>"""
+
+
+
+class _LocalSiteHandler(BaseHTTPRequestHandler):
+	"""
+	Handler which builds the pages from the path of the request.
+	"""
+
+	protocol_version = 'HTTP/1.1'
+
+	# The headers and the body are written separately, with Nagle each keep-alive response waits for a delayed ACK
+	disable_nagle_algorithm = True
+
+	def log_message(self, format, *args):
+		pass
+
+
+	def _send(self, body: bytes, content_type: str = 'text/html; charset=utf-8', status: int = 200, headers: dict = None):
+		self.send_response(status)
+		self.send_header('Content-Type', content_type)
+		self.send_header('Content-Length', str(len(body)))
+		for name, value in (headers or {}).items():
+			self.send_header(name, value)
+		self.end_headers()
+		self.wfile.write(body)
+
+
+	def do_GET(self):
+		settings = self.server.settings
+		url = urlparse(self.path)
+		path = unquote(url.path)
+		query = parse_qs(url.query)
+
+		if path == '/collection-search-result.html':
+			page = int(query.get('page', ['1'])[0])
+			self._send(nga_search_page(page, settings['search_pages'], settings['results_per_page']).encode())
+
+		elif path == '/api/collection-search':
+			page = int(query.get('page', ['1'])[0])
+			results = nga_search_results(page, settings['search_pages'], settings['results_per_page'])
+			self._send(json.dumps(results).encode(), 'application/json; charset=utf-8')
+
+		elif re.fullmatch(r'/collection/art-object-page\.\d+\.html', path):
+			self._send(nga_object_page(int(path.split('.')[-2])).encode())
+
+		elif path == '/sites/docs/Shared Documents/Forms/AllItems.aspx':
+			self._send(sharepoint_folder_page(settings['folder_files'], settings['folder_rendered_rows']).encode())
+
+		elif path == '/sites/docs/Document.aspx':
+			self._send(sharepoint_document_page().encode())
+
+		elif path == '/sites/docs/word_frame.html':
+			self._send(sharepoint_word_frame().encode())
+
+		elif path.startswith('/download/'):
+			file_name = query.get('filename', ['file.bin'])[0]
+			body = folder_archive(settings['folder_files']) if file_name.endswith('.zip') else b'\0' * settings['download_size']
+			self._send(body, 'application/octet-stream', headers={'Content-Disposition': f'attachment; filename="{file_name}"'})
+
+		else:
+			self._send(b'<html><body>Not found</body></html>', status=404)
+
+
+
+class LocalSite:
+	"""
+	Runs the local site in a background thread.
+	"""
+
+	def __init__(self, search_pages: int = 5, results_per_page: int = 40, folder_files: int = 50,
+			download_size: int = 64 * 1024, port: int = 0, folder_rendered_rows: int = None):
+		"""
+		@param search_pages The number of pages of the NGA search.
+		@param results_per_page The number of objects in each search page.
+		@param folder_files The number of files in the SharePoint folder.
+		@param download_size The size in bytes of the downloaded files.
+		@param port The port of the server, 0 takes a free one.
+		@param folder_rendered_rows Optional number of rows of the SharePoint folder rendered at once, see
+			'sharepoint_folder_page'.
+		"""
+
+		self.server = ThreadingHTTPServer(('127.0.0.1', port), _LocalSiteHandler)
+		self.server.daemon_threads = True
+		self.server.settings = {
+			'search_pages': search_pages,
+			'results_per_page': results_per_page,
+			'folder_files': folder_files,
+			'folder_rendered_rows': folder_rendered_rows,
+			'download_size': download_size
+		}
+		self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+		self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+
+	def start(self):
+		self._thread.start()
+		return self
+
+
+	def stop(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+
+	def __enter__(self):
+		return self.start()
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.stop()
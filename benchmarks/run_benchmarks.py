@@ -0,0 +1,343 @@
+"""
+@file benchmarks/run_benchmarks.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Benchmarks of the browser helpers and the example flows against the local site and the fake WebDriver
+
+It reports the rate (calls or pages per second), the WebDriver round trips per unit and the p50/p95 latency.
+Run it from the root of the repository:
+
+	python -m benchmarks.run_benchmarks --pages 20 --latency-ms 2 --page-load-ms 50 --json bench.json
+"""
+
+
+import os
+import json
+import time
+import argparse
+import tempfile
+
+import requests
+
+import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+from src.download_watcher import DownloadWatcher
+from src.network_capture import NetworkCapture
+from src.snapshot_archive import SnapshotArchive, SnapshotRecorder, extract_archives
+from src.pagination import iter_paginated_pages
+from src.static_fetcher import StaticFetcher
+from src.tab_multiplexer import TabMultiplexer
+from benchmarks.local_site import LocalSite
+from benchmarks.fake_webdriver import FakeWebDriver
+
+
+# Locators of the NGA object page, the same used by 'examples/NGA/download_image_from_url.py'
+xpath_atributes_list = [
+	"//div[@class='object-attr medium']",
+	"//div[@class='object-attr dimensions']",
+	"//div[@class='object-attr credit']",
+	"//div[@class='object-attr accession']",
+	"//div[@class='object-attr artists-makers']"
+]
+xpath_collection = "//div[@id='oe-strip-wrap']"
+xpath_download = "//a[@title='download image']"
+xpath_drawer_button = "//button[@id='drawer-control-0']"
+xpath_drawer_content = "//div[@id='drawer-content-0']"
+xpath_entry_button = "//button[@id='tab-entry']"
+xpath_entry_content = "//div[@data-id='entry']"
+
+object_schema = {'Collection': (By.XPATH, xpath_collection)}
+object_schema.update({xpath: (By.XPATH, xpath) for xpath in xpath_atributes_list})
+object_schema['ImageURL'] = {'type': By.XPATH, 'locator': xpath_download, 'field': 'attribute', 'attribute': 'href'}
+
+
+
+def percentile(values: list, fraction: float) -> float:
+	ordered = sorted(values)
+	return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def summarize(name: str, unit: str, durations: list, round_trips: list) -> dict:
+	"""
+	Builds the result of a benchmark.
+
+	@param name The name of the benchmark.
+	@param unit The unit measured, e.g. 'call' or 'page'.
+	@param durations The duration in seconds of each unit.
+	@param round_trips The WebDriver round trips of each unit.
+	@return The dictionary with the rate, round trips and latency percentiles.
+	"""
+
+	total = sum(durations)
+	return {
+		'name': name,
+		'unit': unit,
+		'count': len(durations),
+		'per_second': len(durations) / total if total > 0 else float('inf'),
+		'round_trips': sum(round_trips) / len(round_trips),
+		'p50_ms': percentile(durations, 0.50) * 1000,
+		'p95_ms': percentile(durations, 0.95) * 1000
+	}
+
+
+def measure(driver: FakeWebDriver, name: str, unit: str, function, repetitions: int) -> dict:
+	"""
+	Runs a function several times measuring its duration and round trips.
+
+	@param driver The fake driver, to count its round trips.
+	@param name The name of the benchmark.
+	@param unit The unit measured by each call of the function.
+	@param function Function which receives the number of the repetition.
+	@param repetitions The number of calls.
+	@return The result of the benchmark, see 'summarize'.
+	"""
+
+	durations = []
+	round_trips = []
+	for repetition in range(repetitions):
+		before = driver.round_trips
+		start = time.perf_counter()
+		function(repetition)
+		durations.append(time.perf_counter() - start)
+		round_trips.append(driver.round_trips - before)
+
+	return summarize(name, unit, durations, round_trips)
+
+
+def measure_generator(driver: FakeWebDriver, name: str, generator) -> dict:
+	"""
+	Measures the time and round trips between the pages yielded by a generator.
+
+	@param driver The fake driver, to count its round trips.
+	@param name The name of the benchmark.
+	@param generator A generator which yields once per page.
+	@return The result of the benchmark, see 'summarize'.
+	"""
+
+	durations = []
+	round_trips = []
+	before = driver.round_trips
+	start = time.perf_counter()
+	for _ in generator:
+		durations.append(time.perf_counter() - start)
+		round_trips.append(driver.round_trips - before)
+		before = driver.round_trips
+		start = time.perf_counter()
+
+	return summarize(name, 'page', durations, round_trips)
+
+
+def benchmark_helpers(site: LocalSite, driver: FakeWebDriver, repetitions: int) -> list:
+	"""
+	Measures each helper of 'src/browser_web_scrapping' alone.
+	"""
+
+	object_url = f"{site.base_url}/collection/art-object-page.1000.html"
+	document_url = f"{site.base_url}/sites/docs/Document.aspx"
+	results = []
+
+	results.append(measure(driver, 'login_to_url', 'call',
+		lambda i: browser_ws.login_to_url(driver, object_url, wait_condition=browser_ws.document_ready()), repetitions))
+
+	results.append(measure(driver, 'find_element_in_driver', 'call',
+		lambda i: browser_ws.find_element_in_driver(driver, By.XPATH, xpath_atributes_list[i % 5]), repetitions))
+
+	results.append(measure(driver, 'find_element_in_driver (wait visible)', 'call',
+		lambda i: browser_ws.find_element_in_driver(driver, By.XPATH, xpath_atributes_list[i % 5], wait_condition='visible'),
+		repetitions))
+
+	# The same searches answered by the element cache after the first one of each locator, only the wait is sent
+	browser_ws.enable_element_cache(driver)
+	results.append(measure(driver, 'find_element_in_driver (visible, cached)', 'call',
+		lambda i: browser_ws.find_element_in_driver(driver, By.XPATH, xpath_atributes_list[i % 5], wait_condition='visible'),
+		repetitions))
+	browser_ws.disable_element_cache(driver)
+
+	results.append(measure(driver, 'extract_elements_in_driver (7 fields)', 'call',
+		lambda i: browser_ws.extract_elements_in_driver(driver, object_schema), repetitions))
+
+	button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_button)
+	drawer_visible = browser_ws.element_visible(By.XPATH, xpath_drawer_content)
+	results.append(measure(driver, 'click_element_in_driver (scroll + wait)', 'call',
+		lambda i: browser_ws.click_element_in_driver(button, need_scroll=True, driver=driver, wait_condition=drawer_visible),
+		repetitions))
+
+	results.append(measure(driver, 'context_click_element_in_driver', 'call',
+		lambda i: browser_ws.context_click_element_in_driver(driver, button), repetitions))
+
+	results.append(measure(driver, 'locate_cursor_in_position', 'call',
+		lambda i: browser_ws.locate_cursor_in_position(driver, 'max', 'max'), repetitions))
+
+	browser_ws.login_to_url(driver, document_url)
+	iframe = browser_ws.find_element_in_driver(driver, By.XPATH, "//iframe[@id='WacFrame_Word_0']")
+	def switch_frame(i):
+		browser_ws.switch_to_frame_in_browser(driver, iframe)
+		browser_ws.return_from_frame_in_browser(driver)
+	results.append(measure(driver, 'switch_to_frame + return_from_frame', 'call', switch_frame, repetitions))
+
+	return results
+
+
+def nga_object_legacy(driver: FakeWebDriver, url: str) -> dict:
+	"""
+	NGA object page read one element at a time, like the image example did before the batched extraction.
+	"""
+
+	browser_ws.login_to_url(driver, url, wait_condition=browser_ws.document_ready())
+	data = {'Collection': browser_ws.find_element_in_driver(driver, By.XPATH, xpath_collection).text}
+	for xpath in xpath_atributes_list:
+		data[xpath] = browser_ws.find_element_in_driver(driver, By.XPATH, xpath).text
+
+	button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_button)
+	browser_ws.click_element_in_driver(button, need_scroll=True, driver=driver)
+	data['Description'] = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_content).text
+
+	data['ImageURL'] = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_download).get_attribute('href')
+
+	button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_entry_button)
+	browser_ws.click_element_in_driver(button, need_scroll=True, driver=driver)
+	data['Entry'] = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_entry_content).text
+
+	return data
+
+
+def nga_object_batched(driver: FakeWebDriver, url: str) -> dict:
+	"""
+	NGA object page read with a single extraction call, like the image example does now.
+	"""
+
+	browser_ws.login_to_url(driver, url, wait_condition=browser_ws.document_ready())
+	data = browser_ws.extract_elements_in_driver(driver, object_schema)
+
+	for xpath_button, xpath_content, name in [(xpath_drawer_button, xpath_drawer_content, 'Description'),
+			(xpath_entry_button, xpath_entry_content, 'Entry')]:
+		button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_button)
+		content_visible = browser_ws.element_visible(By.XPATH, xpath_content)
+		browser_ws.click_element_in_driver(button, need_scroll=True, driver=driver, wait_condition=content_visible)
+		data[name] = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_content).text
+
+	return data
+
+
+def benchmark_flows(site: LocalSite, driver: FakeWebDriver, pages: int, download_folder: str) -> list:
+	"""
+	Measures the flows of the examples, page by page.
+	"""
+
+	results = []
+
+	object_url = lambda i: f"{site.base_url}/collection/art-object-page.{1000 + i}.html"
+	results.append(measure(driver, 'NGA object page (one find per field)', 'page',
+		lambda i: nga_object_legacy(driver, object_url(i)), pages))
+	results.append(measure(driver, 'NGA object page (batched extraction)', 'page',
+		lambda i: nga_object_batched(driver, object_url(i)), pages))
+
+	# The search is measured between the pages yielded by the harvester
+	browser_ws.login_to_url(driver, f"{site.base_url}/collection-search-result.html?classification=painting")
+	results.append(measure_generator(driver, 'NGA search harvest', iter_paginated_pages(driver,
+		link_filter=lambda link: 'art-object-page' in link, key_function=lambda link: link.split('.')[-2])))
+
+	# The same results read from the JSON call which fills the search page in
+	search_url = lambda i: f"{site.base_url}/collection-search-result.html?classification=painting&page={i + 1}"
+	with NetworkCapture(driver, ['*/api/collection-search?*']) as capture:
+		def search_payload(i):
+			capture.clear()
+			browser_ws.login_to_url(driver, search_url(i))
+			return capture.wait_for(count=1)[0]['json']['results']
+		results.append(measure(driver, 'NGA search results (network capture)', 'page', search_payload, pages))
+
+	# The same object pages loaded one by one and overlapped in the tabs of the browser
+	read_page = lambda driver, url: browser_ws.extract_elements_in_driver(driver, object_schema)
+	def load_and_read(i):
+		browser_ws.login_to_url(driver, object_url(i), wait_condition=browser_ws.document_ready())
+		read_page(driver, object_url(i))
+	results.append(measure(driver, 'NGA object extraction (1 tab)', 'page', load_and_read, pages))
+
+	# The same pages saved by a snapshot recorder after each load
+	with tempfile.TemporaryDirectory() as snapshot_folder:
+		archive = SnapshotArchive(os.path.join(snapshot_folder, 'pages.wsa'))
+		recorder = SnapshotRecorder(archive).attach(driver)
+		results.append(measure(driver, 'NGA object extraction (1 tab, recorded)', 'page', load_and_read, pages))
+		recorder.detach(driver)
+		archive.close()
+
+		# The same extraction again from the snapshots saved by the recorder, without browser nor network
+		results.append(measure_generator(driver, 'NGA object re-extraction (snapshots)',
+			extract_archives([archive.path], object_schema, workers=1)))
+	with TabMultiplexer(driver, tabs=4, poll_interval=0.005) as multiplexer:
+		results.append(measure_generator(driver, 'NGA object extraction (4 tabs)',
+			multiplexer.process([object_url(i) for i in range(pages)], read_page)))
+
+	# The same extraction with HTTP and lxml, the driver is only the fallback of the pages which need it
+	with StaticFetcher(driver=driver, session=requests.Session()) as fetcher:
+		results.append(measure(driver, 'NGA object extraction (static fetch)', 'page',
+			lambda i: fetcher.extract(object_url(i), object_schema), pages))
+
+	# The downloaded files are removed, the watcher ignores the names that were already in the folder
+	document_url = f"{site.base_url}/sites/docs/Document.aspx"
+	def sharepoint_document(i):
+		with DownloadWatcher(download_folder) as download_watcher:
+			browser_ws.login_to_url(driver, document_url, wait_condition=browser_ws.document_ready())
+			iframe = browser_ws.find_element_in_driver(driver, By.XPATH, "//iframe[@id='WacFrame_Word_0']", wait_condition='present')
+			browser_ws.switch_to_frame_in_browser(driver, iframe)
+			for xpath in ["//button[@id='FileMenuFlyoutLauncher']", "//span[text()='Export']",
+					"//span[text()='Download as PDF']", "//span[text()='Download']"]:
+				button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath, wait_condition='clickable')
+				browser_ws.click_element_in_driver(button)
+			paths = download_watcher.wait(timeout=10, stable_time=0)
+			browser_ws.return_from_frame_in_browser(driver)
+		for path in paths:
+			os.remove(path)
+	results.append(measure(driver, 'SharePoint document download flow', 'page', sharepoint_document, max(1, pages // 2)))
+
+	folder_url = f"{site.base_url}/sites/docs/Shared%20Documents/Forms/AllItems.aspx"
+	def sharepoint_folder(i):
+		with DownloadWatcher(download_folder) as download_watcher:
+			browser_ws.login_to_url(driver, folder_url, wait_condition=browser_ws.document_ready())
+			button = browser_ws.find_element_in_driver(driver, By.XPATH, "//button[@data-automationid='downloadCommand']",
+				wait_condition='clickable')
+			browser_ws.click_element_in_driver(button)
+			paths = download_watcher.wait(timeout=10, stable_time=0)
+		for path in paths:
+			os.remove(path)
+	results.append(measure(driver, 'SharePoint folder download flow', 'page', sharepoint_folder, max(1, pages // 2)))
+
+	return results
+
+
+def print_results(results: list):
+	print(f"{'benchmark':<44}{'unit':>6}{'count':>7}{'per sec':>11}{'trips':>8}{'p50 ms':>10}{'p95 ms':>10}")
+	for result in results:
+		print(
+			f"{result['name']:<44}{result['unit']:>6}{result['count']:>7}{result['per_second']:>11.1f}"
+			f"{result['round_trips']:>8.1f}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+		)
+
+
+def main(argv: list = None):
+	parser = argparse.ArgumentParser(description="Benchmarks of the browser helpers against a local site and a fake WebDriver")
+	parser.add_argument('--pages', type=int, default=20, help="Number of pages of each flow benchmark")
+	parser.add_argument('--repetitions', type=int, default=200, help="Number of calls of each helper benchmark")
+	parser.add_argument('--latency-ms', type=float, default=2.0, help="Simulated latency of each WebDriver command")
+	parser.add_argument('--page-load-ms', type=float, default=50.0, help="Simulated load time of each page")
+	parser.add_argument('--json', help="Optional path of a JSON file with the results")
+	args = parser.parse_args(argv)
+
+	with LocalSite(search_pages=args.pages) as site, tempfile.TemporaryDirectory() as download_folder:
+		driver = FakeWebDriver(command_latency=args.latency_ms / 1000, download_folder=download_folder,
+			page_load_latency=args.page_load_ms / 1000)
+		results = benchmark_helpers(site, driver, args.repetitions)
+		results += benchmark_flows(site, driver, args.pages, download_folder)
+		driver.quit()
+
+	print_results(results)
+	if args.json:
+		with open(args.json, 'w', encoding='utf-8') as file:
+			json.dump({'settings': vars(args), 'results': results}, file, indent=2)
+
+	return results
+
+
+if __name__ == '__main__':
+	main()
@@ -10,10 +10,10 @@ At the moment it only support Word Documents saved in Sharepoint, and can be dow
 
 
 import os
-import time
-from selenium.webdriver.common.by import By
 
 import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+from src.step_flow import StepFlow
 
 
 # Variables
@@ -43,52 +43,28 @@ elif format == 'PDF':
 else:
 	raise ValueError(f"Format '{format}' invalid in download document from URL. Allowed formats are {allowed_formats}")
 
-# Display URL Folder in the browser
-driver = browser_ws.login_to_url(driver, file_url)
-time.sleep(3)
-
-# Detect the iframe related to the Word document for do the Scrapping
-xpath_iframe_document = "//iframe[@id='WacFrame_Word_0']"
-iframe_document = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_iframe_document)
-
-# Switch to the Word iframe
-is_downloaded = False
-if browser_ws.switch_to_frame_in_browser(driver, iframe_document):
-
-	# Find the element to display 'File' options
-	xpath_document_button = "//button[@id='FileMenuFlyoutLauncher']"
-	document_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_document_button)
-
-	# Click on the 'File' options
-	if browser_ws.click_element_in_driver(document_button):
-		time.sleep(1)
-
-		# Find the element of the frist element to download the file
-		xpath_side_panel_button = flow_dict['side_panel']
-		side_panel_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_side_panel_button)
-
-		# Click this first element to download the file
-		if browser_ws.click_element_in_driver(side_panel_button):
-			time.sleep(1)
-
-			# Find the download button element
-			xpath_download_button = flow_dict['download']
-			download_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_download_button)
-
-			# Click on the download button
-			if browser_ws.click_element_in_driver(download_button):
-				time.sleep(5)
-
-				# Find the element to confirm the download
-				xpath_confirm_button = flow_dict['confirm']
-				confirm_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_confirm_button)
-
-				# Click the confirmation button
-				if browser_ws.click_element_in_driver(confirm_button):
-					print(f"Successful download of file '{file_name}' from url")
-					is_downloaded = True
-
-if not is_downloaded:
+# Declare the flow: open the document, enter the Word iframe and click the menus until the download starts
+flow = StepFlow([
+	{'name': 'open document', 'action': 'navigate', 'url': file_url},
+	{'name': 'word iframe', 'action': 'switch_frame', 'locator': (By.XPATH, "//iframe[@id='WacFrame_Word_0']")},
+	{'name': 'file menu', 'action': 'click', 'locator': (By.XPATH, "//button[@id='FileMenuFlyoutLauncher']")},
+	{'name': 'side panel', 'action': 'click', 'locator': (By.XPATH, flow_dict['side_panel'])},
+	{'name': 'download', 'action': 'click', 'locator': (By.XPATH, flow_dict['download'])},
+	{'name': 'confirm', 'action': 'click', 'locator': (By.XPATH, flow_dict['confirm']), 'timeout': 30},
+	{'name': 'wait download', 'action': 'await_download', 'timeout': 300},
+	{'name': 'main document', 'action': 'return_frame'}
+], download_folder=download_path, retries=1)
+
+# Run the flow, if a step fails resume it once from that step without reloading the document
+flow_state = flow.run(driver)
+if not flow_state.completed:
+	flow_state = flow.run(driver, flow_state)
+print(flow_state.report())
+
+if flow_state.completed:
+	print(f"Successful download of file '{file_name}' from url in {flow_state.downloads}")
+else:
 	print(f"An error occurred downloading file '{file_name}' from url")
 
+flow_state.close()
 driver.quit()
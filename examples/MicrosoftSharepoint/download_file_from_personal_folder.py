@@ -8,10 +8,10 @@
 
 
 import os
-import time
-from selenium.webdriver.common.by import By
 
 import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+from src.download_watcher import DownloadWatcher
 
 
 # Variables
@@ -25,12 +25,11 @@ if not os.path.exists(download_path):
 driver = browser_ws.create_browser_connection(download_path)
 
 # Display URL Folder in the browser
-driver = browser_ws.login_to_url(driver, sharepoint_folder_url)
-time.sleep(3)
+driver = browser_ws.login_to_url(driver, sharepoint_folder_url, wait_condition=browser_ws.document_ready())
 
 # Find the element of the row which let download the folder
 xpath_row_file = f"//span[text()='{file_name}']"
-row_file = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_row_file)
+row_file = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_row_file, wait_condition='visible')
 
 # Find the div element of the row
 xpath_div_file = "./.."
@@ -38,20 +37,21 @@ div_file = browser_ws.find_element_in_driver(row_file, By.XPATH, xpath_div_file)
 
 # Click the div element to select the whole row
 is_downloaded = False
+download_watcher = DownloadWatcher(download_path)
 if browser_ws.context_click_element_in_driver(driver, div_file):
-	time.sleep(1)
 
 	# Find the download button element
 	xpath_download_button = "//button[@data-automationid='downloadCommand' and @aria-disabled='false']"
-	download_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_download_button)
-	time.sleep(1)
+	download_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_download_button, wait_condition='clickable')
 
 	# Click the download button of the folder
 	if browser_ws.click_element_in_driver(download_button):
-		print(f"Successful download of file '{file_name}' from personal folder")
+		downloaded_files = download_watcher.wait(timeout=300)
+		print(f"Successful download of file '{file_name}' from personal folder in {downloaded_files}")
 		is_downloaded = True
 
 if not is_downloaded:
 	print(f"An error occurred downloading file '{file_name}' from personal folder")
 
+download_watcher.close()
 driver.quit()
@@ -0,0 +1,45 @@
+"""
+@file examples/MicrosoftSharepoint/download_files_from_folder.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Main program to download several files of a Microsoft Sharepoint folder loading the folder only once
+"""
+
+
+import os
+from datetime import datetime
+
+import src.browser_web_scrapping as browser_ws
+from src.session_store import SessionStore
+from src.sharepoint_folder import SharePointFolder, filter_files
+
+
+# Variables
+sharepoint_folder_url = "https://basename.sharepoint.com/FolderName"
+name_pattern = "*.docx"
+modified_since = datetime(2025, 1, 1)
+
+# Create browser driver and set download folder
+download_path = os.path.join(os.getcwd(), 'dat')
+if not os.path.exists(download_path):
+	os.makedirs(download_path)
+session_store = SessionStore(os.path.join(download_path, 'sessions'))
+driver = browser_ws.create_browser_connection(download_path)
+
+# Display URL Folder in the browser and list all its files
+folder = SharePointFolder(driver, sharepoint_folder_url).open(needs_credentials=True, session_store=session_store)
+files = filter_files(folder.list_files(), pattern=name_pattern, modified_since=modified_since)
+print(f"{len(files)} files to download")
+
+# Select the rows and download them together, SharePoint sends a ZIP with the selected files
+# Use 'folder.download_direct(files, download_path)' instead to download each file with HTTP
+def report(name, path, error):
+	if error is None:
+		print(f"Successful download of file '{name}' in {path}")
+	else:
+		print(f"An error occurred downloading file '{name}': {error}")
+
+folder.download_selected(files, download_path, on_complete=report)
+
+driver.quit()
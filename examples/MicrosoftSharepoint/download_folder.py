@@ -8,10 +8,11 @@
 
 
 import os
-import time
-from selenium.webdriver.common.by import By
 
 import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+from src.download_watcher import DownloadWatcher
+from src.session_store import SessionStore
 
 
 # Variables
@@ -23,21 +24,25 @@ folder_url = f"{sharepoint_url}/{folder_name}"
 download_path = os.path.join(os.getcwd(), 'dat')
 if not os.path.exists(download_path):
 	os.makedirs(download_path)
+# The session of a previous login is restored in the browser, the manual login is only needed when it expires
+session_store = SessionStore(os.path.join(download_path, 'sessions'))
 driver = browser_ws.create_browser_connection(download_path)
 
 # Display URL Folder in the browser
-driver = browser_ws.login_to_url(driver, folder_url)
-time.sleep(3)
+driver = browser_ws.login_to_url(driver, folder_url, needs_credentials=True, wait_condition=browser_ws.document_ready(),
+	session_store=session_store)
 
 # Find Download Folder button element
 xpath_download_button = "//button[@data-automationid='downloadCommand']"
-download_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_download_button)
-time.sleep(1)
+download_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_download_button, wait_condition='clickable')
 
-# Click the button to download folder
+# Click the button to download folder and wait until the file is saved
+download_watcher = DownloadWatcher(download_path)
 if browser_ws.click_element_in_driver(download_button):
-	print(f"Successful download of folder '{folder_name}'")
+	downloaded_files = download_watcher.wait(timeout=600)
+	print(f"Successful download of folder '{folder_name}' in {downloaded_files}")
 else:
 	print(f"An error occurred downloading folder '{folder_name}'")
+download_watcher.close()
 
 driver.quit()
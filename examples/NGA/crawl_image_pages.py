@@ -0,0 +1,107 @@
+"""
+@file examples/NGA/crawl_image_pages.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Handler of the NGA image pages for 'src/crawl_runner.py', to crawl them with several browsers in parallel
+
+Run it from the root of the repository, after 'download_pictures_metadata_from_search.py' created the CSV of pages:
+
+	python -m src.crawl_runner dat/data_pages.csv --handler examples.NGA.crawl_image_pages:read_image_page \
+		--url-column ImageLink --id-column ImageID --delimiter '|' --workers 4 --output dat/data.csv \
+		--layout long --id-fields ID ImageName InfoURL ImageURL --performance-profile fast
+
+Each worker saves the images in its own folder 'dat/crawl/downloads/worker-<n>'.
+"""
+
+
+
+import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+import src.http_downloads as http_ws
+
+
+# Set the list with all XPATH with util information
+xpath_atributes_list = [
+	"//div[@class='object-attr medium']",
+	"//div[@class='object-attr dimensions']",
+	"//div[@class='object-attr credit']",
+	"//div[@class='object-attr accession']",
+	"//div[@class='object-attr artists-makers']"
+]
+
+# Schema to read the collection, the attributes and the link of the image in a single call to the browser
+xpath_download = "//a[@title='download image']"
+page_schema = {'Collection': (By.XPATH, "//div[@id='oe-strip-wrap']")}
+page_schema.update({xpath: (By.XPATH, xpath) for xpath in xpath_atributes_list})
+page_schema['ImageURL'] = {'type': By.XPATH, 'locator': xpath_download, 'field': 'attribute', 'attribute': 'href'}
+
+# Buttons which display the description and the analysis, and the element with their text
+drawers = {
+	'Description': ("//button[@id='drawer-control-0']", "//div[@id='drawer-content-0']"),
+	'Entry': ("//button[@id='tab-entry']", "//div[@data-id='entry']")
+}
+
+# HTTP session of the worker process, created with the cookies of its browser on the first image
+_session = None
+
+
+def read_drawer(driver, xpath_button: str, xpath_content: str) -> str | None:
+	"""
+	Clicks the button of a drawer and reads its text.
+
+	@return The text of the drawer, None if it could not be displayed.
+	"""
+
+	button_element = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_button)
+	if button_element is None:
+		return None
+
+	content_visible = browser_ws.element_visible(By.XPATH, xpath_content)
+	if not browser_ws.click_element_in_driver(button_element, need_scroll=True, driver=driver, wait_condition=content_visible):
+		return None
+
+	return browser_ws.find_element_in_driver(driver, By.XPATH, xpath_content).text
+
+
+def read_image_page(driver, nga_image_url: str, download_folder: str) -> dict:
+	"""
+	Reads the metadata of an image page and downloads its image.
+
+	@param driver The browser of the worker.
+	@param nga_image_url The URL of the page, as saved in the CSV of the search.
+	@param download_folder The folder of the worker.
+	@return The record of the page.
+	"""
+
+	global _session
+
+	nga_image_url = nga_image_url.replace("/content/ngaweb", "")
+	browser_ws.login_to_url(driver, nga_image_url, wait_condition=browser_ws.document_ready())
+
+	# Read the collection and the attributes, each attribute is the title and the value in two lines
+	page_data = browser_ws.extract_elements_in_driver(driver, page_schema)
+	record = {
+		'ImageName': "",
+		'InfoURL': nga_image_url,
+		'ImageURL': page_data['ImageURL'] or "",
+		'Collection': (page_data['Collection'] or "").replace('\n', '')
+	}
+	for xpath in xpath_atributes_list:
+		if page_data[xpath] is not None and '\n' in page_data[xpath]:
+			info_list = page_data[xpath].split('\n', maxsplit=1)
+			record[info_list[0]] = info_list[1]
+
+	for name, (xpath_button, xpath_content) in drawers.items():
+		text = read_drawer(driver, xpath_button, xpath_content)
+		if text is not None:
+			record[name] = text
+
+	# Download the image with HTTP, the browser is not needed for it
+	if record['ImageURL']:
+		record['ImageName'] = record['ImageURL'].split('=')[-1]
+		if _session is None:
+			_session = http_ws.session_from_driver(driver)
+		http_ws.download_file(_session, record['ImageURL'], download_folder, record['ImageName'])
+
+	return record
@@ -10,11 +10,17 @@ This program save the information in a CSV located in the same folder where the
 
 
 import os
-import time
 import pandas as pd
-from selenium.webdriver.common.by import By
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+import src.http_downloads as http_ws
+from src.job_state import JobStateStore
+from src.rate_limiter import RateLimiter, RetryPolicy
+from src.record_sink import RecordSink
+from src.tab_multiplexer import TabMultiplexer
 
 
 df = pd.read_csv("dat/data_pages.csv", delimiter="|", encoding="utf-8")
@@ -26,12 +32,18 @@ nga_image_url = "https://www.nga.gov/collection/art-object-page.43626.html"
 download_path = os.path.join(os.getcwd(), 'dat/')
 if not os.path.exists(download_path):
 	os.makedirs(download_path)
-driver = browser_ws.create_browser_connection(download_path)
+driver = browser_ws.create_browser_connection(download_path, performance_profile='multiplexed')
 
-df_headers = pd.DataFrame(columns=['ID', 'ImageName', 'InfoURL', 'ImageURL', 'Attribute', 'Value'])
-df_headers.to_csv(f"{download_path}/data.csv", sep="|", index=False, encoding="utf-8")
-#df_in = pd.read_csv(f"{download_path}/data.csv", delimiter="|", encoding="utf-8")
-#df = df[~df['ImageID'].isin(df_in['ID'])]
+# The metadata is saved with a row per attribute, the pages are marked as done after each checkpoint of the file
+sink = RecordSink(f"{download_path}/data.csv", layout='long', id_fields=['ID', 'ImageName', 'InfoURL', 'ImageURL'],
+	delimiter="|", batch_size=200)
+checkpoint_every = 20
+pages_to_confirm = []
+
+# State of each image page, the pages done in previous runs are skipped and the ones interrupted are done again
+job_state = JobStateStore(f"{download_path}/data_jobs.sqlite")
+job_state.add_items((link.split('.')[-2], link.replace("/content/ngaweb", "")) for link in df['ImageLink'])
+job_state.reset_in_progress()
 
 # Set the list with all XPATH with util information
 xpath_atributes_list = [
@@ -42,89 +54,136 @@ xpath_atributes_list = [
 	"//div[@class='object-attr artists-makers']"
 ]
 
+# Schema to read the collection and all the attributes in a single call to the browser
+page_schema = {'Collection': (By.XPATH, "//div[@id='oe-strip-wrap']")}
+page_schema.update({xpath: (By.XPATH, xpath) for xpath in xpath_atributes_list})
 
-count = 0
-for nga_image_url in df['ImageLink']:
-	nga_image_url = nga_image_url.replace("/content/ngaweb", "")
-	print(f"{nga_image_url} is the image {count} of {len(df)}")
-
-	# Display Image URL in the browser
-	driver = browser_ws.login_to_url(driver, nga_image_url)
-	time.sleep(5)
-
-	# Get the collection name if found, otherwise set as empty string
-	collection = ""
-	try:
-		info_element = browser_ws.find_element_in_driver(driver, By.XPATH, "//div[@id='oe-strip-wrap']")
-		collection = info_element.text.replace('\n', '')
-	except Exception as e:
-		print("Can't be found the element")
+# The images are downloaded with HTTP in background, the browser only finds their links
+xpath_download = "//a[@title='download image']"
+page_schema['ImageURL'] = {'type': By.XPATH, 'locator': xpath_download, 'field': 'attribute', 'attribute': 'href'}
+download_executor = ThreadPoolExecutor(max_workers=8)
+
+# The pages and the images are requested as fast as the site answers well, instead of a fixed pause between pages
+rate_limiter = RateLimiter(initial_rate=0.5, max_rate=5)
+retry_policy = RetryPolicy(max_attempts=4)
+session = None
+
+def finish_image(image_id, future):
+	if future.exception() is None:
+		job_state.mark_done(image_id)
+	else:
+		job_state.mark_failed(image_id, str(future.exception()))
+
+def confirm_pages():
+	sink.checkpoint()
+	for image_id, future in pages_to_confirm:
+		if future is None:
+			job_state.mark_done(image_id)
+		else:
+			future.add_done_callback(partial(finish_image, image_id))
+	pages_to_confirm.clear()
+
+
+def read_image_page(driver, nga_image_url):
+	"""
+	Reads the metadata of an image page, the driver is already switched to the tab of the page.
+	"""
+
+	# Read the collection and the attributes, the collection is an empty string if not found
+	page_data = browser_ws.extract_elements_in_driver(driver, page_schema)
+	collection = "" if page_data['Collection'] is None else page_data['Collection'].replace('\n', '')
 
 	# Save informaion from XPATHs in Dictionary Form
-	data_dict = {'Attribute': ['Collection'], 'Value': [collection]}
+	data_dict = {'Collection': collection}
 	for xpath in xpath_atributes_list:
-		element = browser_ws.find_element_in_driver(driver, By.XPATH, xpath)
-		if element is not None:
-			info_list = element.text.split('\n', maxsplit=1)
-			data_dict['Attribute'].append(info_list[0])
-			data_dict['Value'].append(info_list[1])
+		if page_data[xpath] is not None:
+			info_list = page_data[xpath].split('\n', maxsplit=1)
+			data_dict[info_list[0]] = info_list[1]
 		else:
 			print(f"In {xpath} the element gotten is None")
 
 	# Get description and save it in the Dictionary
 	xpath_button = "//button[@id='drawer-control-0']"
+	xpath_description = "//div[@id='drawer-content-0']"
 	button_element = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_button)
 	if button_element is not None:
-		if browser_ws.click_element_in_driver(button_element, need_scroll=True, driver=driver):
-			time.sleep(1)
-			xpath_description = "//div[@id='drawer-content-0']"
+		description_visible = browser_ws.element_visible(By.XPATH, xpath_description)
+		if browser_ws.click_element_in_driver(button_element, need_scroll=True, driver=driver, wait_condition=description_visible):
 			description_element = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_description)
-			data_dict['Attribute'].append('Description')
-			data_dict['Value'].append(description_element.text)
+			data_dict['Description'] = description_element.text
 		else:
 			print(f"Click in the button {xpath_button} was False")
 	else:
 		print(f"In {xpath_button} the element gotten is None")
 
-	# Find element to download image
-	xpath_download = "//a[@title='download image']"
-	download_button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_download)
+	# Save the link to download image
 	image_name = ""
 	image_url = ""
-	if download_button is not None:
-		image_url = download_button.get_attribute('href')
+	if page_data['ImageURL'] is not None:
+		image_url = page_data['ImageURL']
 		image_name = image_url.split('=')[-1]
-		if browser_ws.click_element_in_driver(download_button, need_scroll=True, driver=driver):
-			print("Image successfully downloaded")
-		else:
-			print("Image NOT successfully downloaded")
 	else:
 		print(f"In {xpath_download} the element gotten is None")
 
 	# Get Analysis (Entry Tab) and save it in the Dictionary
 	xpath_button = "//button[@id='tab-entry']"
+	xpath_description = "//div[@data-id='entry']"
 	button_element = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_button)
 	if button_element is not None:
-		if browser_ws.click_element_in_driver(button_element, need_scroll=True, driver=driver):
-			time.sleep(1)
-			xpath_description = "//div[@data-id='entry']"
+		description_visible = browser_ws.element_visible(By.XPATH, xpath_description)
+		if browser_ws.click_element_in_driver(button_element, need_scroll=True, driver=driver, wait_condition=description_visible):
 			description_element = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_description)
-			data_dict['Attribute'].append('Entry')
-			data_dict['Value'].append(description_element.text)
+			data_dict['Entry'] = description_element.text
 		else:
 			print(f"Click in the button {xpath_button} was False")
 	else:
 		print(f"In {xpath_button} the element gotten is None")
 
-	# Create DataFrame from Dictionary and save it as CSV
-	df = pd.DataFrame(data_dict)
-	df.insert(0, 'ImageURL', [image_url]*len(df))
-	df.insert(0, 'InfoURL', [nga_image_url]*len(df))
-	df.insert(0, 'ImageName', [image_name]*len(df))
-	df.insert(0, 'ID', [nga_image_url.split('.')[-2]]*len(df))
-	df.to_csv(f"{download_path}/data.csv", sep="|", index=False, encoding="utf-8", mode="a", header=False)
-	time.sleep(5)
+	return data_dict, image_name, image_url
 
-	count += 1
 
+count = 0
+total = job_state.counts()['pending']
+
+# The pages are loaded in several tabs of the browser at once, and read in the order they get ready
+with TabMultiplexer(driver, tabs=4, rate_limiter=rate_limiter) as multiplexer:
+	while True:
+		claimed = job_state.claim(limit=multiplexer.tabs * 5)
+		if len(claimed) == 0:
+			break
+		image_ids = {nga_image_url: image_id for image_id, nga_image_url in claimed}
+
+		for nga_image_url, page, error in multiplexer.process(image_ids, read_image_page):
+			image_id = image_ids[nga_image_url]
+			print(f"{nga_image_url} is the image {count} of {total}")
+			count += 1
+
+			if error is not None:
+				print(f"An error occurred reading the page {nga_image_url}: {error}")
+				job_state.mark_failed(image_id, str(error))
+				continue
+			data_dict, image_name, image_url = page
+
+			# Save the record, its ID fields are repeated in the row of each attribute
+			sink.push({'ID': image_id, 'ImageName': image_name, 'InfoURL': nga_image_url, 'ImageURL': image_url, **data_dict})
+
+			# The page is done when its record is in disk and its image is downloaded, with the cookies of the browser
+			future = None
+			if image_url:
+				if session is None:
+					session = http_ws.session_from_driver(driver)
+				future = download_executor.submit(http_ws.download_file, session, image_url, download_path, image_name,
+					rate_limiter=rate_limiter, retry_policy=retry_policy)
+			pages_to_confirm.append((image_id, future))
+			if len(pages_to_confirm) >= checkpoint_every:
+				confirm_pages()
+
+confirm_pages()
+sink.close()
+download_executor.shutdown(wait=True)
 driver.quit()
+
+print(f"State of the image pages: {job_state.counts()}")
+job_state.close()
+if session is not None:
+	session.close()
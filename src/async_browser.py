@@ -0,0 +1,205 @@
+"""
+@file src/async_browser.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief asyncio version of the helpers of 'src/browser_web_scrapping'
+
+Each driver gets a dedicated thread where the helpers of 'browser_web_scrapping' run one after the other, like
+'asyncio.to_thread' but keeping the order of the calls on a driver, so the event loop is never blocked and the
+coroutines have the behavior of the helpers (element cache, rate limiter, sessions and snapshots). Only
+'wait_for_condition' polls its condition with 'asyncio.sleep', so it can be cancelled between two polls and other
+commands of the driver run between them; a command already sent to the driver always finishes in its thread.
+"""
+
+
+from __future__ import annotations
+
+import asyncio
+import time
+import contextvars
+from functools import partial
+from typing import TYPE_CHECKING
+from concurrent.futures import ThreadPoolExecutor
+
+import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+from src.instrumentation import instrumented
+
+if TYPE_CHECKING:
+	from selenium.webdriver.remote.webelement import WebElement
+
+
+
+class AsyncDriver:
+	"""
+	Wrapper of a Selenium WebDriver whose methods are coroutines with the names and arguments of the helpers.
+	"""
+
+	def __init__(self, driver, executor: ThreadPoolExecutor = None):
+		"""
+		@param driver A Selenium WebDriver instance.
+		@param executor The single thread executor of the driver, a new one is created if it is not given.
+		"""
+
+		self.driver = driver
+		self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='browser') if executor is None else executor
+
+
+	async def run(self, function, *args, **kwargs):
+		"""
+		Runs a blocking function in the thread of the driver.
+
+		@param function The function, e.g. a method of the driver or a helper of 'browser_web_scrapping'.
+		@param args The positional arguments of the function.
+		@param kwargs The keyword arguments of the function.
+		@return The value returned by the function.
+		"""
+
+		# The context is copied so the failures noted in the thread reach the instrumented coroutine
+		loop = asyncio.get_running_loop()
+		context = contextvars.copy_context()
+		return await loop.run_in_executor(self._executor, partial(context.run, function, *args, **kwargs))
+
+
+	@instrumented()
+	async def wait_for_condition(self, condition, timeout: float = browser_ws.DEFAULT_WAIT_TIMEOUT,
+			poll_frequency: float = browser_ws.DEFAULT_POLL_FREQUENCY):
+		"""
+		Polls a condition until it returns a truthy value or the timeout expires, without blocking the event loop.
+
+		@param condition A callable which receives the driver, like the ones built in 'browser_web_scrapping'.
+		@param timeout The maximum time in seconds to wait.
+		@param poll_frequency The time in seconds between evaluations of the condition.
+		@return The value returned by the condition.
+		@throws TimeoutException If the condition does not hold before the timeout.
+		"""
+
+		from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+
+		# Exceptions which mean the condition does not hold yet, like in 'WebDriverWait'
+		ignored_exceptions = (NoSuchElementException, StaleElementReferenceException)
+
+		deadline = time.monotonic() + timeout
+		while True:
+			try:
+				value = await self.run(condition, self.driver)
+				if value:
+					return value
+			except ignored_exceptions:
+				pass
+
+			remaining = deadline - time.monotonic()
+			if remaining <= 0:
+				raise TimeoutException(f"The condition did not hold in {timeout} seconds")
+			await asyncio.sleep(min(poll_frequency, remaining))
+
+
+	async def login_to_url(self, url: str, needs_credentials: bool = False, wait_condition = None,
+			timeout: float = browser_ws.DEFAULT_WAIT_TIMEOUT, rate_limiter = None, retry_policy = None,
+			session_store = None, snapshot_recorder = None):
+		"""
+		Opens a URL in the browser and waits for manual login, see 'browser_web_scrapping.login_to_url'.
+
+		The credentials are read in the thread of the driver, which has no other command to run until the login ends.
+
+		@return The AsyncDriver after manual login.
+		"""
+
+		try:
+			await self.run(browser_ws.login_to_url, self.driver, url, needs_credentials, wait_condition, timeout,
+				rate_limiter, retry_policy, session_store, snapshot_recorder)
+		except Exception:
+			# The helper closed the browser
+			self._executor.shutdown(wait=False)
+			raise
+
+		return self
+
+
+	async def find_element_in_driver(self, type_element: By, element: str, verbose: bool = False,
+			wait_condition = None, timeout: float = browser_ws.DEFAULT_WAIT_TIMEOUT, rate_limiter = None) -> WebElement:
+		"""
+		Finds an element using the specified locator type, see 'browser_web_scrapping.find_element_in_driver'.
+
+		@return The found web element, None if it is not found.
+		"""
+
+		return await self.run(browser_ws.find_element_in_driver, self.driver, type_element, element, verbose,
+			wait_condition, timeout, rate_limiter)
+
+
+	async def extract_elements_in_driver(self, schema: dict, root: WebElement = None) -> dict:
+		"""
+		Reads several elements in a single call to the browser, see 'browser_web_scrapping.extract_elements_in_driver'.
+		"""
+
+		return await self.run(browser_ws.extract_elements_in_driver, self.driver, schema, root)
+
+
+	async def click_element_in_driver(self, element: WebElement, need_scroll: bool = False, wait_condition = None,
+			timeout: float = browser_ws.DEFAULT_WAIT_TIMEOUT) -> bool:
+		"""
+		Clicks on a web element, see 'browser_web_scrapping.click_element_in_driver'.
+
+		@return True if the click is successful, False otherwise.
+		"""
+
+		return await self.run(browser_ws.click_element_in_driver, element, need_scroll, self.driver, wait_condition,
+			timeout)
+
+
+	async def context_click_element_in_driver(self, element: WebElement) -> bool:
+		return await self.run(browser_ws.context_click_element_in_driver, self.driver, element)
+
+
+	async def switch_to_frame_in_browser(self, frame) -> bool:
+		return await self.run(browser_ws.switch_to_frame_in_browser, self.driver, frame)
+
+
+	async def return_from_frame_in_browser(self) -> bool:
+		return await self.run(browser_ws.return_from_frame_in_browser, self.driver)
+
+
+	async def locate_cursor_in_position(self, x: str|int = 'min', y: str|int = 'min'):
+		return await self.run(browser_ws.locate_cursor_in_position, self.driver, x, y)
+
+
+	async def quit(self):
+		"""
+		Closes the browser and stops the thread of the driver.
+		"""
+
+		try:
+			await self.run(self.driver.quit)
+		finally:
+			self._executor.shutdown(wait=False)
+
+
+	async def __aenter__(self):
+		return self
+
+
+	async def __aexit__(self, exc_type, exc_value, traceback):
+		await self.quit()
+
+
+
+async def create_browser_connection(download_folder: str, **kwargs) -> AsyncDriver:
+	"""
+	Launches a browser in its own thread, see 'browser_web_scrapping.create_browser_connection'.
+
+	@param download_folder The path to the folder where downloads should be saved.
+	@param kwargs The other arguments of 'browser_web_scrapping.create_browser_connection'.
+	@return The AsyncDriver of the browser.
+	"""
+
+	executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='browser')
+	loop = asyncio.get_running_loop()
+	try:
+		driver = await loop.run_in_executor(executor, partial(browser_ws.create_browser_connection, download_folder, **kwargs))
+	except BaseException:
+		executor.shutdown(wait=False)
+		raise
+
+	return AsyncDriver(driver, executor)
@@ -0,0 +1,35 @@
+"""
+@file src/browser_web_scrapping/__init__.py
+@date 2025-04-19
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Useful functions to interact with the browser for Web Scrapping
+
+The helpers are split in modules (connection, conditions, locators, element_cache and actions) and all of them are available from
+the package, e.g. 'browser_ws.find_element_in_driver' after 'import src.browser_web_scrapping as browser_ws'.
+Importing the package does not import Selenium: the WebDriver of a browser is loaded by 'create_browser_connection'
+and the Selenium helpers by the first function which needs them. Use 'By' from this package for the locators to keep
+the import fast, its values are the same of the Selenium 'By'.
+"""
+
+
+from src.browser_web_scrapping.locators import (
+	By, extraction_fields, extraction_script, xpath_literal, css_string, locator_to_xpath_or_css,
+	normalize_extraction_schema
+)
+from src.browser_web_scrapping.conditions import (
+	DEFAULT_WAIT_TIMEOUT, DEFAULT_POLL_FREQUENCY, element_present, element_visible, element_clickable, element_stale,
+	url_changes, document_ready, js_predicate, locator_conditions, wait_for_condition
+)
+from src.browser_web_scrapping.element_cache import (
+	DEFAULT_ELEMENT_CACHE_SIZE, ElementCache, enable_element_cache, disable_element_cache, element_cache_of,
+	invalidate_element_cache, note_window_switch
+)
+from src.browser_web_scrapping.connection import (
+	resource_url_patterns, firefox_blocking_prefs, performance_profiles, get_performance_profile,
+	block_urls_in_current_tab, create_browser_connection
+)
+from src.browser_web_scrapping.actions import (
+	login_to_url, find_element_in_driver, extract_elements_in_driver, click_element_in_driver,
+	context_click_element_in_driver, switch_to_frame_in_browser, return_from_frame_in_browser, locate_cursor_in_position
+)
@@ -0,0 +1,345 @@
+"""
+@file src/browser_web_scrapping/actions.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Helpers which act on the page opened in a driver: navigation, search, extraction, clicks and frames
+"""
+
+
+from __future__ import annotations
+
+from contextlib import nullcontext
+from typing import TYPE_CHECKING
+
+from src.browser_web_scrapping.conditions import DEFAULT_WAIT_TIMEOUT, element_clickable, locator_conditions, wait_for_condition
+from src.browser_web_scrapping.element_cache import element_cache_of, invalidate_element_cache
+from src.browser_web_scrapping.locators import By, extraction_script, normalize_extraction_schema
+from src.instrumentation import instrumented, note_failure
+
+if TYPE_CHECKING:
+	from selenium import webdriver
+	from selenium.webdriver.remote.webelement import WebElement
+
+
+@instrumented()
+def login_to_url(driver: webdriver.Chrome, url: str, needs_credentials: bool = False, wait_condition = None,
+		timeout: float = DEFAULT_WAIT_TIMEOUT, rate_limiter = None, retry_policy = None,
+		session_store = None, snapshot_recorder = None) -> webdriver.Chrome:
+	"""
+	Opens a browser window to a specified URL and waits for manual login.
+
+	@param driver A Selenium WebDriver instance.
+	@param url The URL to navigate to for login.
+	@param needs_credentials Boolean to permit input credentials if needed
+	@param wait_condition Optional condition that must hold before returning, e.g. document_ready().
+	@param timeout The maximum time in seconds to wait for the condition.
+	@param rate_limiter Optional RateLimiter (see 'src/rate_limiter.py'), the page load waits its turn and its latency
+		adapts the rate of the host. The host is bound to the driver for the helpers which act on the page.
+	@param retry_policy Optional RetryPolicy to load the page again if it fails, before giving up.
+	@param session_store Optional SessionStore (see 'src/session_store.py'), the saved session of the origin is restored
+		before loading the URL and the manual login is skipped if the server accepts it. The session is saved after
+		a manual login, or again after the server accepted it to keep the renewed cookies. A session the server
+		rejected is removed from the store.
+	@param snapshot_recorder Optional SnapshotRecorder (see 'src/snapshot_archive.py') which saves the loaded page,
+		by default the recorder attached to the driver if there is one.
+	@return The WebDriver instance after manual login.
+	"""
+
+	restored = False
+	accepted = False
+	credentials_entered = False
+
+	def load():
+		nonlocal accepted, credentials_entered
+
+		if rate_limiter is not None:
+			rate_limiter.bind(driver, url)
+
+		# The cached elements belong to the previous page
+		invalidate_element_cache(driver)
+
+		with rate_limiter.slot(url, feedback=not needs_credentials) if rate_limiter is not None else nullcontext():
+			driver.get(url)
+
+			# A rejected session is removed from the store by 'accepted'
+			accepted = restored and session_store.accepted(driver, url)
+			if needs_credentials and not accepted:
+				print("Log in manually and press Enter here...")
+				input()
+				credentials_entered = True
+
+			if wait_condition is not None:
+				wait_for_condition(driver, wait_condition, timeout)
+
+	try:
+		restored = session_store is not None and session_store.restore(driver, url)
+
+		if retry_policy is None:
+			load()
+		else:
+			retry_policy.call(load)
+
+		if session_store is not None and (accepted or credentials_entered):
+			session_store.save(driver, url)
+
+		if snapshot_recorder is None:
+			from src.snapshot_archive import snapshot_recorder_of
+			snapshot_recorder = snapshot_recorder_of(driver)
+		if snapshot_recorder is not None:
+			snapshot_recorder.record(driver, url)
+
+		return driver
+	except Exception as e:
+		driver.quit()
+		raise Exception(f"An error occurred logging in browser: {e}")
+
+
+
+@instrumented(failure_results=(None,))
+def find_element_in_driver(driver: webdriver.Chrome, type_element: By, element: str, verbose: bool = False,
+		wait_condition = None, timeout: float = DEFAULT_WAIT_TIMEOUT, rate_limiter = None) -> WebElement:
+	"""
+	Finds an element in a Selenium WebDriver instance using the specified locator type.
+
+	@param driver A Selenium WebDriver instance.
+	@param type_element The type of locator (e.g., By.ID, By.CLASS_NAME, By.XPATH).
+	@param element The element selector string.
+	@param verbose Whether to print the outer HTML of the found element, defaults to False.
+	@param wait_condition Optional 'present', 'visible', 'clickable' or a condition to wait before finding.
+	@param timeout The maximum time in seconds to wait for the condition.
+	@param rate_limiter Optional RateLimiter, the search waits while the host of the page (bound by 'login_to_url')
+		is paused, e.g. after a 429 response. It does not take tokens nor adapt the rate, finding sends no request.
+	@return The found web element.
+	"""
+
+	cache = element_cache_of(driver)
+
+	try:
+		host = rate_limiter.host_of(driver) if rate_limiter is not None else None
+		if host is not None:
+			rate_limiter.release(rate_limiter.acquire(host, cost=0), feedback=False)
+
+		element_found = cache.get(type_element, element) if cache is not None else None
+		if element_found is not None:
+			element_found = _check_cached_element(driver, cache, element_found, wait_condition, timeout)
+
+		if element_found is None:
+			if wait_condition in locator_conditions:
+				element_found = wait_for_condition(driver, locator_conditions[wait_condition](type_element, element), timeout)
+			else:
+				if wait_condition is not None:
+					wait_for_condition(driver, wait_condition, timeout)
+				element_found = driver.find_element(type_element, element)
+
+			if cache is not None:
+				cache.put(type_element, element, element_found)
+
+		if verbose:
+			print(element_found.get_attribute("outerHTML"))
+
+		return element_found
+	except Exception as e:
+		note_failure(e)
+		print(f"An error occurred finding element: {e}")
+		return None
+
+
+def _check_cached_element(driver: webdriver.Chrome, cache, element_found: WebElement, wait_condition,
+		timeout: float) -> WebElement | None:
+	"""
+	Waits the condition of a search on its cached element, or checks it is still attached to the page.
+
+	@return The cached element, None if it is stale and must be searched again.
+	"""
+
+	from selenium.common.exceptions import StaleElementReferenceException
+
+	try:
+		if wait_condition in ('visible', 'clickable'):
+			wait_for_condition(driver, locator_conditions[wait_condition](element_found), timeout)
+		else:
+			if wait_condition is not None and wait_condition != 'present':
+				wait_for_condition(driver, wait_condition, timeout)
+			# Cheapest command which fails on an element of a previous page
+			element_found.is_enabled()
+		return element_found
+	except StaleElementReferenceException:
+		cache.discard(element_found)
+		return None
+
+
+@instrumented()
+def extract_elements_in_driver(driver: webdriver.Chrome, schema: dict, root: WebElement = None) -> dict:
+	"""
+	Reads several elements of the page in a single round trip to the browser.
+
+	@param driver A Selenium WebDriver instance.
+	@param schema The dictionary of named locators, see 'normalize_extraction_schema'.
+	@param root Optional web element, the locators are evaluated relative to it.
+	@return A dictionary with the same keys as the schema, missing elements are None (or [] if 'many').
+	"""
+
+	specs = normalize_extraction_schema(schema)
+
+	try:
+		return driver.execute_script(extraction_script, specs, root)
+	except Exception as e:
+		raise Exception(f"An error occurred extracting elements: {e}")
+
+
+@instrumented(failure_results=(False,))
+def click_element_in_driver(element: WebElement, need_scroll: bool = False, driver = None, wait_condition = None,
+		timeout: float = DEFAULT_WAIT_TIMEOUT) -> bool:
+	"""
+	Clicks on a web element using Selenium WebDriver.
+
+	@param element The web element to be clicked.
+	@param need_scroll Boolean which move (scroll) the driver to the element.
+	@param driver The driver of the current session, mandatory if scrolling or waiting need to be done. With the
+		element cache of the driver enabled, a stale cached element is searched again and clicked once more.
+	@param wait_condition Optional condition that must hold after the click, e.g. element_visible(...).
+	@param timeout The maximum time in seconds to wait for the element and the condition.
+	@return True if the click is successful, False otherwise.
+	"""
+
+	if (need_scroll or wait_condition is not None) and driver is None:
+		raise ValueError(f"If scroll or wait is needed then driver is required")
+
+	def click(target: WebElement):
+		if need_scroll:
+			driver.execute_script("arguments[0].scrollIntoView(true);", target)
+			wait_for_condition(driver, element_clickable(target), timeout)
+		target.click()
+
+	try:
+		from selenium.common.exceptions import StaleElementReferenceException
+
+		try:
+			click(element)
+		except StaleElementReferenceException:
+			cache = element_cache_of(driver) if driver is not None else None
+			locator = cache.locator_of(element) if cache is not None else None
+			if locator is None:
+				raise
+			cache.discard(element)
+			click(find_element_in_driver(driver, *locator, wait_condition='clickable', timeout=timeout))
+
+		if wait_condition is not None:
+			wait_for_condition(driver, wait_condition, timeout)
+
+		return True
+
+	except Exception as e:
+		note_failure(e)
+		print(f"An error occurred clicking element: {e}")
+		return False
+
+
+@instrumented(failure_results=(False,))
+def context_click_element_in_driver(driver: webdriver.Chrome, element: WebElement) -> bool:
+	"""
+	Performs a right-click (context click) on a web element using Selenium WebDriver.
+
+	@param driver The Selenium WebDriver instance.
+	@param element The web element to be right-clicked.
+	@return True if the context click is successful, False otherwise.
+	"""
+
+	try:
+		from selenium.webdriver import ActionChains
+
+		action = ActionChains(driver)
+		action.context_click(element).perform()
+		return True
+
+	except Exception as e:
+		note_failure(e)
+		print(f"An error occurred doing context click in element: {e}")
+		return False
+
+
+@instrumented(failure_results=(False,))
+def switch_to_frame_in_browser(driver: webdriver.Chrome, frame) -> bool:
+  """
+  Switches to a specified iframe in the browser using Selenium WebDriver.
+
+  @param driver The Selenium WebDriver instance.
+  @param frame The frame element or frame name/index to switch to.
+  @return True if the switch is successful, False otherwise.
+  """
+
+  try:
+    from selenium.common.exceptions import StaleElementReferenceException
+
+    cache = element_cache_of(driver)
+    try:
+      driver.switch_to.frame(frame)
+    except StaleElementReferenceException:
+      # A stale cached frame element is discarded and searched again once
+      locator = cache.locator_of(frame) if cache is not None else None
+      if locator is None:
+        raise
+      cache.discard(frame)
+      frame = find_element_in_driver(driver, *locator, timeout=DEFAULT_WAIT_TIMEOUT)
+      if frame is None:
+        raise
+      driver.switch_to.frame(frame)
+
+    if cache is not None:
+      cache.enter_frame(frame)
+    return True
+
+  except Exception as e:
+    note_failure(e)
+    print(f"An error occurred switching to frame: {e}")
+    return False
+
+
+@instrumented(failure_results=(False,))
+def return_from_frame_in_browser(driver: webdriver.Chrome) -> bool:
+	"""
+	Switches back to the main content from an iframe using Selenium WebDriver.
+
+	@param driver The Selenium WebDriver instance.
+	@return True if the switch is successful, False otherwise.
+	"""
+
+	try:
+		driver.switch_to.default_content()
+
+		cache = element_cache_of(driver)
+		if cache is not None:
+			cache.leave_frames()
+		return True
+
+	except Exception as e:
+		note_failure(e)
+		print(f"An error occurred returning from frame: {e}")
+		return False
+
+
+@instrumented()
+def locate_cursor_in_position(driver: webdriver.Chrome, x: str|int = 'min', y: str|int = 'min'):
+	"""
+	Move the cursor to a specific position on the page..
+
+	@param driver Chrome WebDriver instance
+	@param x X-coordinate or 'min'/'max' for minimum/maximum scroll width
+	@param y Y-coordinate or 'min'/'max' for minimum/maximum scroll height
+	@return None
+	"""
+
+	availabe_categories = ['min', 'max']
+	if not (x in availabe_categories or y in availabe_categories or isinstance(x, int) or isinstance(y, int)):
+		raise ValueError(f"{x} and {y} are not valid in the cursor location function.")
+
+	if x in availabe_categories:
+		x = 0 if x == 'min' else 'document.body.scrollWidth'
+	if y in availabe_categories:
+		y = 0 if y == 'min' else 'document.body.scrollHeight'
+
+	try:
+		driver.execute_script(f"window.scrollTo({x}, {y});")
+	except Exception as e:
+		raise Exception(f"An error occurred locating the cursor in position: {e}")
@@ -0,0 +1,144 @@
+"""
+@file src/browser_web_scrapping/conditions.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Wait conditions of the helpers and the function which polls them
+
+The conditions are built with the 'expected_conditions' of Selenium, which is imported the first time a condition is
+built and not when the package is imported.
+"""
+
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.browser_web_scrapping.locators import By
+from src.instrumentation import instrumented
+
+if TYPE_CHECKING:
+	from selenium import webdriver
+	from selenium.webdriver.remote.webelement import WebElement
+
+
+# Default values used by every wait in the package
+DEFAULT_WAIT_TIMEOUT = 10
+DEFAULT_POLL_FREQUENCY = 0.2
+
+
+def element_present(type_element: By, element: str):
+	"""
+	Builds a wait condition satisfied when an element is attached to the DOM.
+
+	@param type_element The type of locator (e.g., By.ID, By.CLASS_NAME, By.XPATH).
+	@param element The element selector string.
+	@return A condition which returns the element once it is present.
+	"""
+
+	from selenium.webdriver.support import expected_conditions
+	return expected_conditions.presence_of_element_located((type_element, element))
+
+
+def element_visible(type_element: By | WebElement, element: str = None):
+	"""
+	Builds a wait condition satisfied when an element is present and displayed.
+
+	@param type_element The type of locator (e.g., By.ID, By.CLASS_NAME, By.XPATH), or an already found web element.
+	@param element The element selector string, not used if a web element is given.
+	@return A condition which returns the element once it is visible.
+	"""
+
+	from selenium.webdriver.support import expected_conditions
+
+	if element is None:
+		return expected_conditions.visibility_of(type_element)
+	return expected_conditions.visibility_of_element_located((type_element, element))
+
+
+def element_clickable(type_element: By | WebElement, element: str = None):
+	"""
+	Builds a wait condition satisfied when an element is visible and enabled.
+
+	@param type_element The type of locator, or an already found web element.
+	@param element The element selector string, not used if a web element is given.
+	@return A condition which returns the element once it can be clicked.
+	"""
+
+	from selenium.webdriver.support import expected_conditions
+
+	mark = type_element if element is None else (type_element, element)
+	return expected_conditions.element_to_be_clickable(mark)
+
+
+def element_stale(element: WebElement):
+	"""
+	Builds a wait condition satisfied when an element is detached from the DOM, e.g. after a page change.
+
+	@param element The web element expected to become stale.
+	@return A condition which returns True once the element is stale.
+	"""
+
+	from selenium.webdriver.support import expected_conditions
+	return expected_conditions.staleness_of(element)
+
+
+def url_changes(url: str):
+	"""
+	Builds a wait condition satisfied when the current URL is different from the given one.
+
+	@param url The URL of the page before the navigation.
+	@return A condition which returns True once the URL has changed.
+	"""
+
+	from selenium.webdriver.support import expected_conditions
+	return expected_conditions.url_changes(url)
+
+
+def document_ready(states: tuple = ('complete',)):
+	"""
+	Builds a wait condition satisfied when the document reaches one of the given ready states.
+
+	@param states The accepted values of 'document.readyState', use ('interactive', 'complete') for eager loading.
+	@return A condition which returns True once the document is ready.
+	"""
+
+	return lambda driver: driver.execute_script("return document.readyState;") in states
+
+
+def js_predicate(script: str, *args):
+	"""
+	Builds a wait condition from a JavaScript snippet evaluated in the page.
+
+	@param script The JavaScript code, it must return a truthy value when the condition holds.
+	@param args The arguments passed to the script, available as 'arguments[i]'.
+	@return A condition which returns the value of the script once it is truthy.
+	"""
+
+	return lambda driver: driver.execute_script(script, *args)
+
+
+# Shortcuts of the conditions that only need the locator of the element
+locator_conditions = {
+	'present': element_present,
+	'visible': element_visible,
+	'clickable': element_clickable
+}
+
+
+@instrumented()
+def wait_for_condition(driver: webdriver.Chrome, condition, timeout: float = DEFAULT_WAIT_TIMEOUT,
+		poll_frequency: float = DEFAULT_POLL_FREQUENCY):
+	"""
+	Polls a condition until it returns a truthy value or the timeout expires.
+
+	@param driver A Selenium WebDriver instance, or a web element for conditions relative to it.
+	@param condition A callable which receives the driver, like the ones built in this module.
+	@param timeout The maximum time in seconds to wait.
+	@param poll_frequency The time in seconds between evaluations of the condition.
+	@return The value returned by the condition.
+	@throws TimeoutException If the condition does not hold before the timeout.
+	"""
+
+	from selenium.webdriver.support.wait import WebDriverWait
+	return WebDriverWait(driver, timeout, poll_frequency=poll_frequency).until(condition)
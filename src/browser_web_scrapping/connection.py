@@ -0,0 +1,293 @@
+"""
+@file src/browser_web_scrapping/connection.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Creation of the Selenium WebDriver of a browser with its download folder and performance profile
+
+The Selenium bindings of the browser are imported by 'create_browser_connection', so importing the package does not
+load any browser backend and a process which only uses Chrome never loads the Firefox bindings (and vice versa).
+"""
+
+
+from __future__ import annotations
+
+import os
+import json
+import weakref
+from typing import TYPE_CHECKING
+from urllib.parse import quote
+
+from src.browser_web_scrapping.element_cache import enable_element_cache
+from src.driver_resolution import resolve_driver_binary
+from src.instrumentation import instrumented
+
+if TYPE_CHECKING:
+	from selenium.webdriver import Chrome, Firefox
+
+
+# URL patterns of the resources which can be blocked by the performance profiles
+resource_url_patterns = {
+	'images': ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico'],
+	'media': ['*.mp4', '*.webm', '*.ogg', '*.mp3', '*.wav', '*.m4a', '*.m3u8'],
+	'fonts': ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot'],
+	'stylesheets': ['*.css']
+}
+
+# Firefox preferences which block each kind of resource regardless of its URL
+firefox_blocking_prefs = {
+	'images': {'permissions.default.image': 2},
+	'media': {'media.autoplay.default': 5, 'media.preload.default': 0, 'media.preload.auto': 0},
+	'fonts': {'gfx.downloadable_fonts.enabled': False},
+	'stylesheets': {'permissions.default.stylesheet': 2}
+}
+
+# Performance profiles, the 'default' one keeps the behaviour of a normal browser
+performance_profiles = {
+	'default': {
+		'headless': False,
+		'page_load_strategy': 'normal',
+		'block_resources': [],
+		'block_url_patterns': [],
+		'window_size': None
+	},
+	'fast': {
+		'headless': True,
+		'page_load_strategy': 'eager',
+		'block_resources': ['images', 'media', 'fonts'],
+		'block_url_patterns': [],
+		'window_size': (1920, 1080)
+	},
+	'multiplexed': {
+		'headless': True,
+		'page_load_strategy': 'none',
+		'block_resources': ['images', 'media', 'fonts'],
+		'block_url_patterns': [],
+		'window_size': (1920, 1080)
+	}
+}
+
+# URL patterns blocked with DevTools in each Chrome driver, each new tab must block them again
+_tab_blocked_patterns = weakref.WeakKeyDictionary()
+
+
+def get_performance_profile(performance_profile: str | dict = None) -> dict:
+	"""
+	Builds the complete settings of a performance profile.
+
+	@param performance_profile The name of a profile in 'performance_profiles', or a dictionary which overrides
+		some keys of the default profile (headless, page_load_strategy, block_resources, block_url_patterns, window_size).
+	@return The dictionary with all the settings of the profile.
+	"""
+
+	if performance_profile is None:
+		performance_profile = 'default'
+
+	if isinstance(performance_profile, str):
+		if performance_profile not in performance_profiles:
+			raise ValueError(f"Performance profile '{performance_profile}' not in available profiles {list(performance_profiles)}")
+		return dict(performance_profiles[performance_profile])
+
+	unknown_keys = set(performance_profile) - set(performance_profiles['default'])
+	if unknown_keys:
+		raise ValueError(f"Unknown keys {sorted(unknown_keys)} in the performance profile")
+
+	unknown_resources = set(performance_profile.get('block_resources', [])) - set(resource_url_patterns)
+	if unknown_resources:
+		raise ValueError(f"Unknown resources {sorted(unknown_resources)}, available are {list(resource_url_patterns)}")
+
+	return {**performance_profiles['default'], **performance_profile}
+
+
+def _blocked_url_patterns(profile: dict) -> list:
+	"""
+	Joins the URL patterns of the blocked resources with the patterns given by the user.
+
+	@param profile The settings of the performance profile.
+	@return The list of URL patterns (with '*' wildcards) to block.
+	"""
+
+	patterns = []
+	for resource in profile['block_resources']:
+		for pattern in resource_url_patterns[resource]:
+			patterns.extend([pattern, f"{pattern}?*"])
+	patterns.extend(profile['block_url_patterns'])
+
+	return patterns
+
+
+def _firefox_blocking_pac(patterns: list) -> str:
+	"""
+	Builds a proxy auto-config (PAC) data URL which sends the matching requests to a closed port, which is the way
+	to block URL patterns in Firefox without DevTools.
+
+	@param patterns The list of URL patterns (with '*' wildcards) to block.
+	@return The data URL of the PAC script.
+	"""
+
+	script = (
+		"function FindProxyForURL(url, host) {"
+		f"var patterns = {json.dumps(patterns)};"
+		"for (var i = 0; i < patterns.length; i++) {"
+		"if (shExpMatch(url, patterns[i])) { return 'PROXY 127.0.0.1:9'; }"
+		"}"
+		"return 'DIRECT';"
+		"}"
+	)
+	return "data:application/x-ns-proxy-autoconfig," + quote(script)
+
+
+def block_urls_in_current_tab(driver) -> bool:
+	"""
+	Blocks the URL patterns of the performance profile of a Chrome driver in its current tab. DevTools applies
+	'Network.setBlockedURLs' to a single tab, so the tabs opened after the first one must call it, TabMultiplexer
+	does it for its tabs. Firefox blocks the patterns in the whole browser, nothing is done.
+
+	@param driver A Selenium WebDriver instance from 'create_browser_connection'.
+	@return True if the tab blocks the patterns now, False if the driver has none to block.
+	"""
+
+	patterns = _tab_blocked_patterns.get(driver)
+	if not patterns:
+		return False
+
+	driver.execute_cdp_cmd('Network.enable', {})
+	driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+	return True
+
+
+@instrumented()
+def create_browser_connection(download_folder: str, browser: str = 'Firefox', pref_dict: dict = None,
+		driver_path: str = None, driver_cache_folder: str = None, allow_network_resolution: bool = False,
+		performance_profile: str | dict = None, profile_directory: str = None, session_store = None,
+		session_urls: list = None, capture_network: bool = False, element_cache_size: int = None) -> Chrome | Firefox:
+	"""
+	Creates a Selenium WebDriver instance for Chrome with custom download settings.
+
+	@param download_folder The path to the folder where downloads should be saved.
+	@param browser The name of the browser will be used.
+	@param pref_dict The dictionary of preferences needed to setup the browser.
+	@param driver_path Explicit path to the driver binary (chromedriver or geckodriver).
+	@param driver_cache_folder The folder of the local driver cache, see 'src/driver_resolution.py'.
+	@param allow_network_resolution Whether to download the driver with webdriver_manager if it is not found locally.
+	@param performance_profile Name or dictionary of the performance profile, e.g. 'fast' for metadata-only crawls
+		(headless, eager page load, no images/media/fonts) or 'multiplexed' for 'src/tab_multiplexer.py' (the same
+		but without waiting the page loads), see 'get_performance_profile'. In Chrome the blocked URL patterns only
+		apply to the first tab, call 'block_urls_in_current_tab' after opening another one.
+	@param profile_directory Optional folder of a browser profile which keeps the cookies and storage between runs,
+		a profile can only be used by one browser at a time.
+	@param session_store Optional SessionStore (see 'src/session_store.py') with the sessions to restore.
+	@param session_urls The URLs whose saved sessions are restored in the new driver, before its first navigation.
+	@param capture_network Whether to enable the network performance log (Chrome) or WebDriver BiDi (Firefox), used
+		by 'src/network_capture.py' to read the JSON responses of the pages.
+	@param element_cache_size Optional size of the element cache of the driver, see 'element_cache.py'.
+	@return A Selenium WebDriver instance.
+	"""
+
+	# Check the browser is one of the options supported
+	avaliable_browsers = ['Chrome', 'Firefox']
+	if browser not in avaliable_browsers:
+		raise ValueError(f"Browser '{browser}' not in available browsers {avaliable_browsers}")
+
+	# Default dictionary of preferences
+	default_pref_dict = {
+		'Chrome': {
+			'download.default_directory': download_folder,
+			'download.prompt_for_download': False,
+			'safebrowsing.enabled': True
+		},
+		'Firefox': {
+			'browser.download.folderList': 2,
+			'browser.download.manager.showWhenStarting': False,
+			'browser.download.dir': download_folder,
+			'browser.helperApps.neverAsk.saveToDisk': 'application/octet-stream'
+		}
+	}
+
+	# If the preferences dictionary from the arguments is None, use the default
+	pref_dict = default_pref_dict[browser] if pref_dict is None else dict(pref_dict)
+
+	profile = get_performance_profile(performance_profile)
+	blocked_patterns = _blocked_url_patterns(profile)
+
+	driver = None
+	try:
+		driver_binary = resolve_driver_binary(browser, driver_path, driver_cache_folder, allow_network_resolution)
+
+		# The bindings are imported only for the browser which is created
+		if browser == 'Chrome':
+			from selenium.webdriver import Chrome, ChromeOptions, ChromeService
+
+			if 'images' in profile['block_resources']:
+				pref_dict['profile.managed_default_content_settings.images'] = 2
+
+			options = ChromeOptions()
+			options.add_experimental_option("prefs", pref_dict)
+			options.page_load_strategy = profile['page_load_strategy']
+			if profile['headless']:
+				options.add_argument("--headless=new")
+			if profile['window_size'] is None:
+				options.add_argument("--start-maximized")
+			else:
+				options.add_argument(f"--window-size={profile['window_size'][0]},{profile['window_size'][1]}")
+			if profile_directory is not None:
+				options.add_argument(f"--user-data-dir={os.path.abspath(profile_directory)}")
+			if capture_network:
+				options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+				options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+
+			service = ChromeService(driver_binary)
+			driver = Chrome(service=service, options=options)
+
+			# Block the URL patterns with DevTools, it applies to the requests of the first tab and the new tabs
+			# must call 'block_urls_in_current_tab'
+			if blocked_patterns:
+				_tab_blocked_patterns[driver] = blocked_patterns
+				block_urls_in_current_tab(driver)
+
+		else:
+			from selenium.webdriver import Firefox, FirefoxOptions, FirefoxService
+
+			for resource in profile['block_resources']:
+				pref_dict.update(firefox_blocking_prefs[resource])
+			if blocked_patterns:
+				pref_dict['network.proxy.type'] = 2
+				pref_dict['network.proxy.autoconfig_url'] = _firefox_blocking_pac(blocked_patterns)
+				pref_dict['network.proxy.autoconfig_url.include_path'] = True
+
+			options = FirefoxOptions()
+			for preference, value in pref_dict.items():
+				options.set_preference(preference, value)
+			options.page_load_strategy = profile['page_load_strategy']
+			if profile['headless']:
+				options.add_argument("-headless")
+			if profile['window_size'] is None:
+				options.add_argument("--start-maximized")
+			else:
+				options.add_argument(f"--width={profile['window_size'][0]}")
+				options.add_argument(f"--height={profile['window_size'][1]}")
+			if profile_directory is not None:
+				options.add_argument("-profile")
+				options.add_argument(os.path.abspath(profile_directory))
+			if capture_network:
+				options.enable_bidi = True
+
+			service = FirefoxService(driver_binary)
+			driver = Firefox(service=service, options=options)
+
+		if session_store is not None:
+			for url in session_urls or []:
+				session_store.restore(driver, url)
+
+		if element_cache_size is not None:
+			enable_element_cache(driver, element_cache_size)
+
+		return driver
+	except Exception as e:
+		# The browser is closed if its setup fails after it was launched
+		if driver is not None:
+			try:
+				driver.quit()
+			except Exception:
+				pass
+		raise Exception(f"An error occurred creating the browser connection: {e}")
@@ -0,0 +1,277 @@
+"""
+@file src/browser_web_scrapping/element_cache.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Per-driver cache of the elements found by 'find_element_in_driver'
+
+The scripts look for the same elements several times (the download command, the iframe of a document, the drawer
+buttons) and each search is a round trip which scans the DOM. The cache keeps the elements found in the current page
+by (window, frame path, locator type, selector), so a repeated search returns the element without any command.
+
+The cached elements belong to the page where they were found:
+	- The navigations of the library ('login_to_url', the 'navigate' steps of StepFlow, the session restore) clear
+	  the cache of the driver before loading the page.
+	- 'switch_to_frame_in_browser' and 'return_from_frame_in_browser' keep the frame path of the driver, so the
+	  elements of a frame are only returned inside it and the ones of the main document are valid after returning.
+	- TabMultiplexer and DriverPool tell the cache which window they switch to.
+	- A navigation the helpers do not see (a clicked link, a script) leaves stale elements in the cache. Each search
+	  checks its cached element (with the wait of 'visible' and 'clickable', with 'is_enabled' otherwise) and searches
+	  it again if it is stale, and a stale cached element given to 'click_element_in_driver' or
+	  'switch_to_frame_in_browser' is discarded, searched again and used once more.
+
+The cache is disabled by default, enable it with 'enable_element_cache' or 'create_browser_connection(...,
+element_cache_size=256)'. The windows switched without the helpers must be told with 'note_window_switch'.
+"""
+
+
+from __future__ import annotations
+
+import weakref
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from src.browser_web_scrapping.locators import By
+
+if TYPE_CHECKING:
+	from selenium import webdriver
+	from selenium.webdriver.remote.webelement import WebElement
+
+
+# Maximum number of elements kept per driver
+DEFAULT_ELEMENT_CACHE_SIZE = 256
+
+# Caches of the drivers, they are removed with the driver
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+
+def _element_id(element) -> str | int:
+	return getattr(element, 'id', None) or id(element)
+
+
+
+class ElementCache:
+	"""
+	LRU cache of the elements of the current page of a driver, see the brief of the file.
+	"""
+
+	def __init__(self, max_size: int = DEFAULT_ELEMENT_CACHE_SIZE):
+		"""
+		@param max_size The maximum number of elements, the least recently used are evicted.
+		"""
+
+		if max_size < 1:
+			raise ValueError(f"The size of the element cache must be at least 1, got {max_size}")
+
+		self.max_size = max_size
+		self.window = None
+		self.frame_path = ()
+		self.hits = 0
+		self.misses = 0
+		self.evictions = 0
+		self.invalidations = 0
+
+		self._elements = OrderedDict()
+		self._keys = {}
+		self._lock = threading.Lock()
+
+
+	def _key(self, type_element: By, element: str) -> tuple:
+		return (self.window, self.frame_path, type_element, element)
+
+
+	def get(self, type_element: By, element: str) -> WebElement | None:
+		"""
+		Gets the cached element of a locator in the current window and frame.
+
+		@return The web element, None if it is not cached.
+		"""
+
+		with self._lock:
+			key = self._key(type_element, element)
+			found = self._elements.get(key)
+			if found is None:
+				self.misses += 1
+				return None
+			self._elements.move_to_end(key)
+			self.hits += 1
+			return found
+
+
+	def put(self, type_element: By, element: str, found: WebElement):
+		"""
+		Caches the element found for a locator in the current window and frame.
+		"""
+
+		with self._lock:
+			key = self._key(type_element, element)
+			previous = self._elements.pop(key, None)
+			if previous is not None:
+				self._keys.pop(_element_id(previous), None)
+
+			self._elements[key] = found
+			self._keys[_element_id(found)] = key
+
+			while len(self._elements) > self.max_size:
+				_, evicted = self._elements.popitem(last=False)
+				self._keys.pop(_element_id(evicted), None)
+				self.evictions += 1
+
+
+	def locator_of(self, found: WebElement) -> tuple | None:
+		"""
+		Gets the locator of a cached element, if it was found in the current window and frame.
+
+		@return The tuple (type of locator, selector), None if the element is not cached here.
+		"""
+
+		with self._lock:
+			key = self._keys.get(_element_id(found))
+			if key is None or key[:2] != (self.window, self.frame_path):
+				return None
+			return key[2:]
+
+
+	def discard(self, found: WebElement):
+		"""
+		Removes a cached element, e.g. when it is stale.
+		"""
+
+		with self._lock:
+			key = self._keys.pop(_element_id(found), None)
+			if key is not None:
+				self._elements.pop(key, None)
+				self.invalidations += 1
+
+
+	def enter_frame(self, frame):
+		"""
+		Notes the driver switched to a frame of the current document.
+
+		@param frame The frame element or frame name/index given to 'switch_to.frame'.
+		"""
+
+		with self._lock:
+			self.frame_path = self.frame_path + (_element_id(frame) if not isinstance(frame, (str, int)) else frame,)
+
+
+	def leave_frames(self):
+		"""
+		Notes the driver returned to the main document.
+		"""
+
+		with self._lock:
+			self.frame_path = ()
+
+
+	def switch_window(self, handle: str):
+		"""
+		Notes the driver switched to a window, which starts in its main document.
+		"""
+
+		with self._lock:
+			self.window = handle
+			self.frame_path = ()
+
+
+	def clear(self, window: str = None):
+		"""
+		Removes the cached elements, e.g. when the page changes.
+
+		@param window Optional handle of the window whose elements are removed, by default all of them.
+		"""
+
+		with self._lock:
+			keys = [key for key in self._elements if window is None or key[0] == window]
+			for key in keys:
+				self._keys.pop(_element_id(self._elements.pop(key)), None)
+			self.invalidations += len(keys)
+			if window is None or window == self.window:
+				self.frame_path = ()
+
+
+	def stats(self) -> dict:
+		"""
+		Gets the counters of the cache.
+
+		@return The dictionary with the size, hits, misses, evictions and invalidations.
+		"""
+
+		with self._lock:
+			return {
+				'size': len(self._elements),
+				'hits': self.hits,
+				'misses': self.misses,
+				'evictions': self.evictions,
+				'invalidations': self.invalidations
+			}
+
+
+
+def enable_element_cache(driver: webdriver.Chrome, max_size: int = DEFAULT_ELEMENT_CACHE_SIZE) -> ElementCache:
+	"""
+	Enables the element cache of a driver, see the brief of the file.
+
+	@param driver A Selenium WebDriver instance.
+	@param max_size The maximum number of cached elements.
+	@return The ElementCache of the driver.
+	"""
+
+	with _caches_lock:
+		cache = _caches.get(driver)
+		if cache is None or cache.max_size != max_size:
+			cache = _caches[driver] = ElementCache(max_size)
+		return cache
+
+
+def disable_element_cache(driver: webdriver.Chrome):
+	"""
+	Disables the element cache of a driver and discards its elements.
+	"""
+
+	with _caches_lock:
+		_caches.pop(driver, None)
+
+
+def element_cache_of(driver) -> ElementCache | None:
+	"""
+	Gets the element cache of a driver.
+
+	@param driver A Selenium WebDriver instance, or a web element for the searches relative to it.
+	@return The ElementCache, None if it is not enabled (always for web elements).
+	"""
+
+	try:
+		with _caches_lock:
+			return _caches.get(driver)
+	except TypeError:
+		return None
+
+
+def invalidate_element_cache(driver: webdriver.Chrome):
+	"""
+	Removes the cached elements of a driver, e.g. after a navigation made without 'login_to_url'.
+	"""
+
+	cache = element_cache_of(driver)
+	if cache is not None:
+		cache.clear()
+
+
+def note_window_switch(driver: webdriver.Chrome, handle: str, navigated: bool = False):
+	"""
+	Tells the element cache of a driver it switched to a window.
+
+	@param driver A Selenium WebDriver instance.
+	@param handle The handle of the window.
+	@param navigated Whether the page of the window is changing, which removes its cached elements.
+	"""
+
+	cache = element_cache_of(driver)
+	if cache is not None:
+		cache.switch_window(handle)
+		if navigated:
+			cache.clear(window=handle)
@@ -0,0 +1,167 @@
+"""
+@file src/browser_web_scrapping/locators.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Locator types and the extraction schemas evaluated in a single call to the browser
+"""
+
+
+class By:
+	"""
+	Types of locator, with the same values of 'selenium.webdriver.common.by.By' without importing the WebDriver.
+	"""
+
+	ID = 'id'
+	XPATH = 'xpath'
+	LINK_TEXT = 'link text'
+	PARTIAL_LINK_TEXT = 'partial link text'
+	NAME = 'name'
+	TAG_NAME = 'tag name'
+	CLASS_NAME = 'class name'
+	CSS_SELECTOR = 'css selector'
+
+
+
+# Fields which can be read from the elements by 'extract_elements_in_driver'
+extraction_fields = ['text', 'attribute', 'outerHTML', 'innerHTML']
+
+# Script which resolves all the locators of a schema in one call, the specs are given in arguments[0]
+extraction_script = """
+var specs = arguments[0], root = arguments[1] || document, result = {};
+function findAll(spec) {
+	if (spec.kind === 'xpath') {
+		var snapshot = document.evaluate(spec.locator, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+		var nodes = [];
+		for (var i = 0; i < snapshot.snapshotLength; i++) { nodes.push(snapshot.snapshotItem(i)); }
+		return nodes;
+	}
+	return Array.prototype.slice.call(root.querySelectorAll(spec.locator));
+}
+function read(node, spec) {
+	if (spec.field === 'text') {
+		var text = node.innerText !== undefined ? node.innerText : node.textContent;
+		return text === null ? null : text.trim();
+	}
+	if (spec.field === 'outerHTML') { return node.outerHTML; }
+	if (spec.field === 'innerHTML') { return node.innerHTML; }
+	var property = node[spec.attribute];
+	if (property !== undefined && property !== null && typeof property !== 'object' && typeof property !== 'function') {
+		return property;
+	}
+	return node.getAttribute(spec.attribute);
+}
+for (var name in specs) {
+	var spec = specs[name];
+	try {
+		var nodes = findAll(spec);
+		if (spec.many) {
+			result[name] = nodes.map(function (node) { return read(node, spec); });
+		} else {
+			result[name] = nodes.length > 0 ? read(nodes[0], spec) : null;
+		}
+	} catch (error) {
+		result[name] = spec.many ? [] : null;
+	}
+}
+return result;
+"""
+
+
+def xpath_literal(value: str) -> str:
+	"""
+	Quotes a string as an XPath 1.0 literal, which has no escapes: with concat() when it has both kinds of quotes.
+
+	@param value The string, e.g. the text of a link.
+	@return The XPath expression of the string.
+	"""
+
+	if "'" not in value:
+		return f"'{value}'"
+	if '"' not in value:
+		return f'"{value}"'
+	return "concat(" + ", \"'\", ".join(f"'{part}'" for part in value.split("'")) + ")"
+
+
+def css_string(value: str) -> str:
+	"""
+	Quotes a string as a CSS string, escaping the quotes, the backslashes and the control characters.
+
+	@param value The string, e.g. the value of an attribute.
+	@return The double quoted CSS string.
+	"""
+
+	escaped = []
+	for character in value:
+		if character in '"\\':
+			escaped.append(f"\\{character}")
+		elif ord(character) < 0x20 or ord(character) == 0x7f:
+			escaped.append(f"\\{ord(character):x} ")
+		else:
+			escaped.append(character)
+
+	return '"' + ''.join(escaped) + '"'
+
+
+def locator_to_xpath_or_css(type_element: By, element: str) -> tuple:
+	"""
+	Translates a Selenium locator to an XPath or a CSS selector, the two kinds of locators a document can evaluate.
+
+	@param type_element The type of locator (e.g., By.ID, By.CLASS_NAME, By.XPATH).
+	@param element The element selector string.
+	@return A tuple ('xpath' or 'css', selector).
+	"""
+
+	if type_element == By.XPATH:
+		return ('xpath', element)
+	if type_element == By.CSS_SELECTOR:
+		return ('css', element)
+	if type_element == By.ID:
+		return ('css', f"[id={css_string(element)}]")
+	if type_element == By.NAME:
+		return ('css', f"[name={css_string(element)}]")
+	if type_element == By.CLASS_NAME:
+		return ('css', f'.{element}')
+	if type_element == By.TAG_NAME:
+		return ('css', element)
+	if type_element == By.LINK_TEXT:
+		return ('xpath', f"//a[normalize-space(.)={xpath_literal(element)}]")
+	if type_element == By.PARTIAL_LINK_TEXT:
+		return ('xpath', f"//a[contains(., {xpath_literal(element)})]")
+
+	raise ValueError(f"Locator type '{type_element}' can not be used in an extraction schema")
+
+
+def normalize_extraction_schema(schema: dict) -> dict:
+	"""
+	Completes the specs of an extraction schema.
+
+	Each value of the schema is a tuple (type_element, element), which reads the text of the first match, or a
+	dictionary with the keys 'type', 'locator', 'field' ('text', 'attribute', 'outerHTML' or 'innerHTML'),
+	'attribute' (when the field is 'attribute') and 'many' (to read all the matches as a list).
+
+	@param schema The dictionary of named locators.
+	@return The dictionary of complete specs, with the locator translated to XPath or CSS.
+	"""
+
+	specs = {}
+	for name, spec in schema.items():
+		if isinstance(spec, (tuple, list)):
+			spec = {'type': spec[0], 'locator': spec[1]}
+
+		field = spec.get('field', 'text')
+		if field not in extraction_fields:
+			raise ValueError(f"Field '{field}' of '{name}' not in available fields {extraction_fields}")
+		if field == 'attribute' and not spec.get('attribute'):
+			raise ValueError(f"The spec '{name}' reads an attribute but does not give its name")
+
+		kind, locator = locator_to_xpath_or_css(spec.get('type', By.XPATH), spec['locator'])
+		specs[name] = {
+			'kind': kind,
+			'locator': locator,
+			'field': field,
+			'attribute': spec.get('attribute'),
+			'many': bool(spec.get('many', False))
+		}
+
+	return specs
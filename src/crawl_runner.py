@@ -0,0 +1,357 @@
+"""
+@file src/crawl_runner.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Command line runner which splits a CSV of URLs between several worker processes, each one with its own browser
+
+	python -m src.crawl_runner dat/data_pages.csv --handler examples.NGA.crawl_image_pages:read_image_page \
+		--url-column ImageLink --id-column ImageID --delimiter '|' --workers 4 --output dat/data.csv
+
+The handler is a function handler(driver, url, download_folder) which returns the record of the page as a dictionary.
+The items are shared through a JobStateStore in the work folder: a worker which ends early takes the items left by the
+others, and the items of a crashed worker are given back to pending and the worker is restarted. Each worker has its
+own download subfolder and writes its records in a JSONL shard, the shards are merged in the output at the end.
+"""
+
+
+import os
+import csv
+import sys
+import json
+import time
+import argparse
+import importlib
+import multiprocessing
+
+import src.browser_web_scrapping as browser_ws
+from src.job_state import JobStateStore, DONE
+from src.record_sink import RecordSink
+from src.session_store import SessionStore
+from src.snapshot_archive import SnapshotArchive, SnapshotRecorder
+
+
+
+def load_handler(spec: str):
+	"""
+	Imports the handler of the pages.
+
+	@param spec The handler as 'module:function', e.g. 'examples.NGA.crawl_image_pages:read_image_page'.
+	@return The function.
+	"""
+
+	module_name, _, function_name = spec.partition(':')
+	if not module_name or not function_name:
+		raise ValueError(f"The handler '{spec}' must be given as 'module:function'")
+
+	return getattr(importlib.import_module(module_name), function_name)
+
+
+def read_input_items(csv_path: str, url_column: str, id_column: str = None, delimiter: str = ','):
+	"""
+	Reads the work items from a CSV.
+
+	@param csv_path The path of the CSV.
+	@param url_column The column with the URLs.
+	@param id_column Optional column with the IDs of the items, the URL is the ID if it is not given.
+	@param delimiter The delimiter of the CSV.
+	@return A generator of tuples (ID, URL).
+	"""
+
+	with open(csv_path, encoding='utf-8', newline='') as file:
+		reader = csv.DictReader(file, delimiter=delimiter)
+		for column in [url_column, id_column]:
+			if column is not None and column not in (reader.fieldnames or []):
+				raise ValueError(f"Column '{column}' not in the columns {reader.fieldnames} of '{csv_path}'")
+
+		for row in reader:
+			if row[url_column]:
+				yield (row[id_column] if id_column is not None else row[url_column], row[url_column])
+
+
+def _driver_is_alive(driver) -> bool:
+	try:
+		driver.current_url
+		return True
+	except Exception:
+		return False
+
+
+def run_worker(worker: str, settings: dict):
+	"""
+	Claims and processes items until none is pending, it runs in the process of the worker.
+
+	The items are marked as done after each checkpoint of the shard, so the records of the done items are on disk.
+	If the browser stops the process exits with an error and its items in progress are left to the supervisor.
+
+	@param worker The name of this run of the worker, '<slot>.<run>'.
+	@param settings The settings built by 'main'.
+	"""
+
+	handler = load_handler(settings['handler'])
+	download_folder = os.path.join(settings['work_folder'], 'downloads', worker.split('.')[0])
+	os.makedirs(download_folder, exist_ok=True)
+
+	job_state = JobStateStore(settings['job_state_path'])
+	sink = RecordSink(os.path.join(settings['shard_folder'], f"{worker}.jsonl"), batch_size=settings['checkpoint_every'])
+	driver = None
+	archive = None
+	finished = []
+
+	def confirm():
+		sink.checkpoint()
+		for item_id in finished:
+			job_state.mark_done(item_id)
+		finished.clear()
+
+	try:
+		driver = browser_ws.create_browser_connection(download_folder, **settings['connection_kwargs'])
+		if settings.get('snapshot_folder') is not None:
+			archive = SnapshotArchive(os.path.join(settings['snapshot_folder'], f"{worker}.wsa"))
+			SnapshotRecorder(archive).attach(driver)
+		while True:
+			claimed = job_state.claim(worker, limit=settings['claim_size'])
+			if len(claimed) == 0:
+				break
+
+			for item_id, url in claimed:
+				try:
+					record = handler(driver, url, download_folder)
+				except Exception as e:
+					if not _driver_is_alive(driver):
+						raise RuntimeError(f"The browser of {worker} stopped in '{url}': {e}")
+					print(f"An error occurred in {worker} processing '{url}': {e}")
+					job_state.mark_failed(item_id, str(e))
+					continue
+
+				sink.push({settings['id_field']: item_id, **(record or {})})
+				finished.append(item_id)
+				if len(finished) >= settings['checkpoint_every']:
+					confirm()
+	finally:
+		confirm()
+		sink.close()
+		job_state.close()
+		if archive is not None:
+			archive.close()
+		if driver is not None:
+			try:
+				driver.quit()
+			except Exception:
+				pass
+
+
+def next_runs(shard_folder: str, slots: list) -> dict:
+	"""
+	Numbers the next run of each worker slot after the shards of the previous runs of the job.
+
+	A run never writes in the shard of a previous run, so the records of an item processed again are not mixed with
+	the ones of the run which marked it as done.
+
+	@param shard_folder The folder of the shards, named '<slot>.<run>.jsonl'.
+	@param slots The names of the worker slots.
+	@return A dictionary from worker slot to the number of its next run.
+	"""
+
+	runs = dict.fromkeys(slots, 0)
+	for name in os.listdir(shard_folder):
+		slot, _, run = name[:-len('.jsonl')].rpartition('.')
+		if name.endswith('.jsonl') and slot in runs and run.isdigit():
+			runs[slot] = max(runs[slot], int(run) + 1)
+
+	return runs
+
+
+def supervise(settings: dict, workers: int, max_restarts: int, poll_interval: float = 1.0) -> dict:
+	"""
+	Runs the worker processes until there are no pending items.
+
+	A worker which exits with an error gives its items in progress back to pending and it is started again, up to
+	'max_restarts' times. The slots of the workers which ended are started again if there are pending items, which
+	happens when the items of a crashed worker are given back after the others ended.
+
+	@param settings The settings built by 'main'.
+	@param workers The number of worker processes.
+	@param max_restarts The number of times a worker is started again after an error.
+	@param poll_interval The time in seconds between two checks of the processes.
+	@return A dictionary from worker slot to the number of errors.
+	"""
+
+	context = multiprocessing.get_context('spawn')
+	job_state = JobStateStore(settings['job_state_path'])
+
+	slots = [f"worker-{index}" for index in range(workers)]
+	runs = next_runs(settings['shard_folder'], slots)
+	crashes = dict.fromkeys(slots, 0)
+	processes = {}
+
+	def start(slot):
+		name = f"{slot}.{runs[slot]}"
+		runs[slot] += 1
+		process = context.Process(target=run_worker, args=(name, settings), name=name)
+		process.start()
+		processes[slot] = (name, process)
+
+	try:
+		for slot in slots:
+			start(slot)
+
+		while processes:
+			time.sleep(poll_interval)
+
+			for slot, (name, process) in list(processes.items()):
+				if process.is_alive():
+					continue
+
+				del processes[slot]
+				reset = job_state.reset_in_progress(name)
+				if process.exitcode != 0:
+					crashes[slot] += 1
+					print(f"The worker {name} stopped with exit code {process.exitcode}, {reset} items are pending again")
+
+			# Start the free slots while there is pending work, a slot which crashed too many times is not used again
+			if job_state.counts()['pending'] > 0:
+				for slot in slots:
+					if slot not in processes and crashes[slot] <= max_restarts:
+						start(slot)
+	finally:
+		for name, process in processes.values():
+			process.terminate()
+			process.join()
+			job_state.reset_in_progress(name)
+		job_state.close()
+
+	return crashes
+
+
+def merge_shards(settings: dict, output: str, layout: str = 'wide', id_fields: list = None, delimiter: str = ',',
+		compression: str = None) -> int:
+	"""
+	Merges the records of the shards in the output file, it is written again with all the runs of the job.
+
+	Only the records written by the worker which marked the item as done are kept, so the records of a crashed worker
+	which were processed again by other worker are not repeated. An item is merged once even if its worker wrote it
+	several times.
+
+	@param settings The settings built by 'main'.
+	@param output The path of the output, its format is taken from the extension (CSV, JSONL or Parquet).
+	@param layout The layout of the output, see 'RecordSink'.
+	@param id_fields The ID fields of the long layout.
+	@param delimiter The delimiter of a CSV output.
+	@param compression The compression of the output, see 'RecordSink'.
+	@return The number of merged records.
+	"""
+
+	with JobStateStore(settings['job_state_path']) as job_state:
+		workers = job_state.item_workers(DONE)
+
+	shards = sorted(name for name in os.listdir(settings['shard_folder']) if name.endswith('.jsonl'))
+
+	def valid_records():
+		merged_ids = set()
+		for shard in shards:
+			worker = shard[:-len('.jsonl')]
+			with open(os.path.join(settings['shard_folder'], shard), encoding='utf-8') as file:
+				for line in file:
+					try:
+						record = json.loads(line)
+					except json.JSONDecodeError:
+						continue
+					item_id = str(record.get(settings['id_field']))
+					if workers.get(item_id) == worker and item_id not in merged_ids:
+						merged_ids.add(item_id)
+						yield record
+
+	# The columns of the wide layout are all the fields of the records
+	fieldnames = None
+	if layout == 'wide':
+		fieldnames = list(dict.fromkeys(field for record in valid_records() for field in record))
+
+	# The output replaces the previous one at the end
+	merged = 0
+	with RecordSink(output, layout=layout, id_fields=id_fields, fieldnames=fieldnames, delimiter=delimiter,
+			compression=compression, atomic=True) as sink:
+		for record in valid_records():
+			sink.push(record)
+			merged += 1
+
+	return merged
+
+
+def main(argv: list = None) -> dict:
+	"""
+	Entry point of the command line, run it with 'python -m src.crawl_runner --help'.
+
+	@param argv The arguments, defaults to the ones of the command line.
+	@return The number of items in each status at the end.
+	"""
+
+	parser = argparse.ArgumentParser(description="Crawls the URLs of a CSV with several browsers in parallel processes")
+	parser.add_argument('input_csv', help="CSV with the URLs to crawl")
+	parser.add_argument('--handler', required=True, help="Function which reads a page, as 'module:function'")
+	parser.add_argument('--output', required=True, help="Output file with the merged records (.csv, .jsonl or .parquet)")
+	parser.add_argument('--url-column', default='URL', help="Column of the URLs in the input CSV")
+	parser.add_argument('--id-column', help="Column of the IDs in the input CSV, the URL is the ID by default")
+	parser.add_argument('--delimiter', default=',', help="Delimiter of the input CSV, and of the output if it is a CSV")
+	parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Number of worker processes")
+	parser.add_argument('--work-folder', default=os.path.join('dat', 'crawl'), help="Folder of the job state, shards and downloads")
+	parser.add_argument('--browser', default='Firefox', help="Browser of the workers")
+	parser.add_argument('--performance-profile', help="Performance profile of the browsers, e.g. 'fast'")
+	parser.add_argument('--session-store', help="Folder of the saved sessions (see src/session_store.py) restored in the browsers")
+	parser.add_argument('--session-url', nargs='*', default=[], help="URLs whose saved sessions are restored in each browser")
+	parser.add_argument('--snapshot-folder', help="Folder of the archives of the pages loaded by the workers, see src/snapshot_archive.py")
+	parser.add_argument('--claim-size', type=int, default=5, help="Number of items a worker takes at once")
+	parser.add_argument('--checkpoint-every', type=int, default=20, help="Number of records between checkpoints of a shard")
+	parser.add_argument('--max-restarts', type=int, default=3, help="Number of restarts of a worker after an error")
+	parser.add_argument('--retry-failed', action='store_true', help="Give the failed items of previous runs back to pending")
+	parser.add_argument('--layout', default='wide', choices=['wide', 'long'], help="Layout of the output, see RecordSink")
+	parser.add_argument('--id-fields', nargs='*', help="ID fields of the long layout, by default only the ID")
+	parser.add_argument('--id-field', default='ID', help="Name of the field with the ID of the item in the records")
+	parser.add_argument('--compression', help="Compression of the output, see RecordSink")
+	args = parser.parse_args(argv)
+
+	if args.workers < 1:
+		parser.error(f"The number of workers must be at least 1, got {args.workers}")
+
+	# Check the handler can be imported before starting the workers
+	load_handler(args.handler)
+
+	settings = {
+		'handler': args.handler,
+		'work_folder': args.work_folder,
+		'job_state_path': os.path.join(args.work_folder, 'jobs.sqlite'),
+		'shard_folder': os.path.join(args.work_folder, 'shards'),
+		'claim_size': args.claim_size,
+		'checkpoint_every': args.checkpoint_every,
+		'id_field': args.id_field,
+		'connection_kwargs': {'browser': args.browser, 'performance_profile': args.performance_profile}
+	}
+	if args.snapshot_folder is not None:
+		settings['snapshot_folder'] = args.snapshot_folder
+	if args.session_store is not None:
+		settings['connection_kwargs'].update({'session_store': SessionStore(args.session_store), 'session_urls': args.session_url})
+	os.makedirs(settings['shard_folder'], exist_ok=True)
+
+	with JobStateStore(settings['job_state_path']) as job_state:
+		added = job_state.add_items(read_input_items(args.input_csv, args.url_column, args.id_column, args.delimiter))
+		job_state.reset_in_progress()
+		if args.retry_failed:
+			job_state.retry_failed()
+		print(f"{added} new items, state of the job: {job_state.counts()}")
+
+	crashes = supervise(settings, args.workers, args.max_restarts)
+	if any(crashes.values()):
+		print(f"Errors of the workers: {crashes}")
+
+	merged = merge_shards(settings, args.output, args.layout, args.id_fields or [args.id_field], args.delimiter,
+		args.compression)
+
+	with JobStateStore(settings['job_state_path']) as job_state:
+		counts = job_state.counts()
+	print(f"{merged} records merged in '{args.output}', state of the job: {counts}")
+
+	return counts
+
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
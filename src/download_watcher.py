@@ -0,0 +1,268 @@
+"""
+@file src/download_watcher.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Watcher of the browser download folder which detects when the downloads are finished
+
+A download is finished when the temporary file of the browser (Chrome '.crdownload', Firefox '.part') was renamed
+and the size of the final file is stable. The folder changes are received with inotify on Linux, with a polling
+fallback in other systems.
+"""
+
+
+import os
+import time
+import select
+import asyncio
+import ctypes
+import ctypes.util
+
+from src.instrumentation import record_bytes
+
+
+# Suffixes of the files the browsers write while the download is in progress
+temporary_suffixes = ('.crdownload', '.part', '.partial', '.download', '.tmp')
+
+# Events of inotify which mean a file of the folder changed
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_INOTIFY_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+
+
+class DownloadTimeout(TimeoutError):
+	"""
+	Raised when fewer downloads than expected are finished before the timeout.
+
+	The files finished before the timeout are not reported again by the watcher, they are kept in 'finished'.
+	"""
+
+	def __init__(self, message: str, finished: list):
+		"""
+		@param message The description of the error.
+		@param finished The list of paths of the files finished before the timeout.
+		"""
+
+		super().__init__(message)
+		self.finished = finished
+
+
+
+class _Inotify:
+	"""
+	Minimal inotify watch of one folder through libc, used to wake up as soon as a file changes.
+	"""
+
+	def __init__(self, folder: str):
+		libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+		self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+		if self.fd < 0:
+			raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+		if libc.inotify_add_watch(self.fd, os.fsencode(folder), _INOTIFY_MASK) < 0:
+			error = ctypes.get_errno()
+			os.close(self.fd)
+			raise OSError(error, f"inotify_add_watch failed for '{folder}'")
+
+
+	def drain(self):
+		"""
+		Discards the pending events, only the fact that something changed is used.
+		"""
+
+		try:
+			while os.read(self.fd, 65536):
+				pass
+		except BlockingIOError:
+			pass
+
+
+	def wait(self, timeout: float):
+		"""
+		Blocks until an event is received or the timeout expires.
+
+		@param timeout The maximum time in seconds to wait.
+		"""
+
+		readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+		if readable:
+			self.drain()
+
+
+	def close(self):
+		os.close(self.fd)
+
+
+
+class DownloadWatcher:
+	"""
+	Detects the files that appear in a download folder after the watcher is created.
+
+	Create it before clicking the download button and call 'wait' (or 'wait_async') after the click.
+	"""
+
+	def __init__(self, download_folder: str, use_inotify: bool = True):
+		"""
+		Takes a snapshot of the files already in the folder.
+
+		@param download_folder The folder given to 'create_browser_connection'.
+		@param use_inotify Whether to try inotify, otherwise the folder is polled.
+		"""
+
+		self.download_folder = download_folder
+		self._initial_files = set(os.listdir(download_folder))
+		self._reported_files = set()
+		self._observed_sizes = {}
+
+		self._inotify = None
+		if use_inotify:
+			try:
+				self._inotify = _Inotify(download_folder)
+			except (OSError, AttributeError):
+				self._inotify = None
+
+
+	def _finished_files(self, stable_time: float) -> list:
+		"""
+		Lists the new files which are not temporary and whose size did not change during 'stable_time'.
+
+		@param stable_time The time in seconds the size must be stable.
+		@return The list of file names, in order of modification.
+		"""
+
+		now = time.monotonic()
+		names = set(os.listdir(self.download_folder))
+
+		finished = []
+		for name in names - self._initial_files - self._reported_files:
+			if name.endswith(temporary_suffixes):
+				continue
+
+			# Firefox creates the final file empty while the '.part' file is written
+			if any(f"{name}{suffix}" in names for suffix in temporary_suffixes):
+				continue
+
+			path = os.path.join(self.download_folder, name)
+			try:
+				status = os.stat(path)
+			except FileNotFoundError:
+				continue
+			if not os.path.isfile(path):
+				continue
+
+			signature = (status.st_size, status.st_mtime_ns)
+			previous = self._observed_sizes.get(name)
+			if previous is None or previous[0] != signature:
+				self._observed_sizes[name] = (signature, now)
+			elif now - previous[1] >= stable_time:
+				finished.append((status.st_mtime_ns, name))
+
+		# Each file is returned once, the callers accumulate the files of several checks
+		names = [name for _, name in sorted(finished)]
+		self._reported_files.update(names)
+		return names
+
+
+	def _collect(self, finished: list) -> list:
+		paths = [os.path.join(self.download_folder, name) for name in finished]
+
+		# The host of the browser downloads is unknown, they are recorded under 'browser'
+		for path in paths:
+			record_bytes('browser', os.path.getsize(path))
+
+		return paths
+
+
+	def wait(self, expected_count: int = 1, timeout: float = 60, stable_time: float = 0.5,
+			poll_interval: float = 0.25) -> list:
+		"""
+		Blocks until the expected number of downloads are finished.
+
+		@param expected_count The number of new files to wait.
+		@param timeout The maximum time in seconds to wait.
+		@param stable_time The time in seconds the size of a file must be stable.
+		@param poll_interval The maximum time in seconds between two checks of the folder.
+		@return The list of paths of the finished files.
+		@throws DownloadTimeout If the downloads are not finished before the timeout, with the paths of the finished ones.
+		"""
+
+		deadline = time.monotonic() + timeout
+		finished = []
+		while True:
+			finished.extend(self._finished_files(stable_time))
+			if len(finished) >= expected_count:
+				return self._collect(finished)
+
+			remaining = deadline - time.monotonic()
+			if remaining <= 0:
+				raise DownloadTimeout(f"Only {len(finished)} of {expected_count} downloads finished in '{self.download_folder}'",
+					self._collect(finished))
+
+			# Wake up on a folder event, but check again at least each poll interval for the size stability
+			if self._inotify is not None:
+				self._inotify.wait(min(poll_interval, remaining))
+			else:
+				time.sleep(min(poll_interval, remaining))
+
+
+	async def wait_async(self, expected_count: int = 1, timeout: float = 60, stable_time: float = 0.5,
+			poll_interval: float = 0.25) -> list:
+		"""
+		Awaitable version of 'wait', it does not block the event loop.
+
+		@param expected_count The number of new files to wait.
+		@param timeout The maximum time in seconds to wait.
+		@param stable_time The time in seconds the size of a file must be stable.
+		@param poll_interval The maximum time in seconds between two checks of the folder.
+		@return The list of paths of the finished files.
+		@throws DownloadTimeout If the downloads are not finished before the timeout, with the paths of the finished ones.
+		"""
+
+		loop = asyncio.get_running_loop()
+		deadline = time.monotonic() + timeout
+		finished = []
+		while True:
+			finished.extend(self._finished_files(stable_time))
+			if len(finished) >= expected_count:
+				return self._collect(finished)
+
+			remaining = deadline - time.monotonic()
+			if remaining <= 0:
+				raise DownloadTimeout(f"Only {len(finished)} of {expected_count} downloads finished in '{self.download_folder}'",
+					self._collect(finished))
+
+			if self._inotify is not None:
+				event = asyncio.Event()
+				loop.add_reader(self._inotify.fd, event.set)
+				try:
+					await asyncio.wait_for(event.wait(), min(poll_interval, remaining))
+				except asyncio.TimeoutError:
+					pass
+				finally:
+					loop.remove_reader(self._inotify.fd)
+				self._inotify.drain()
+			else:
+				await asyncio.sleep(min(poll_interval, remaining))
+
+
+	def close(self):
+		"""
+		Releases the inotify watch, if any.
+		"""
+
+		if self._inotify is not None:
+			self._inotify.close()
+			self._inotify = None
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
@@ -0,0 +1,313 @@
+"""
+@file src/driver_pool.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Pool of warm browser drivers which can be shared by several tasks
+"""
+
+
+import queue
+import weakref
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+import src.browser_web_scrapping as browser_ws
+
+
+# Slot of the pool whose driver could not be launched again, it is launched when the slot is acquired
+_empty_slot = None
+
+# Pools of the launched drivers, to count the page loads which do not call 'driver.get'
+_driver_pools = weakref.WeakKeyDictionary()
+_driver_pools_lock = threading.Lock()
+
+
+def note_page_load(driver):
+	"""
+	Counts a page load of a driver for the recycling of its pool, nothing if it is not from a pool.
+
+	'driver.get' calls it, the other navigations must call it too, e.g. the 'window.location' of TabMultiplexer.
+
+	@param driver A Selenium WebDriver instance.
+	"""
+
+	try:
+		with _driver_pools_lock:
+			pool = _driver_pools.get(driver)
+	except TypeError:
+		return
+
+	if pool is not None:
+		with pool._lock:
+			if id(driver) in pool._page_loads:
+				pool._page_loads[id(driver)] += 1
+
+
+
+class DriverPool:
+	"""
+	Keeps a fixed number of browser drivers launched and hands them out to the tasks.
+
+	The drivers are created with 'create_browser_connection', reset when they are returned and recycled
+	(closed and launched again) after a number of page loads or when the browser uses too much memory.
+	"""
+
+	def __init__(self, size: int, download_folder: str, browser: str = 'Firefox', pref_dict: dict = None,
+			max_page_loads: int = None, max_rss_mb: float = None, clear_cookies: bool = False, **connection_kwargs):
+		"""
+		Launches the drivers of the pool.
+
+		@param size The number of drivers kept in the pool.
+		@param download_folder The path to the folder where downloads should be saved.
+		@param browser The name of the browser will be used.
+		@param pref_dict The dictionary of preferences needed to setup the browser.
+		@param max_page_loads Number of page loads after which a driver is recycled, None to never recycle. They are the
+			'driver.get' calls and the navigations given to 'note_page_load', e.g. the ones of TabMultiplexer.
+		@param max_rss_mb Memory (MB) of the browser processes after which a driver is recycled, requires psutil.
+		@param clear_cookies Whether to delete the cookies of a driver when it is returned.
+		@param connection_kwargs Other arguments passed to 'create_browser_connection'.
+		"""
+
+		if size < 1:
+			raise ValueError(f"The size of the driver pool must be at least 1, got {size}")
+
+		if max_rss_mb is not None:
+			try:
+				import psutil
+			except ImportError:
+				raise ImportError("The package 'psutil' is required to recycle drivers by memory usage")
+
+		self.size = size
+		self.download_folder = download_folder
+		self.browser = browser
+		self.pref_dict = pref_dict
+		self.max_page_loads = max_page_loads
+		self.max_rss_mb = max_rss_mb
+		self.clear_cookies = clear_cookies
+		self.connection_kwargs = connection_kwargs
+
+		self._idle = queue.Queue()
+		self._page_loads = {}
+		self._drivers = set()
+		self._lock = threading.Lock()
+		self._closed = False
+
+		# Launch the browsers in parallel, the launch time is mostly spent waiting the processes
+		try:
+			with ThreadPoolExecutor(max_workers=size) as executor:
+				drivers = list(executor.map(lambda _: self._launch_driver(), range(size)))
+		except Exception:
+			for driver in list(self._drivers):
+				self._discard_driver(driver)
+			raise
+
+		for driver in drivers:
+			self._idle.put(driver)
+
+
+	def _launch_driver(self):
+		"""
+		Creates a new driver and wraps its 'get' method to count the page loads.
+
+		@return A Selenium WebDriver instance.
+		"""
+
+		driver = browser_ws.create_browser_connection(self.download_folder, self.browser, self.pref_dict,
+			**self.connection_kwargs)
+
+		original_get = driver.get
+		def counted_get(url):
+			note_page_load(driver)
+			return original_get(url)
+		driver.get = counted_get
+
+		with self._lock:
+			self._page_loads[id(driver)] = 0
+			self._drivers.add(driver)
+		with _driver_pools_lock:
+			_driver_pools[driver] = self
+
+		return driver
+
+
+	def _discard_driver(self, driver):
+		"""
+		Closes a driver and forgets it.
+
+		@param driver The Selenium WebDriver instance to close.
+		"""
+
+		with self._lock:
+			self._page_loads.pop(id(driver), None)
+			self._drivers.discard(driver)
+		with _driver_pools_lock:
+			_driver_pools.pop(driver, None)
+
+		try:
+			driver.quit()
+		except Exception as e:
+			print(f"An error occurred closing a driver of the pool: {e}")
+
+
+	def browser_rss_mb(self, driver) -> float:
+		"""
+		Measures the resident memory of the driver service and all the browser processes it launched.
+
+		@param driver The Selenium WebDriver instance.
+		@return The resident memory in MB, or 0 if it can not be measured.
+		"""
+
+		import psutil
+
+		try:
+			process = psutil.Process(driver.service.process.pid)
+			processes = [process] + process.children(recursive=True)
+		except Exception:
+			return 0.0
+
+		rss = 0
+		for child in processes:
+			try:
+				rss += child.memory_info().rss
+			except psutil.Error:
+				pass
+
+		return rss / (1024 * 1024)
+
+
+	def _needs_recycle(self, driver) -> bool:
+		"""
+		Checks if a driver reached the page loads or the memory limits of the pool.
+
+		@param driver The Selenium WebDriver instance.
+		@return True if the driver must be replaced, False otherwise.
+		"""
+
+		if self.max_page_loads is not None and self._page_loads.get(id(driver), 0) >= self.max_page_loads:
+			return True
+
+		if self.max_rss_mb is not None and self.browser_rss_mb(driver) >= self.max_rss_mb:
+			return True
+
+		return False
+
+
+	def _reset_driver(self, driver):
+		"""
+		Leaves a driver as a new task expects it: one tab, main document and optionally without cookies.
+
+		@param driver The Selenium WebDriver instance.
+		"""
+
+		handles = driver.window_handles
+		for handle in handles[1:]:
+			driver.switch_to.window(handle)
+			driver.close()
+		driver.switch_to.window(handles[0])
+		driver.switch_to.default_content()
+		browser_ws.note_window_switch(driver, handles[0])
+		browser_ws.invalidate_element_cache(driver)
+
+		if self.clear_cookies:
+			driver.delete_all_cookies()
+
+
+	def acquire(self, timeout: float = None):
+		"""
+		Takes a driver out of the pool, waiting until one is free.
+
+		@param timeout The maximum time in seconds to wait, None waits forever.
+		@return A Selenium WebDriver instance.
+		@throws queue.Empty If no driver was returned before the timeout.
+		@throws Exception If the slot has no driver and it can not be launched, the slot stays in the pool.
+		"""
+
+		if self._closed:
+			raise RuntimeError("The driver pool is closed")
+
+		driver = self._idle.get(timeout=timeout)
+		if driver is _empty_slot:
+			try:
+				driver = self._launch_driver()
+			except Exception:
+				self._idle.put(_empty_slot)
+				raise
+
+		return driver
+
+
+	def release(self, driver, discard: bool = False):
+		"""
+		Returns a driver to the pool, replacing it if it is broken or must be recycled.
+
+		@param driver The Selenium WebDriver instance taken with 'acquire'.
+		@param discard Whether to close the driver instead of reusing it, e.g. after the browser crashed.
+		"""
+
+		if self._closed:
+			self._discard_driver(driver)
+			return
+
+		if not discard:
+			try:
+				discard = self._needs_recycle(driver)
+				if not discard:
+					self._reset_driver(driver)
+			except Exception as e:
+				print(f"An error occurred resetting a driver of the pool: {e}")
+				discard = True
+
+		if discard:
+			self._discard_driver(driver)
+			try:
+				driver = self._launch_driver()
+			except Exception as e:
+				# The slot is kept, its driver is launched again by the next 'acquire'
+				print(f"An error occurred launching a driver of the pool: {e}")
+				driver = _empty_slot
+
+		self._idle.put(driver)
+
+
+	@contextmanager
+	def driver(self, timeout: float = None):
+		"""
+		Context manager which checks out a driver and returns it to the pool at the end.
+
+		If the block raises an exception the driver is still reset and reused, use 'acquire' and 'release'
+		directly to discard it.
+
+		@param timeout The maximum time in seconds to wait for a free driver.
+		@return A Selenium WebDriver instance.
+		"""
+
+		driver = self.acquire(timeout)
+		try:
+			yield driver
+		finally:
+			self.release(driver)
+
+
+	def close(self):
+		"""
+		Closes all the drivers of the pool, the ones in use are closed when they are returned.
+		"""
+
+		self._closed = True
+		while True:
+			try:
+				driver = self._idle.get_nowait()
+			except queue.Empty:
+				break
+			if driver is not _empty_slot:
+				self._discard_driver(driver)
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
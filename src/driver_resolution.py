@@ -0,0 +1,181 @@
+"""
+@file src/driver_resolution.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Functions to find the driver binary (chromedriver, geckodriver) of a browser without network access
+
+The driver is looked up in this order: an explicit path, the local cache keyed by the browser version, the PATH
+and, only if it is allowed, a download with webdriver_manager which is then saved in the cache.
+The result is memoized, so only the first driver of the process pays the lookup.
+"""
+
+
+import os
+import re
+import shutil
+import stat
+import subprocess
+import threading
+from functools import lru_cache
+
+
+# Name of the driver binary and the commands which can launch each browser
+driver_names = {
+	'Chrome': 'chromedriver',
+	'Firefox': 'geckodriver'
+}
+browser_commands = {
+	'Chrome': ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome'],
+	'Firefox': ['firefox', 'firefox-esr']
+}
+
+DEFAULT_CACHE_FOLDER = os.path.join(os.path.expanduser('~'), '.cache', 'web_scrapping_tools', 'drivers')
+
+_resolved_drivers = {}
+_resolution_lock = threading.Lock()
+
+
+
+@lru_cache(maxsize=None)
+def get_browser_version(browser: str) -> str | None:
+	"""
+	Gets the version of the browser installed in the system running '<browser> --version'.
+
+	@param browser The name of the browser ('Chrome' or 'Firefox').
+	@return The version string (e.g. '124.0.6367.91'), or None if the browser can not be found.
+	"""
+
+	for command in browser_commands[browser]:
+		executable = shutil.which(command)
+		if executable is None:
+			continue
+
+		try:
+			output = subprocess.run([executable, '--version'], capture_output=True, text=True, timeout=10).stdout
+		except (OSError, subprocess.SubprocessError):
+			continue
+
+		match = re.search(r'\d+(\.\d+)+', output)
+		if match:
+			return match.group(0)
+
+	return None
+
+
+def cached_driver_path(browser: str, version: str, cache_folder: str = None) -> str:
+	"""
+	Builds the path of the driver in the local cache, keyed by the major version of the browser.
+
+	@param browser The name of the browser ('Chrome' or 'Firefox').
+	@param version The version of the browser.
+	@param cache_folder The root folder of the cache, defaults to DEFAULT_CACHE_FOLDER.
+	@return The path where the driver is (or would be) cached.
+	"""
+
+	cache_folder = DEFAULT_CACHE_FOLDER if cache_folder is None else cache_folder
+	driver_name = driver_names[browser] + ('.exe' if os.name == 'nt' else '')
+	return os.path.join(cache_folder, browser, version.split('.')[0], driver_name)
+
+
+def _is_executable(path: str) -> bool:
+	return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+def _download_driver(browser: str) -> str:
+	"""
+	Downloads the driver with webdriver_manager, which checks the latest compatible version online.
+
+	@param browser The name of the browser ('Chrome' or 'Firefox').
+	@return The path of the downloaded driver.
+	"""
+
+	if browser == 'Chrome':
+		from webdriver_manager.chrome import ChromeDriverManager
+		return ChromeDriverManager().install()
+	else:
+		from webdriver_manager.firefox import GeckoDriverManager
+		return GeckoDriverManager().install()
+
+
+def save_driver_in_cache(browser: str, source_path: str, version: str, cache_folder: str = None) -> str:
+	"""
+	Copies a driver binary into the local cache, e.g. to prepare the cache of air-gapped nodes.
+
+	@param browser The name of the browser ('Chrome' or 'Firefox').
+	@param source_path The path of the driver binary.
+	@param version The version of the browser the driver supports.
+	@param cache_folder The root folder of the cache, defaults to DEFAULT_CACHE_FOLDER.
+	@return The path of the driver in the cache.
+	"""
+
+	target_path = cached_driver_path(browser, version, cache_folder)
+	os.makedirs(os.path.dirname(target_path), exist_ok=True)
+
+	# Copy to a temporary name first so other processes never see a partial binary
+	temporary_path = f"{target_path}.{os.getpid()}.tmp"
+	shutil.copyfile(source_path, temporary_path)
+	os.chmod(temporary_path, os.stat(temporary_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+	os.replace(temporary_path, target_path)
+
+	return target_path
+
+
+def resolve_driver_binary(browser: str, driver_path: str = None, cache_folder: str = None,
+		allow_network: bool = False) -> str:
+	"""
+	Finds the driver binary of a browser, memoizing the result for the process.
+
+	@param browser The name of the browser ('Chrome' or 'Firefox').
+	@param driver_path An explicit path to the driver, it has the highest priority.
+	@param cache_folder The root folder of the cache, defaults to DEFAULT_CACHE_FOLDER.
+	@param allow_network Whether to download the driver with webdriver_manager when it is not found locally.
+	@return The path of the driver binary.
+	@throws FileNotFoundError If the driver can not be found.
+	"""
+
+	if browser not in driver_names:
+		raise ValueError(f"Browser '{browser}' not in available browsers {list(driver_names)}")
+
+	key = (browser, driver_path, cache_folder, allow_network)
+	if key in _resolved_drivers:
+		return _resolved_drivers[key]
+
+	with _resolution_lock:
+		if key in _resolved_drivers:
+			return _resolved_drivers[key]
+
+		# 1. Explicit path given by the user
+		if driver_path is not None:
+			if not _is_executable(driver_path):
+				raise FileNotFoundError(f"The driver path '{driver_path}' does not exist or is not executable")
+			resolved_path = driver_path
+
+		else:
+			resolved_path = None
+
+			# 2. Local cache keyed by the browser version
+			version = get_browser_version(browser)
+			if version is not None:
+				cache_path = cached_driver_path(browser, version, cache_folder)
+				if _is_executable(cache_path):
+					resolved_path = cache_path
+
+			# 3. Driver available in the PATH
+			if resolved_path is None:
+				resolved_path = shutil.which(driver_names[browser])
+
+			# 4. Download it, only if it was allowed, and keep it in the cache for the next runs
+			if resolved_path is None and allow_network:
+				resolved_path = _download_driver(browser)
+				if version is not None:
+					resolved_path = save_driver_in_cache(browser, resolved_path, version, cache_folder)
+
+			if resolved_path is None:
+				raise FileNotFoundError(
+					f"The driver '{driver_names[browser]}' for {browser} {version or ''} was not found in the cache "
+					f"'{cache_folder or DEFAULT_CACHE_FOLDER}' nor in the PATH, give its path or allow the network resolution"
+				)
+
+		_resolved_drivers[key] = resolved_path
+		return resolved_path
@@ -0,0 +1,201 @@
+"""
+@file src/http_downloads.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Functions to download files with HTTP using the session (cookies, user agent) of a browser driver
+
+The browser is only needed to log in and to discover the links, then the files are downloaded concurrently with a
+pooled HTTP session, written in chunks and resumed with Range headers if a previous download was interrupted.
+"""
+
+
+import os
+import re
+import hashlib
+from contextlib import nullcontext
+from urllib.parse import urlparse, unquote
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.instrumentation import instrumented, record_bytes
+from src.rate_limiter import congestion_statuses, retry_after_seconds
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+
+def session_from_driver(driver, referer: str = None, pool_size: int = 8) -> requests.Session:
+	"""
+	Creates an HTTP session with the cookies, user agent and referer of a browser driver.
+
+	@param driver A Selenium WebDriver instance, already logged in if the files need it.
+	@param referer The referer header, defaults to the current URL of the driver.
+	@param pool_size The number of connections kept open per host, it should be at least the download workers.
+	@return A requests Session ready to download the files.
+	"""
+
+	session = requests.Session()
+	adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+	session.mount('http://', adapter)
+	session.mount('https://', adapter)
+
+	try:
+		session.headers['User-Agent'] = driver.execute_script("return navigator.userAgent;")
+		session.headers['Referer'] = driver.current_url if referer is None else referer
+
+		for cookie in driver.get_cookies():
+			session.cookies.set(
+				cookie['name'],
+				cookie['value'],
+				domain=cookie.get('domain', ''),
+				path=cookie.get('path', '/'),
+				secure=cookie.get('secure', False),
+				expires=cookie.get('expiry')
+			)
+	except Exception as e:
+		session.close()
+		raise Exception(f"An error occurred copying the session of the driver: {e}")
+
+	return session
+
+
+def file_name_from_response(response: requests.Response, url: str) -> str:
+	"""
+	Gets the name of a downloaded file from the Content-Disposition header, or from the URL if it is not given.
+
+	@param response The HTTP response of the file.
+	@param url The URL of the file.
+	@return The file name.
+	"""
+
+	disposition = response.headers.get('Content-Disposition', '')
+	match = re.search(r"filename\*\s*=\s*[^']*'[^']*'([^;]+)", disposition)
+	if match:
+		return os.path.basename(unquote(match.group(1).strip('" ')))
+
+	match = re.search(r'filename\s*=\s*"?([^";]+)"?', disposition)
+	if match:
+		return os.path.basename(match.group(1).strip())
+
+	name = os.path.basename(unquote(urlparse(url).path))
+	return name if name else 'download'
+
+
+def _download_attempt(session: requests.Session, url: str, download_folder: str, file_name: str, chunk_size: int,
+		resume: bool, timeout: float, rate_limiter) -> str:
+	"""
+	Downloads a file once, see 'download_file'.
+	"""
+
+	# The partial file is named by the URL, so it can be resumed before knowing the final name
+	partial_path = os.path.join(download_folder, f".{hashlib.sha1(url.encode()).hexdigest()[:16]}.part")
+	offset = os.path.getsize(partial_path) if resume and os.path.exists(partial_path) else 0
+
+	headers = {'Range': f"bytes={offset}-"} if offset > 0 else {}
+	with rate_limiter.slot(url) if rate_limiter is not None else nullcontext() as ticket, \
+			session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+
+		# The latency of the host is the time to the headers, the slot is kept while the body is read so the
+		# simultaneous downloads stay limited
+		if ticket is not None:
+			ticket.mark_response(response.status_code)
+			retry_after = retry_after_seconds(response)
+			if response.status_code in congestion_statuses and retry_after is not None:
+				rate_limiter.pause(url, retry_after)
+
+		# The partial file was already complete
+		if response.status_code == 416 and offset > 0:
+			mode = None
+		else:
+			response.raise_for_status()
+			mode = 'ab' if response.status_code == 206 else 'wb'
+
+		file_path = os.path.join(download_folder, file_name or file_name_from_response(response, url))
+
+		if mode is not None:
+			written = 0
+			try:
+				with open(partial_path, mode) as file:
+					for chunk in response.iter_content(chunk_size=chunk_size):
+						file.write(chunk)
+						written += len(chunk)
+			finally:
+				record_bytes(url, written)
+
+	os.replace(partial_path, file_path)
+	return file_path
+
+
+@instrumented()
+def download_file(session: requests.Session, url: str, download_folder: str, file_name: str = None,
+		chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = True, timeout: float = 60, rate_limiter = None,
+		retry_policy = None) -> str:
+	"""
+	Downloads a file in chunks, resuming the partial file of a previous attempt if the server supports it.
+
+	@param session The HTTP session, e.g. from 'session_from_driver'.
+	@param url The URL of the file.
+	@param download_folder The folder where the file is saved.
+	@param file_name The name of the file, defaults to the name given by the server or the URL.
+	@param chunk_size The number of bytes written at once.
+	@param resume Whether to continue a partial file with a Range request.
+	@param timeout The timeout in seconds of the connection and of each read.
+	@param rate_limiter Optional RateLimiter (see 'src/rate_limiter.py') which limits the rate and the simultaneous
+		downloads of the host, the 'Retry-After' of a 429/503 response pauses the host.
+	@param retry_policy Optional RetryPolicy, each retry continues the partial file if 'resume' is True.
+	@return The path of the downloaded file.
+	"""
+
+	arguments = (session, url, download_folder, file_name, chunk_size, resume, timeout, rate_limiter)
+	if retry_policy is None:
+		return _download_attempt(*arguments)
+	return retry_policy.call(_download_attempt, *arguments)
+
+
+def download_files(session: requests.Session, urls: list | dict, download_folder: str, max_workers: int = 4,
+		chunk_size: int = DEFAULT_CHUNK_SIZE, resume: bool = True, timeout: float = 60, on_complete = None,
+		rate_limiter = None, retry_policy = None) -> dict:
+	"""
+	Downloads several files concurrently with a bounded number of workers.
+
+	@param session The HTTP session, e.g. from 'session_from_driver' with a pool size of at least 'max_workers'.
+	@param urls The list of URLs, or a dictionary from URL to file name.
+	@param download_folder The folder where the files are saved.
+	@param max_workers The maximum number of simultaneous downloads.
+	@param chunk_size The number of bytes written at once.
+	@param resume Whether to continue the partial files with Range requests.
+	@param timeout The timeout in seconds of the connection and of each read.
+	@param on_complete Optional function called as on_complete(url, path, error) when each download ends.
+	@param rate_limiter Optional RateLimiter, it adapts the simultaneous downloads of each host below 'max_workers'.
+	@param retry_policy Optional RetryPolicy of each download.
+	@return A dictionary from URL to the path of the file, or to the exception if the download failed.
+	"""
+
+	file_names = urls if isinstance(urls, dict) else dict.fromkeys(urls)
+
+	results = {}
+	with ThreadPoolExecutor(max_workers=max_workers) as executor:
+		futures = {
+			executor.submit(download_file, session, url, download_folder, file_name, chunk_size, resume, timeout,
+				rate_limiter, retry_policy): url
+			for url, file_name in file_names.items()
+		}
+
+		for future in as_completed(futures):
+			url = futures[future]
+			try:
+				results[url] = future.result()
+				error = None
+			except Exception as e:
+				print(f"An error occurred downloading '{url}': {e}")
+				results[url] = e
+				error = e
+
+			if on_complete is not None:
+				on_complete(url, None if error else results[url], error)
+
+	return results
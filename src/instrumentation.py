@@ -0,0 +1,347 @@
+"""
+@file src/instrumentation.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Opt-in metrics of the browser helpers: latency histograms, counts, failures and downloaded bytes
+
+The metrics are tagged by operation, locator and URL host. They can be read in the process with 'get_metrics' or
+exported as JSON or in the Prometheus text format. While the instrumentation is disabled (the default) an
+instrumented function only pays a flag check.
+
+The failure reasons noted by the helpers are kept in a context variable, so they follow the coroutines and the
+functions run in other threads with the copied context (e.g. by AsyncDriver).
+"""
+
+
+import json
+import time
+import inspect
+import threading
+import contextvars
+from functools import wraps
+from urllib.parse import urlparse
+
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_enabled = False
+_lock = threading.Lock()
+_calls = {}
+_downloaded_bytes = {}
+
+# Holder of the failure noted during the current instrumented call
+_failure_holder = contextvars.ContextVar('failure_holder', default=None)
+
+
+
+def enable_instrumentation():
+	"""
+	Starts recording the metrics of the instrumented functions.
+	"""
+
+	global _enabled
+	_enabled = True
+
+
+def disable_instrumentation():
+	"""
+	Stops recording the metrics, the recorded ones are kept until 'reset_metrics'.
+	"""
+
+	global _enabled
+	_enabled = False
+
+
+def is_instrumentation_enabled() -> bool:
+	return _enabled
+
+
+def reset_metrics():
+	"""
+	Deletes all the recorded metrics.
+	"""
+
+	with _lock:
+		_calls.clear()
+		_downloaded_bytes.clear()
+
+
+def url_host(url: str) -> str:
+	"""
+	Gets the host of a URL, used as tag of the metrics.
+
+	@param url The URL.
+	@return The host, or an empty string if the URL has none.
+	"""
+
+	try:
+		return urlparse(url).hostname or ''
+	except (TypeError, ValueError):
+		return ''
+
+
+def note_failure(error: Exception):
+	"""
+	Saves the reason of a failure handled inside a helper (which prints it and returns None or False), so the
+	instrumentation can record it.
+
+	@param error The exception handled.
+	"""
+
+	if _enabled:
+		holder = _failure_holder.get()
+		if holder is not None:
+			holder['error'] = error
+
+
+def record_bytes(url: str, size: int):
+	"""
+	Adds downloaded bytes to the metrics of the host of a URL.
+
+	@param url The URL of the downloaded file, or directly a host name.
+	@param size The number of bytes.
+	"""
+
+	if not _enabled:
+		return
+
+	host = url_host(url) if '//' in url else url
+	with _lock:
+		_downloaded_bytes[host] = _downloaded_bytes.get(host, 0) + size
+
+
+def _failure_reason(error: Exception) -> str:
+	message = str(error).strip().split('\n')[0]
+	return f"{type(error).__name__}: {message[:120]}" if message else type(error).__name__
+
+
+def _is_failure(result, failure_results: tuple) -> bool:
+	# None and the booleans are compared by identity, so 0 or an empty list are not taken as False
+	return any(
+		result is failure_result if failure_result is None or isinstance(failure_result, bool)
+		else type(result) is type(failure_result) and result == failure_result
+		for failure_result in failure_results
+	)
+
+
+def _enter_call() -> tuple:
+	holder = {'error': None}
+	return holder, _failure_holder.set(holder)
+
+
+def _leave_call(holder: dict, token):
+	# The failure of a nested call is also the reason of the call which contains it
+	_failure_holder.reset(token)
+	parent = _failure_holder.get()
+	if parent is not None and holder['error'] is not None:
+		parent['error'] = holder['error']
+
+
+def _record_call(operation: str, locator: str, host: str, duration: float, failure_reason: str = None):
+	"""
+	Adds a call to the metrics of its operation, locator and host.
+
+	@param operation The name of the instrumented function.
+	@param locator The locator tag, an empty string if the function has none.
+	@param host The host tag, an empty string if the function has none.
+	@param duration The latency of the call in seconds.
+	@param failure_reason The reason of the failure, None if the call succeeded.
+	"""
+
+	key = (operation, locator, host)
+	with _lock:
+		metrics = _calls.get(key)
+		if metrics is None:
+			metrics = {
+				'count': 0,
+				'failures': 0,
+				'failure_reasons': {},
+				'latency_sum': 0.0,
+				'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1)
+			}
+			_calls[key] = metrics
+
+		metrics['count'] += 1
+		metrics['latency_sum'] += duration
+		bucket = 0
+		while bucket < len(LATENCY_BUCKETS) and duration > LATENCY_BUCKETS[bucket]:
+			bucket += 1
+		metrics['latency_buckets'][bucket] += 1
+
+		if failure_reason is not None:
+			metrics['failures'] += 1
+			metrics['failure_reasons'][failure_reason] = metrics['failure_reasons'].get(failure_reason, 0) + 1
+
+
+def instrumented(operation: str = None, failure_results: tuple = ()):
+	"""
+	Decorator which records the latency and result of each call of a function while the instrumentation is enabled.
+
+	The tags are taken from the arguments: 'type_element' and 'element' give the locator, 'url' gives the host.
+
+	@param operation The name of the operation, defaults to the name of the function.
+	@param failure_results The returned values which mean the call failed, e.g. (None,) or (False,). None and the
+		booleans are compared by identity, other values by equality.
+	@return The decorator.
+	"""
+
+	def decorator(function):
+		name = operation or function.__name__
+		signature = inspect.signature(function)
+
+		def tags(args, kwargs) -> tuple:
+			arguments = signature.bind_partial(*args, **kwargs).arguments
+			locator = f"{arguments['type_element']}={arguments['element']}" if 'element' in arguments and 'type_element' in arguments else ''
+			host = url_host(arguments['url']) if 'url' in arguments else ''
+			return locator, host
+
+		def record(locator, host, start, result, holder):
+			failure_reason = None
+			if _is_failure(result, failure_results):
+				error = holder['error']
+				failure_reason = _failure_reason(error) if error is not None else f"returned {result}"
+			_record_call(name, locator, host, time.perf_counter() - start, failure_reason)
+
+		# The coroutines are measured until they finish, not until they are created
+		if inspect.iscoroutinefunction(function):
+			@wraps(function)
+			async def async_wrapper(*args, **kwargs):
+				if not _enabled:
+					return await function(*args, **kwargs)
+
+				locator, host = tags(args, kwargs)
+				holder, token = _enter_call()
+				start = time.perf_counter()
+				try:
+					result = await function(*args, **kwargs)
+				except Exception as e:
+					_record_call(name, locator, host, time.perf_counter() - start, _failure_reason(e))
+					raise
+				finally:
+					_leave_call(holder, token)
+
+				record(locator, host, start, result, holder)
+				return result
+
+			return async_wrapper
+
+		@wraps(function)
+		def wrapper(*args, **kwargs):
+			if not _enabled:
+				return function(*args, **kwargs)
+
+			locator, host = tags(args, kwargs)
+			holder, token = _enter_call()
+			start = time.perf_counter()
+			try:
+				result = function(*args, **kwargs)
+			except Exception as e:
+				_record_call(name, locator, host, time.perf_counter() - start, _failure_reason(e))
+				raise
+			finally:
+				_leave_call(holder, token)
+
+			record(locator, host, start, result, holder)
+			return result
+
+		return wrapper
+
+	return decorator
+
+
+def get_metrics() -> dict:
+	"""
+	Gets a copy of the recorded metrics.
+
+	@return A dictionary with the list 'calls' (one entry per operation, locator and host) and the dictionary
+		'downloaded_bytes' by host.
+	"""
+
+	with _lock:
+		calls = [
+			{
+				'operation': operation,
+				'locator': locator,
+				'host': host,
+				'count': metrics['count'],
+				'failures': metrics['failures'],
+				'failure_reasons': dict(metrics['failure_reasons']),
+				'latency_sum': metrics['latency_sum'],
+				'latency_buckets': dict(zip([*map(str, LATENCY_BUCKETS), '+Inf'], metrics['latency_buckets']))
+			}
+			for (operation, locator, host), metrics in _calls.items()
+		]
+		downloaded_bytes = dict(_downloaded_bytes)
+
+	return {'calls': calls, 'downloaded_bytes': downloaded_bytes}
+
+
+def export_json(path: str = None) -> str:
+	"""
+	Exports the metrics as JSON.
+
+	@param path Optional path of a file where the JSON is written.
+	@return The JSON string.
+	"""
+
+	text = json.dumps(get_metrics(), indent=2)
+	if path is not None:
+		with open(path, 'w', encoding='utf-8') as file:
+			file.write(text)
+
+	return text
+
+
+def _label_value(value: str) -> str:
+	return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def export_prometheus(prefix: str = 'web_scrapping') -> str:
+	"""
+	Exports the metrics in the Prometheus text exposition format.
+
+	@param prefix The prefix of the metric names.
+	@return The text with all the metrics.
+	"""
+
+	metrics = get_metrics()
+	lines = [
+		f"# HELP {prefix}_calls_total Number of calls of the browser helpers.",
+		f"# TYPE {prefix}_calls_total counter"
+	]
+	for call in metrics['calls']:
+		labels = f'operation="{_label_value(call["operation"])}",locator="{_label_value(call["locator"])}",host="{_label_value(call["host"])}"'
+		lines.append(f"{prefix}_calls_total{{{labels}}} {call['count']}")
+
+	lines += [
+		f"# HELP {prefix}_failures_total Number of failed calls of the browser helpers by reason.",
+		f"# TYPE {prefix}_failures_total counter"
+	]
+	for call in metrics['calls']:
+		labels = f'operation="{_label_value(call["operation"])}",locator="{_label_value(call["locator"])}",host="{_label_value(call["host"])}"'
+		for reason, count in call['failure_reasons'].items():
+			lines.append(f'{prefix}_failures_total{{{labels},reason="{_label_value(reason)}"}} {count}')
+
+	lines += [
+		f"# HELP {prefix}_call_duration_seconds Latency of the browser helpers.",
+		f"# TYPE {prefix}_call_duration_seconds histogram"
+	]
+	for call in metrics['calls']:
+		labels = f'operation="{_label_value(call["operation"])}",locator="{_label_value(call["locator"])}",host="{_label_value(call["host"])}"'
+		cumulative = 0
+		for bound, count in call['latency_buckets'].items():
+			cumulative += count
+			lines.append(f'{prefix}_call_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+		lines.append(f"{prefix}_call_duration_seconds_sum{{{labels}}} {call['latency_sum']}")
+		lines.append(f"{prefix}_call_duration_seconds_count{{{labels}}} {call['count']}")
+
+	lines += [
+		f"# HELP {prefix}_downloaded_bytes_total Bytes downloaded by host.",
+		f"# TYPE {prefix}_downloaded_bytes_total counter"
+	]
+	for host, size in metrics['downloaded_bytes'].items():
+		lines.append(f'{prefix}_downloaded_bytes_total{{host="{_label_value(host)}"}} {size}')
+
+	return '\n'.join(lines) + '\n'
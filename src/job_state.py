@@ -0,0 +1,283 @@
+"""
+@file src/job_state.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Persistent state of the work items of a crawl, stored in SQLite, to restart a job where it stopped
+
+Each item has an ID, an optional payload (e.g. its URL) and a status: pending, in_progress, done or failed, with the
+number of attempts, the worker which took it, the last error and the timing of the last attempt.
+"""
+
+
+import json
+import time
+import sqlite3
+import threading
+
+
+# Status of the work items
+PENDING = 'pending'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+statuses = [PENDING, IN_PROGRESS, DONE, FAILED]
+
+
+
+class JobStateStore:
+	"""
+	Store of the status of the work items of a job, safe to share between threads and processes.
+	"""
+
+	def __init__(self, path: str, timeout: float = 30):
+		"""
+		Opens (or creates) the store.
+
+		@param path The path of the SQLite database.
+		@param timeout The time in seconds to wait when another process is writing the database.
+		"""
+
+		self.path = path
+		self._lock = threading.Lock()
+		self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		self.connection.execute(
+			"CREATE TABLE IF NOT EXISTS items ("
+			"id TEXT PRIMARY KEY, "
+			"status TEXT NOT NULL DEFAULT 'pending', "
+			"attempts INTEGER NOT NULL DEFAULT 0, "
+			"worker TEXT, "
+			"payload TEXT, "
+			"error TEXT, "
+			"created_at REAL, "
+			"started_at REAL, "
+			"finished_at REAL, "
+			"duration REAL)"
+		)
+		self.connection.execute("CREATE INDEX IF NOT EXISTS items_status ON items (status)")
+
+
+	def _transaction(self, function):
+		"""
+		Runs a function inside an immediate transaction, so concurrent processes do not take the same items.
+
+		@param function Function which receives the connection.
+		@return The value returned by the function.
+		"""
+
+		with self._lock:
+			self.connection.execute("BEGIN IMMEDIATE")
+			try:
+				result = function(self.connection)
+			except Exception:
+				self.connection.execute("ROLLBACK")
+				raise
+			self.connection.execute("COMMIT")
+			return result
+
+
+	def add_items(self, items) -> int:
+		"""
+		Adds work items as pending, the IDs already in the store are ignored.
+
+		@param items Iterable of IDs, or of tuples (ID, payload) where the payload can be any JSON value.
+		@return The number of new items.
+		"""
+
+		now = time.time()
+		rows = []
+		for item in items:
+			item_id, payload = item if isinstance(item, (tuple, list)) else (item, None)
+			rows.append((str(item_id), json.dumps(payload), now))
+
+		def insert(connection):
+			before = connection.total_changes
+			connection.executemany("INSERT OR IGNORE INTO items (id, payload, created_at) VALUES (?, ?, ?)", rows)
+			return connection.total_changes - before
+
+		return self._transaction(insert)
+
+
+	def claim(self, worker: str = None, limit: int = 1) -> list:
+		"""
+		Takes pending items and marks them in progress.
+
+		@param worker Optional name of the worker which takes the items.
+		@param limit The maximum number of items to take.
+		@return A list of tuples (ID, payload), empty if there are no pending items.
+		"""
+
+		def take(connection):
+			rows = connection.execute(
+				"SELECT id, payload FROM items WHERE status = ? ORDER BY rowid LIMIT ?", (PENDING, limit)
+			).fetchall()
+			connection.executemany(
+				"UPDATE items SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, finished_at = NULL, "
+				"duration = NULL WHERE id = ?",
+				[(IN_PROGRESS, worker, time.time(), item_id) for item_id, _ in rows]
+			)
+			return [(item_id, json.loads(payload)) for item_id, payload in rows]
+
+		return self._transaction(take)
+
+
+	def _finish(self, item_id: str, status: str, error: str = None):
+		now = time.time()
+		with self._lock:
+			self.connection.execute(
+				"UPDATE items SET status = ?, error = ?, finished_at = ?, duration = ? - started_at WHERE id = ?",
+				(status, error, now, now, str(item_id))
+			)
+
+
+	def mark_done(self, item_id: str):
+		"""
+		Marks an item as done.
+
+		@param item_id The ID of the item.
+		"""
+
+		self._finish(item_id, DONE)
+
+
+	def mark_failed(self, item_id: str, error: str = None):
+		"""
+		Marks an item as failed, it is not taken again until 'retry_failed' is called.
+
+		@param item_id The ID of the item.
+		@param error The reason of the failure.
+		"""
+
+		self._finish(item_id, FAILED, error)
+
+
+	def reset_in_progress(self, worker: str = None) -> int:
+		"""
+		Returns to pending the items left in progress by a stopped job, or by a crashed worker.
+
+		@param worker Optional name of the worker, by default the items of all workers are reset.
+		@return The number of items reset.
+		"""
+
+		query = "UPDATE items SET status = ?, worker = NULL WHERE status = ?"
+		params = [PENDING, IN_PROGRESS]
+		if worker is not None:
+			query += " AND worker = ?"
+			params.append(worker)
+
+		with self._lock:
+			return self.connection.execute(query, params).rowcount
+
+
+	def retry_failed(self, max_attempts: int = None) -> int:
+		"""
+		Returns the failed items to pending.
+
+		@param max_attempts Optional limit, the items with this number of attempts stay failed.
+		@return The number of items to retry.
+		"""
+
+		query = "UPDATE items SET status = ? WHERE status = ?"
+		params = [PENDING, FAILED]
+		if max_attempts is not None:
+			query += " AND attempts < ?"
+			params.append(max_attempts)
+
+		with self._lock:
+			return self.connection.execute(query, params).rowcount
+
+
+	def get_item(self, item_id: str) -> dict | None:
+		"""
+		Gets the state of an item.
+
+		@param item_id The ID of the item.
+		@return A dictionary with all the columns of the item, or None if it is not in the store.
+		"""
+
+		with self._lock:
+			cursor = self.connection.execute("SELECT * FROM items WHERE id = ?", (str(item_id),))
+			row = cursor.fetchone()
+
+		if row is None:
+			return None
+
+		item = dict(zip([column[0] for column in cursor.description], row))
+		item['payload'] = json.loads(item['payload'])
+		return item
+
+
+	def is_done(self, item_id: str) -> bool:
+		item = self.get_item(item_id)
+		return item is not None and item['status'] == DONE
+
+
+	def counts(self) -> dict:
+		"""
+		Counts the items in each status.
+
+		@return A dictionary from status to the number of items.
+		"""
+
+		with self._lock:
+			rows = self.connection.execute("SELECT status, COUNT(*) FROM items GROUP BY status").fetchall()
+
+		return {**dict.fromkeys(statuses, 0), **dict(rows)}
+
+
+	def iter_items(self, status: str = None, batch_size: int = 1000):
+		"""
+		Iterates the IDs and payloads of the items, reading them in batches.
+
+		@param status Optional status of the items.
+		@param batch_size The number of items read at once.
+		@return A generator of tuples (ID, payload).
+		"""
+
+		last_rowid = 0
+		while True:
+			query = "SELECT rowid, id, payload FROM items WHERE rowid > ?"
+			params = [last_rowid]
+			if status is not None:
+				query += " AND status = ?"
+				params.append(status)
+			query += " ORDER BY rowid LIMIT ?"
+			params.append(batch_size)
+
+			with self._lock:
+				rows = self.connection.execute(query, params).fetchall()
+			if not rows:
+				break
+
+			for rowid, item_id, payload in rows:
+				yield item_id, json.loads(payload)
+			last_rowid = rows[-1][0]
+
+
+	def item_workers(self, status: str = DONE) -> dict:
+		"""
+		Gets the worker which took each item, e.g. to know which output of a crashed and restarted job is valid.
+
+		@param status The status of the items.
+		@return A dictionary from item ID to the name of the worker.
+		"""
+
+		with self._lock:
+			rows = self.connection.execute("SELECT id, worker FROM items WHERE status = ?", (status,)).fetchall()
+
+		return dict(rows)
+
+
+	def close(self):
+		with self._lock:
+			self.connection.close()
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
@@ -0,0 +1,388 @@
+"""
+@file src/network_capture.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Capture of the JSON responses received by the page opened in a driver
+
+Many pages (the SharePoint folder lists, the NGA search results) are filled in from JSON calls of their scripts, so
+reading those responses gives the whole list in one structured payload instead of one WebDriver call per element.
+
+Two methods are available:
+	- 'cdp' (Chrome): the responses are read from the performance log of the driver and their bodies with the DevTools
+	  command 'Network.getResponseBody'. The driver must be created with 'create_browser_connection(...,
+	  capture_network=True)', which enables the log.
+	- 'hook' (Firefox and the other browsers): a script wraps 'fetch' and 'XMLHttpRequest' in the page and keeps the
+	  matching responses until they are read. With WebDriver BiDi ('capture_network=True' enables it in Firefox) the
+	  script is installed before the scripts of every new page, otherwise it is installed when the capture starts and
+	  again on each read, so the calls made while a new page loads are missed.
+"""
+
+
+import re
+import json
+import time
+import base64
+import fnmatch
+import threading
+
+import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import DEFAULT_WAIT_TIMEOUT, DEFAULT_POLL_FREQUENCY
+from src.instrumentation import instrumented, note_failure
+
+
+# Types of the requests captured with DevTools, the calls made by the scripts of the page
+default_resource_types = ['XHR', 'Fetch']
+
+# Parts of the content types of the captured responses
+default_mime_types = ['json']
+
+# Maximum number of responses kept by the page until they are read, the hook discards the newer ones
+DEFAULT_MAX_RESPONSES = 1000
+
+# Script which wraps 'fetch' and 'XMLHttpRequest', called with the regular expression of the URLs and the maximum
+hook_script = """
+function (source, maxResponses) {
+	if (window.__wstCaptureInstalled) { return; }
+	window.__wstCaptureInstalled = true;
+	window.__wstCaptured = window.__wstCaptured || [];
+	var pattern = new RegExp(source);
+	function record(url, status, mimeType, body) {
+		if (!pattern.test(url) || window.__wstCaptured.length >= maxResponses) { return; }
+		window.__wstCaptured.push({url: url, status: status, mime_type: mimeType, body: body});
+	}
+	if (window.fetch) {
+		var originalFetch = window.fetch;
+		window.fetch = function () {
+			return originalFetch.apply(this, arguments).then(function (response) {
+				if (pattern.test(response.url)) {
+					response.clone().text().then(function (body) {
+						record(response.url, response.status, response.headers.get('content-type') || '', body);
+					}, function () {});
+				}
+				return response;
+			});
+		};
+	}
+	var originalSend = XMLHttpRequest.prototype.send;
+	XMLHttpRequest.prototype.send = function () {
+		var request = this;
+		request.addEventListener('loadend', function () {
+			var body = null;
+			if (request.responseType === '' || request.responseType === 'text') {
+				body = request.responseText;
+			} else if (request.responseType === 'json') {
+				body = JSON.stringify(request.response);
+			}
+			if (body !== null) {
+				record(request.responseURL, request.status, request.getResponseHeader('content-type') || '', body);
+			}
+		});
+		return originalSend.apply(this, arguments);
+	};
+}
+"""
+
+# Script which returns the responses kept by the hook and removes them from the page
+drain_script = "var captured = window.__wstCaptured || []; window.__wstCaptured = []; return captured;"
+
+
+
+def url_pattern_regex(url_patterns: list = None) -> str:
+	"""
+	Translates URL patterns with '*' wildcards into a regular expression valid in Python and JavaScript.
+
+	@param url_patterns The URL patterns, e.g. ['*/_api/web/*', '*/collection-search?*']. None matches every URL.
+	@return The source of the regular expression.
+	"""
+
+	if not url_patterns:
+		return '.*'
+	return '|'.join('^' + '.*'.join(re.escape(part) for part in pattern.split('*')) + '$' for pattern in url_patterns)
+
+
+def parse_body(body: str):
+	"""
+	Parses the body of a response as JSON.
+
+	@param body The text of the body.
+	@return The parsed JSON, None if the body is not JSON.
+	"""
+
+	if body is None:
+		return None
+
+	text = body.lstrip()
+	# Protection prefixes against JSON hijacking, e.g. ")]}'" or "for(;;);"
+	for prefix in (")]}'", 'for(;;);', 'while(1);'):
+		if text.startswith(prefix):
+			text = text[len(prefix):]
+
+	try:
+		return json.loads(text)
+	except ValueError:
+		return None
+
+
+
+class NetworkCapture:
+	"""
+	Records the responses which match some URL patterns while the driver loads and uses the pages.
+	"""
+
+	def __init__(self, driver, url_patterns: list = None, method: str = None, resource_types: list = None,
+			mime_types: list = None, max_responses: int = DEFAULT_MAX_RESPONSES):
+		"""
+		@param driver A Selenium WebDriver instance, e.g. from 'create_browser_connection(..., capture_network=True)'.
+		@param url_patterns The URL patterns (with '*' wildcards) of the captured responses, None captures all.
+		@param method 'cdp' or 'hook', see the brief of the file. By default 'cdp' if the driver has DevTools.
+		@param resource_types The types of the requests captured by 'cdp', defaults to 'default_resource_types'.
+		@param mime_types Parts of the content types of the captured responses, defaults to 'default_mime_types'.
+			None in the list captures any content type.
+		@param max_responses The maximum number of responses kept by the page with 'hook'.
+		"""
+
+		if method is None:
+			method = 'cdp' if hasattr(driver, 'execute_cdp_cmd') and hasattr(driver, 'get_log') else 'hook'
+		if method not in ('cdp', 'hook'):
+			raise ValueError(f"Capture method '{method}' not in available methods ['cdp', 'hook']")
+
+		self.driver = driver
+		self.method = method
+		self.url_patterns = url_patterns
+		self.resource_types = default_resource_types if resource_types is None else resource_types
+		self.mime_types = default_mime_types if mime_types is None else mime_types
+		self.max_responses = max_responses
+
+		self._url_regex = re.compile(url_pattern_regex(url_patterns))
+		self._hook_call = f"({hook_script.strip()})({json.dumps(self._url_regex.pattern)}, {int(max_responses)})"
+		self._preload_script = None
+		self._pending = {}
+		self._responses = []
+		self._lock = threading.Lock()
+		self.started = False
+
+
+	def __enter__(self):
+		return self.start()
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.stop()
+
+
+	def _accepts(self, url: str, mime_type: str) -> bool:
+		if not self._url_regex.match(url or ''):
+			return False
+		return None in self.mime_types or any(part in (mime_type or '').lower() for part in self.mime_types)
+
+
+	def _response(self, url: str, status: int, mime_type: str, body: str) -> dict:
+		return {'url': url, 'status': status, 'mime_type': mime_type, 'body': body, 'json': parse_body(body)}
+
+
+	@instrumented()
+	def start(self):
+		"""
+		Starts the capture, the responses received before are ignored.
+
+		@return The NetworkCapture.
+		"""
+
+		try:
+			if self.method == 'cdp':
+				self.driver.execute_cdp_cmd('Network.enable', {})
+				self.driver.get_log('performance')
+			else:
+				self._install_hook()
+		except Exception as e:
+			raise Exception(f"An error occurred starting the network capture: {e}")
+
+		self.started = True
+		return self
+
+
+	def _install_hook(self):
+		"""
+		Installs the hook in the next pages with BiDi when it is enabled, and in the current page.
+		"""
+
+		try:
+			# Public preload script API of the Selenium BiDi 'script' module
+			self._preload_script = self.driver.script.pin(f"() => {{ {self._hook_call}; }}")
+		except Exception:
+			# BiDi is not enabled in the driver (or the Selenium version has no 'pin'), the hook is installed again on
+			# each read
+			self._preload_script = None
+
+		self.driver.execute_script(f"{self._hook_call};")
+
+
+	def stop(self):
+		"""
+		Stops the capture, the responses already captured are kept.
+		"""
+
+		if self._preload_script is not None:
+			try:
+				self.driver.script.unpin(self._preload_script)
+			except Exception as e:
+				print(f"An error occurred removing the network capture script: {e}")
+			self._preload_script = None
+
+		self._pending = {}
+		self.started = False
+
+
+	def _poll_log(self) -> list:
+		"""
+		Reads the new entries of the performance log and the bodies of the finished responses.
+		"""
+
+		new_responses = []
+		for entry in self.driver.get_log('performance'):
+			try:
+				message = json.loads(entry['message'])['message']
+			except (KeyError, ValueError):
+				continue
+			method = message.get('method')
+			parameters = message.get('params', {})
+
+			if method == 'Network.responseReceived':
+				response = parameters.get('response', {})
+				if parameters.get('type') in self.resource_types and self._accepts(response.get('url'), response.get('mimeType')):
+					self._pending[parameters['requestId']] = response
+
+			elif method == 'Network.loadingFinished' and parameters.get('requestId') in self._pending:
+				response = self._pending.pop(parameters['requestId'])
+				try:
+					result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': parameters['requestId']})
+				except Exception as e:
+					# The body is discarded by the browser when the page navigates away
+					note_failure(e)
+					print(f"An error occurred reading the response of '{response.get('url')}': {e}")
+					continue
+				body = base64.b64decode(result['body']).decode('utf-8', 'replace') if result.get('base64Encoded') else result['body']
+				new_responses.append(self._response(response.get('url'), response.get('status'), response.get('mimeType'), body))
+
+			elif method == 'Network.loadingFailed':
+				self._pending.pop(parameters.get('requestId'), None)
+
+		return new_responses
+
+
+	def _poll_hook(self) -> list:
+		"""
+		Reads the responses kept by the hook in the current page, installing it if the page is new.
+		"""
+
+		script = drain_script if self._preload_script is not None else f"{self._hook_call}; {drain_script}"
+		return [
+			self._response(captured['url'], captured['status'], captured['mime_type'], captured['body'])
+			for captured in self.driver.execute_script(script) or []
+			if self._accepts(captured['url'], captured['mime_type'])
+		]
+
+
+	@instrumented(failure_results=(None,))
+	def poll(self) -> list | None:
+		"""
+		Reads the responses received since the last read.
+
+		@return The list of the new responses, dictionaries with the 'url', 'status', 'mime_type', 'body' (text) and
+			'json' (the parsed body, None if it is not JSON). None if they could not be read.
+		"""
+
+		if not self.started:
+			raise Exception("The network capture is not started")
+
+		with self._lock:
+			try:
+				new_responses = self._poll_log() if self.method == 'cdp' else self._poll_hook()
+			except Exception as e:
+				note_failure(e)
+				print(f"An error occurred reading the network responses: {e}")
+				return None
+			self._responses.extend(new_responses)
+			return new_responses
+
+
+	def responses(self, url_pattern: str = None) -> list:
+		"""
+		Reads the new responses and returns all the responses captured.
+
+		@param url_pattern Optional URL pattern (with '*' wildcards) of the returned responses.
+		@return The list of responses, see 'poll'.
+		"""
+
+		if self.started:
+			self.poll()
+		with self._lock:
+			return [response for response in self._responses if url_pattern is None or fnmatch.fnmatchcase(response['url'], url_pattern)]
+
+
+	def json_payloads(self, url_pattern: str = None) -> list:
+		"""
+		Reads the new responses and returns the parsed JSON of all the responses captured.
+
+		@param url_pattern Optional URL pattern (with '*' wildcards) of the returned responses.
+		@return The list of the parsed bodies which are JSON, in the order they were received.
+		"""
+
+		return [response['json'] for response in self.responses(url_pattern) if response['json'] is not None]
+
+
+	@instrumented()
+	def wait_for(self, url_pattern: str = None, count: int = 1, timeout: float = DEFAULT_WAIT_TIMEOUT,
+			poll_frequency: float = DEFAULT_POLL_FREQUENCY) -> list:
+		"""
+		Waits until some responses are captured.
+
+		@param url_pattern Optional URL pattern (with '*' wildcards) of the awaited responses.
+		@param count The number of responses to wait for.
+		@param timeout The maximum time in seconds to wait.
+		@param poll_frequency The time in seconds between the reads.
+		@return The list of the captured responses which match the pattern, see 'poll'.
+		@throws TimeoutError If fewer responses are captured before the timeout.
+		"""
+
+		deadline = time.monotonic() + timeout
+		while True:
+			responses = self.responses(url_pattern)
+			if len(responses) >= count:
+				return responses
+			if time.monotonic() >= deadline:
+				raise TimeoutError(f"Only {len(responses)} of {count} responses matching '{url_pattern or '*'}' were captured")
+			time.sleep(poll_frequency)
+
+
+	def clear(self):
+		"""
+		Discards the responses captured so far.
+		"""
+
+		with self._lock:
+			self._responses = []
+
+
+
+def capture_json_from_url(driver, url: str, url_patterns: list, count: int = 1, timeout: float = DEFAULT_WAIT_TIMEOUT,
+		**login_arguments) -> list:
+	"""
+	Loads a URL and returns the JSON responses received by the page, e.g. the results of a search.
+
+	With the 'hook' method the calls made while the page loads are only captured if BiDi is enabled in the driver.
+
+	@param driver A Selenium WebDriver instance, e.g. from 'create_browser_connection(..., capture_network=True)'.
+	@param url The URL to load.
+	@param url_patterns The URL patterns (with '*' wildcards) of the JSON calls of the page.
+	@param count The number of responses to wait for.
+	@param timeout The maximum time in seconds to wait for the responses.
+	@param login_arguments Other arguments of 'login_to_url', e.g. 'needs_credentials' or 'session_store'.
+	@return The list of the parsed JSON payloads.
+	@throws TimeoutError If fewer responses are captured before the timeout.
+	"""
+
+	with NetworkCapture(driver, url_patterns) as capture:
+		browser_ws.login_to_url(driver, url, **login_arguments)
+		return [response['json'] for response in capture.wait_for(count=count, timeout=timeout) if response['json'] is not None]
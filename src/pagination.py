@@ -0,0 +1,184 @@
+"""
+@file src/pagination.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Harvester of the links of paginated results, which follows the 'next' button page by page
+
+The links are yielded as a generator and deduplicated with a set or a persistent key store, so the memory stays
+flat and the results can be written page by page.
+"""
+
+
+import os
+import csv
+import sqlite3
+
+import src.browser_web_scrapping as browser_ws
+
+
+# Default locators of the NGA search results
+DEFAULT_LINKS_SCHEMA = {'links': {'type': 'tag name', 'locator': 'a', 'field': 'attribute', 'attribute': 'href', 'many': True}}
+DEFAULT_NEXT_LOCATOR = ('class name', 'results-next')
+
+
+
+class SqliteKeySet:
+	"""
+	Set of keys stored in SQLite, used to deduplicate the links across runs of a harvest.
+
+	It supports 'in' and 'add' like a Python set, the added keys are persisted when 'flush' is called.
+	"""
+
+	def __init__(self, path: str):
+		"""
+		Opens (or creates) the key store.
+
+		@param path The path of the SQLite database.
+		"""
+
+		self.connection = sqlite3.connect(path)
+		self.connection.execute("CREATE TABLE IF NOT EXISTS keys (key TEXT PRIMARY KEY)")
+		self.connection.commit()
+
+
+	def __contains__(self, key: str) -> bool:
+		return self.connection.execute("SELECT 1 FROM keys WHERE key = ?", (key,)).fetchone() is not None
+
+
+	def __len__(self) -> int:
+		return self.connection.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+
+
+	def add(self, key: str):
+		self.connection.execute("INSERT OR IGNORE INTO keys (key) VALUES (?)", (key,))
+
+
+	def flush(self):
+		"""
+		Persists the keys added since the last flush.
+		"""
+
+		self.connection.commit()
+
+
+	def close(self):
+		self.connection.commit()
+		self.connection.close()
+
+
+
+def iter_paginated_pages(driver, links_schema: dict = None, link_filter = None, key_function = None,
+		next_locator: tuple = DEFAULT_NEXT_LOCATOR, seen = None, max_pages: int = None, page_ready = None,
+		timeout: float = browser_ws.DEFAULT_WAIT_TIMEOUT):
+	"""
+	Reads the links of the current page, clicks the 'next' element and repeats until there is no next page.
+
+	@param driver A Selenium WebDriver instance, already in the first page of results.
+	@param links_schema Extraction schema with a single 'many' attribute spec, defaults to the 'href' of all 'a' tags.
+	@param link_filter Optional function which returns True for the links to keep.
+	@param key_function Function which gives the deduplication key of a link, defaults to the link itself.
+	@param next_locator The (type_element, element) locator of the element which goes to the next page.
+	@param seen The keys already harvested, a set or a 'SqliteKeySet', it is updated with the new keys.
+	@param max_pages Optional maximum number of pages to read.
+	@param page_ready Condition which holds once a new page is ready, defaults to document_ready().
+	@param timeout The maximum time in seconds to wait for each page.
+	@return A generator of tuples (page_url, records), each record is a dictionary with the keys 'key', 'link',
+		'page' and 'position'.
+	"""
+
+	links_schema = DEFAULT_LINKS_SCHEMA if links_schema is None else links_schema
+	key_function = (lambda link: link) if key_function is None else key_function
+	page_ready = browser_ws.document_ready() if page_ready is None else page_ready
+	seen = set() if seen is None else seen
+	links_name = next(iter(links_schema))
+
+	page_count = 0
+	while True:
+		page_url = driver.current_url
+		links = browser_ws.extract_elements_in_driver(driver, links_schema)[links_name]
+
+		records = []
+		for link in links:
+			if link is None or (link_filter is not None and not link_filter(link)):
+				continue
+
+			key = key_function(link)
+			if key in seen:
+				continue
+
+			seen.add(key)
+			records.append({'key': key, 'link': link, 'page': page_url, 'position': len(records)})
+
+		yield page_url, records
+
+		page_count += 1
+		if max_pages is not None and page_count >= max_pages:
+			break
+
+		# Go to the next page if there is one, the page changed when the URL changes or the element is detached
+		next_elements = driver.find_elements(*next_locator)
+		if len(next_elements) == 0:
+			break
+
+		url_changed = browser_ws.url_changes(page_url)
+		element_detached = browser_ws.element_stale(next_elements[0])
+		page_changed = lambda driver: url_changed(driver) or element_detached(driver)
+		if not browser_ws.click_element_in_driver(next_elements[0], need_scroll=True, driver=driver,
+				wait_condition=page_changed, timeout=timeout):
+			raise Exception(f"An error occurred going to the next page from '{page_url}'")
+
+		browser_ws.wait_for_condition(driver, page_ready, timeout)
+
+
+def harvest_paginated_links(driver, **kwargs):
+	"""
+	Same as 'iter_paginated_pages' but yields the records one by one.
+
+	@param driver A Selenium WebDriver instance, already in the first page of results.
+	@param kwargs The arguments of 'iter_paginated_pages'.
+	@return A generator of records with the keys 'key', 'link', 'page' and 'position'.
+	"""
+
+	for _, records in iter_paginated_pages(driver, **kwargs):
+		yield from records
+
+
+def harvest_links_to_csv(driver, csv_path: str, column_names: dict = None, delimiter: str = ',', **kwargs) -> int:
+	"""
+	Harvests the paginated links and appends them to a CSV, which is flushed to disk after each page.
+
+	If 'seen' is a persistent key store its keys are saved after the page is in the CSV, so a crash loses at most the
+	page in progress and the harvest can be run again to continue.
+
+	@param driver A Selenium WebDriver instance, already in the first page of results.
+	@param csv_path The path of the CSV, the header is written only if the file is new.
+	@param column_names Optional names of the CSV columns for the record keys 'key', 'link', 'page' and 'position'.
+	@param delimiter The delimiter of the CSV.
+	@param kwargs The arguments of 'iter_paginated_pages'.
+	@return The number of links written.
+	"""
+
+	column_names = {} if column_names is None else column_names
+	fields = ['key', 'link', 'position', 'page']
+	seen = kwargs.get('seen')
+
+	is_new = not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+	written = 0
+	with open(csv_path, 'a', newline='', encoding='utf-8') as file:
+		writer = csv.writer(file, delimiter=delimiter)
+		if is_new:
+			writer.writerow([column_names.get(field, field) for field in fields])
+
+		for page_url, records in iter_paginated_pages(driver, **kwargs):
+			writer.writerows([record[field] for field in fields] for record in records)
+			file.flush()
+			os.fsync(file.fileno())
+			written += len(records)
+
+			if hasattr(seen, 'flush'):
+				seen.flush()
+
+			print(f"{len(records)} new links in {page_url}")
+
+	return written
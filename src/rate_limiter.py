@@ -0,0 +1,402 @@
+"""
+@file src/rate_limiter.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Per-host adaptive rate limiter and retry policy with jittered exponential backoff
+
+Each host has a token bucket (requests per second) and a concurrency limit. Both grow additively while the host answers
+well and are cut multiplicatively (AIMD) when it returns errors or 429/503, or when its latency grows well above the
+lowest latency observed, so the crawl runs at the fastest rate the host tolerates without manual tuning.
+"""
+
+
+import time
+import random
+import weakref
+import threading
+from contextlib import contextmanager
+
+from src.instrumentation import url_host
+
+
+# HTTP status codes which mean the host is overloaded
+congestion_statuses = (429, 503)
+
+
+
+def _host(url_or_host: str) -> str:
+	return url_host(url_or_host) if '://' in url_or_host else url_or_host
+
+
+def retry_after_seconds(response) -> float | None:
+	"""
+	Reads the 'Retry-After' header (in seconds) of an HTTP response.
+
+	@param response The response, e.g. a requests Response or the 'response' of a requests HTTPError.
+	@return The seconds to wait, or None if the response has no such header.
+	"""
+
+	headers = getattr(response, 'headers', None) or {}
+	try:
+		return max(0.0, float(headers.get('Retry-After')))
+	except (TypeError, ValueError):
+		return None
+
+
+
+class _HostState:
+	"""
+	Token bucket, concurrency limit and latency of a host.
+	"""
+
+	def __init__(self, rate: float, burst: float, concurrency: float):
+		self.rate = rate
+		self.burst = burst
+		self.tokens = burst
+		self.updated = time.monotonic()
+		self.concurrency = concurrency
+		self.in_flight = 0
+		self.successes = 0
+		self.errors = 0
+		self.latency = None
+		self.base_latency = None
+		self.samples = 0
+		self.paused_until = 0.0
+		self.last_decrease = 0.0
+
+
+	def refill(self, now: float):
+		self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+
+
+class _Ticket:
+	"""
+	Permission to send a request to a host, given back to the limiter with the outcome of the request.
+	"""
+
+	def __init__(self, host: str, cost: float):
+		self.host = host
+		self.cost = cost
+		self.start = time.monotonic()
+		self.status = None
+		self.latency = None
+
+
+	def mark_response(self, status: int):
+		"""
+		Records the status and the latency of the request when the headers of its response arrive.
+
+		@param status The HTTP status of the response.
+		"""
+
+		self.status = status
+		self.latency = time.monotonic() - self.start
+
+
+
+class RateLimiter:
+	"""
+	Adaptive rate limiter shared by the helpers which send requests to the hosts, safe to share between threads.
+	"""
+
+	def __init__(self, initial_rate: float = 1.0, min_rate: float = 0.1, max_rate: float = 20.0, burst: float = 1.0,
+			increase: float = 0.1, decrease: float = 0.5, initial_concurrency: int = 2, max_concurrency: int = 8,
+			latency_factor: float = 3.0, min_samples: int = 5):
+		"""
+		@param initial_rate The requests per second of a new host.
+		@param min_rate The lowest rate after the decreases.
+		@param max_rate The highest rate after the increases.
+		@param burst The number of requests which can be sent at once after an idle time.
+		@param increase The requests per second added after each successful request.
+		@param decrease The factor applied to the rate and the concurrency when the host is overloaded.
+		@param initial_concurrency The simultaneous requests of a new host.
+		@param max_concurrency The highest number of simultaneous requests.
+		@param latency_factor A latency this number of times the lowest observed one means the host is overloaded.
+		@param min_samples The number of requests of a host before its latency is used.
+		"""
+
+		if not 0 < decrease < 1:
+			raise ValueError(f"The decrease factor must be between 0 and 1, got {decrease}")
+		if not 0 < min_rate <= initial_rate <= max_rate:
+			raise ValueError(f"The rates must be 0 < min_rate <= initial_rate <= max_rate")
+
+		self.initial_rate = initial_rate
+		self.min_rate = min_rate
+		self.max_rate = max_rate
+		self.burst = burst
+		self.increase = increase
+		self.decrease = decrease
+		self.initial_concurrency = initial_concurrency
+		self.max_concurrency = max_concurrency
+		self.latency_factor = latency_factor
+		self.min_samples = min_samples
+
+		self._condition = threading.Condition()
+		self._hosts = {}
+		self._driver_hosts = weakref.WeakKeyDictionary()
+
+
+	def _state(self, host: str) -> _HostState:
+		if host not in self._hosts:
+			self._hosts[host] = _HostState(self.initial_rate, self.burst, self.initial_concurrency)
+		return self._hosts[host]
+
+
+	def _take(self, state: _HostState, cost: float, now: float) -> float | None:
+		"""
+		Takes the tokens and the concurrency slot if they are available.
+
+		@return 0 if they were taken, otherwise the time in seconds to wait (None to wait for a release).
+		"""
+
+		state.refill(now)
+		if now < state.paused_until:
+			return state.paused_until - now
+		if cost > 0 and state.in_flight >= int(state.concurrency):
+			return None
+		if state.tokens < cost:
+			return (cost - state.tokens) / state.rate
+
+		state.tokens -= cost
+		if cost > 0:
+			state.in_flight += 1
+		return 0
+
+
+	def try_acquire(self, url_or_host: str, cost: float = 1) -> _Ticket | None:
+		"""
+		Takes the permission to send a request if it is available now.
+
+		@param url_or_host The URL of the request or its host.
+		@param cost The tokens of the request, 0 only waits the pauses of the host.
+		@return The ticket to give back with 'release', or None if the request must wait.
+		"""
+
+		host = _host(url_or_host)
+		with self._condition:
+			if self._take(self._state(host), cost, time.monotonic()) == 0:
+				return _Ticket(host, cost)
+		return None
+
+
+	def acquire(self, url_or_host: str, cost: float = 1, timeout: float = None) -> _Ticket:
+		"""
+		Waits for the permission to send a request.
+
+		@param url_or_host The URL of the request or its host.
+		@param cost The tokens of the request, 0 only waits the pauses of the host.
+		@param timeout The maximum time in seconds to wait, None to wait without limit.
+		@return The ticket to give back with 'release'.
+		@throws TimeoutError If the permission is not given before the timeout.
+		"""
+
+		host = _host(url_or_host)
+		deadline = None if timeout is None else time.monotonic() + timeout
+		with self._condition:
+			state = self._state(host)
+			while True:
+				now = time.monotonic()
+				wait = self._take(state, cost, now)
+				if wait == 0:
+					return _Ticket(host, cost)
+
+				if deadline is not None:
+					remaining = deadline - now
+					if remaining <= 0:
+						raise TimeoutError(f"The rate limiter did not allow a request to '{host}' in {timeout} seconds")
+					wait = remaining if wait is None else min(wait, remaining)
+				self._condition.wait(wait)
+
+
+	def _decrease(self, state: _HostState, now: float):
+		# Only one decrease per round trip, the errors of the requests sent at the same time are a single signal
+		if now - state.last_decrease < max(state.latency or 0, 1 / state.rate):
+			return
+		state.last_decrease = now
+		state.rate = max(self.min_rate, state.rate * self.decrease)
+		state.concurrency = max(1, state.concurrency * self.decrease)
+		state.tokens = min(state.tokens, 0)
+		state.successes = 0
+
+
+	def release(self, ticket: _Ticket, error: bool = False, status: int = None, feedback: bool = True):
+		"""
+		Gives back the permission of a request with its outcome, which adapts the rate and concurrency of the host.
+
+		@param ticket The ticket given by 'acquire'.
+		@param error Whether the request failed.
+		@param status The HTTP status of the response, if it is known.
+		@param feedback Whether the outcome adapts the host, e.g. False for a manual login.
+		"""
+
+		now = time.monotonic()
+		latency = now - ticket.start if ticket.latency is None else ticket.latency
+		status = ticket.status if status is None else status
+
+		with self._condition:
+			state = self._state(ticket.host)
+			if ticket.cost > 0:
+				state.in_flight -= 1
+
+			if feedback:
+				congested = error or status in congestion_statuses
+				if not congested:
+					state.samples += 1
+					state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+					state.base_latency = latency if state.base_latency is None else min(state.base_latency, latency)
+					congested = state.samples >= self.min_samples and \
+						state.latency > self.latency_factor * max(state.base_latency, 0.001)
+
+				if congested:
+					state.errors += 1
+					self._decrease(state, now)
+				else:
+					state.rate = min(self.max_rate, state.rate + self.increase)
+					state.successes += 1
+					if state.successes >= state.concurrency:
+						state.concurrency = min(self.max_concurrency, state.concurrency + 1)
+						state.successes = 0
+
+			self._condition.notify_all()
+
+
+	@contextmanager
+	def slot(self, url_or_host: str, cost: float = 1, feedback: bool = True):
+		"""
+		Context manager which acquires the permission of a request and releases it with the outcome of the block.
+
+		An exception in the block is an error of the request, the block can set 'ticket.status' to the HTTP status and
+		'ticket.latency' to the response time, e.g. with 'ticket.mark_response', when the block goes on reading the body.
+
+		@param url_or_host The URL of the request or its host.
+		@param cost The tokens of the request, 0 only waits the pauses of the host.
+		@param feedback Whether the outcome adapts the host.
+		@return The ticket of the request.
+		"""
+
+		ticket = self.acquire(url_or_host, cost)
+		try:
+			yield ticket
+		except BaseException:
+			self.release(ticket, error=True, feedback=feedback)
+			raise
+		self.release(ticket, feedback=feedback)
+
+
+	def pause(self, url_or_host: str, seconds: float):
+		"""
+		Stops the requests to a host for a time, e.g. the 'Retry-After' of a 429 response.
+
+		@param url_or_host The URL or the host.
+		@param seconds The time in seconds.
+		"""
+
+		with self._condition:
+			state = self._state(_host(url_or_host))
+			state.paused_until = max(state.paused_until, time.monotonic() + seconds)
+			self._condition.notify_all()
+
+
+	def bind(self, driver, url_or_host: str):
+		"""
+		Saves the host of the page opened in a driver, used by the helpers which act on the page.
+		"""
+
+		with self._condition:
+			self._driver_hosts[driver] = _host(url_or_host)
+
+
+	def host_of(self, driver) -> str | None:
+		with self._condition:
+			return self._driver_hosts.get(driver)
+
+
+	def get_state(self, url_or_host: str) -> dict:
+		"""
+		Gets the current limits of a host.
+
+		@return A dictionary with the rate, concurrency, requests in flight, latency, errors and pause.
+		"""
+
+		with self._condition:
+			state = self._state(_host(url_or_host))
+			return {
+				'rate': state.rate,
+				'concurrency': int(state.concurrency),
+				'in_flight': state.in_flight,
+				'latency': state.latency,
+				'base_latency': state.base_latency,
+				'errors': state.errors,
+				'paused_for': max(0.0, state.paused_until - time.monotonic())
+			}
+
+
+
+class RetryPolicy:
+	"""
+	Retries a function with exponential backoff and full jitter, honouring the 'Retry-After' of the responses.
+	"""
+
+	def __init__(self, max_attempts: int = 4, base_delay: float = 1.0, max_delay: float = 60.0,
+			retry_exceptions: tuple = (Exception,), retry_statuses: tuple = (408, 429, 500, 502, 503, 504)):
+		"""
+		@param max_attempts The total number of attempts, including the first one.
+		@param base_delay The upper bound in seconds of the first delay, it doubles after each attempt.
+		@param max_delay The highest upper bound in seconds of a delay.
+		@param retry_exceptions The exceptions which are retried.
+		@param retry_statuses The HTTP statuses which are retried, the errors with other statuses are raised.
+		"""
+
+		if max_attempts < 1:
+			raise ValueError(f"The number of attempts must be at least 1, got {max_attempts}")
+
+		self.max_attempts = max_attempts
+		self.base_delay = base_delay
+		self.max_delay = max_delay
+		self.retry_exceptions = retry_exceptions
+		self.retry_statuses = retry_statuses
+
+
+	def delay(self, attempt: int) -> float:
+		"""
+		Gets the random delay after a failed attempt.
+
+		@param attempt The number of the failed attempt, starting in 1.
+		@return The time in seconds.
+		"""
+
+		return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+	def should_retry(self, error: Exception, attempt: int) -> bool:
+		if attempt >= self.max_attempts or not isinstance(error, self.retry_exceptions):
+			return False
+
+		status = getattr(getattr(error, 'response', None), 'status_code', None)
+		return status is None or status in self.retry_statuses
+
+
+	def call(self, function, *args, **kwargs):
+		"""
+		Calls a function until it succeeds or the attempts are exhausted.
+
+		@param function The function.
+		@param args The positional arguments of the function.
+		@param kwargs The keyword arguments of the function.
+		@return The value returned by the function.
+		@throws Exception The error of the last attempt.
+		"""
+
+		attempt = 0
+		while True:
+			attempt += 1
+			try:
+				return function(*args, **kwargs)
+			except Exception as e:
+				if not self.should_retry(e, attempt):
+					raise
+				retry_after = retry_after_seconds(getattr(e, 'response', None))
+				time.sleep(max(self.delay(attempt), retry_after or 0))
@@ -0,0 +1,298 @@
+"""
+@file src/record_sink.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Buffered writer of the scrapped records in CSV, JSONL or Parquet files
+
+The scrappers push plain dictionaries, the sink keeps them in memory and writes them in batches to a file which is
+opened only once. A checkpoint flushes the batch and syncs the file to disk. The records can be written as they are
+(wide layout) or as one row per attribute (long layout), repeating the ID fields in each row.
+
+The records whose ID fields were already written can be skipped, and the file can be written in a temporary file which
+replaces it only when the sink is closed, so the readers never see a half written file.
+"""
+
+
+import os
+import csv
+import gzip
+import json
+
+
+formats = ['csv', 'jsonl', 'parquet']
+layouts = ['wide', 'long']
+
+# Format of the files by their extension, used when the format is not given
+format_extensions = {
+	'.csv': 'csv',
+	'.jsonl': 'jsonl',
+	'.parquet': 'parquet'
+}
+
+
+
+class RecordSink:
+	"""
+	Writes dictionaries to a file in batches.
+	"""
+
+	def __init__(self, path: str, format: str = None, layout: str = 'wide', id_fields: list = None,
+			fieldnames: list = None, batch_size: int = 500, compression: str = None, delimiter: str = ',',
+			attribute_field: str = 'Attribute', value_field: str = 'Value', deduplicate: bool = False,
+			atomic: bool = False):
+		"""
+		Opens the file, CSV and JSONL files are appended if they exist, Parquet files are always created again.
+
+		The columns of CSV and Parquet files are fixed by the first batch, a record with other fields is rejected.
+		The JSONL files have no columns, each line keeps the fields of its record.
+
+		@param path The path of the file.
+		@param format One of 'csv', 'jsonl' or 'parquet', by default it is taken from the extension of the path.
+		@param layout 'wide' writes each record as a row, 'long' writes a row per field not in 'id_fields'.
+		@param id_fields The fields repeated in each row of the long layout.
+		@param fieldnames The columns of the wide layout, by default the fields of the first batch.
+		@param batch_size The number of records kept in memory before writing them.
+		@param compression 'gzip' for CSV and JSONL, or a Parquet codec (e.g. 'snappy', 'zstd').
+		@param delimiter The delimiter of the CSV.
+		@param attribute_field The name of the attribute column in the long layout.
+		@param value_field The name of the value column in the long layout.
+		@param deduplicate Whether to skip the records whose 'id_fields' were already pushed or are in the file.
+		@param atomic Whether to write the file again in a temporary file which replaces it when the sink is closed.
+		"""
+
+		if format is None:
+			extension = os.path.splitext(path[:-3] if path.endswith('.gz') else path)[1]
+			if extension not in format_extensions:
+				raise ValueError(f"The format of '{path}' can not be taken from its extension, give one of {formats}")
+			format = format_extensions[extension]
+
+		if format not in formats:
+			raise ValueError(f"Format '{format}' not in available formats {formats}")
+		if layout not in layouts:
+			raise ValueError(f"Layout '{layout}' not in available layouts {layouts}")
+		if layout == 'long' and not id_fields:
+			raise ValueError("The long layout needs the ID fields of the records")
+		if deduplicate and not id_fields:
+			raise ValueError("The deduplication needs the ID fields of the records")
+		if format != 'parquet' and compression not in (None, 'gzip'):
+			raise ValueError(f"Compression '{compression}' not available for {format}, only 'gzip'")
+
+		self.path = path
+		self.format = format
+		self.layout = layout
+		self.id_fields = list(id_fields or [])
+		self.batch_size = batch_size
+		self.compression = compression
+		self.delimiter = delimiter
+		self.attribute_field = attribute_field
+		self.value_field = value_field
+		self.deduplicate = deduplicate
+		self.atomic = atomic
+		self.rows_written = 0
+
+		self.fieldnames = list(fieldnames) if fieldnames is not None else None
+		if layout == 'long':
+			self.fieldnames = self.id_fields + [attribute_field, value_field]
+
+		self._buffer = []
+		self._writer = None
+		self._parquet_schema = None
+		self._written_ids = set()
+
+		# The temporary file is in the same folder, so replacing the file is a rename
+		folder, name = os.path.split(path)
+		self._write_path = os.path.join(folder, f".{name}.tmp") if atomic else path
+
+		if format == 'parquet':
+			try:
+				import pyarrow
+				import pyarrow.parquet
+			except ImportError:
+				raise ImportError("The package 'pyarrow' is required to write Parquet files")
+			self._file = open(self._write_path, 'wb')
+			self._is_new = True
+		else:
+			mode = 'w' if atomic else 'a'
+			self._is_new = atomic or not os.path.exists(path) or os.path.getsize(path) == 0
+			if deduplicate and not self._is_new:
+				self._written_ids.update(self._read_ids())
+			if compression == 'gzip':
+				self._file = gzip.open(self._write_path, f"{mode}t", encoding='utf-8', newline='')
+			else:
+				self._file = open(self._write_path, mode, encoding='utf-8', newline='')
+
+
+	def _record_id(self, record: dict) -> tuple:
+		# The values read from a CSV are strings, the IDs are compared as they are written
+		return tuple('' if record.get(field) is None else str(record.get(field)) for field in self.id_fields)
+
+
+	def _read_ids(self):
+		"""
+		Reads the IDs of the records already in the file which is appended.
+
+		@return A generator of the IDs, a tuple of the values of 'id_fields'.
+		"""
+
+		opener = gzip.open if self.compression == 'gzip' else open
+		with opener(self.path, 'rt', encoding='utf-8', newline='') as file:
+			if self.format == 'csv':
+				rows = csv.DictReader(file, delimiter=self.delimiter)
+			else:
+				rows = (json.loads(line) for line in file if line.strip())
+			for row in rows:
+				yield self._record_id(row)
+
+
+	def _rows(self, record: dict) -> list:
+		"""
+		Converts a record to the rows of the layout.
+
+		@param record The dictionary pushed by the scrapper.
+		@return The list of rows.
+		"""
+
+		if self.layout == 'wide':
+			return [record]
+
+		ids = {field: record.get(field) for field in self.id_fields}
+		return [
+			{**ids, self.attribute_field: attribute, self.value_field: value}
+			for attribute, value in record.items() if attribute not in ids
+		]
+
+
+	def push(self, record: dict) -> bool:
+		"""
+		Adds a record to the batch, the batch is written when it is full.
+
+		@param record The dictionary with the scrapped fields.
+		@return False if the record was skipped because its ID was already written.
+		@throws ValueError If the columns of the CSV or Parquet file are fixed and the record has other fields, the
+			record is not added and the batch is kept.
+		"""
+
+		if self.deduplicate:
+			record_id = self._record_id(record)
+			if record_id in self._written_ids:
+				return False
+
+		rows = self._rows(record)
+		if self.format != 'jsonl' and self.fieldnames is not None:
+			unknown_fields = {field for row in rows for field in row} - set(self.fieldnames)
+			if unknown_fields:
+				raise ValueError(f"The fields {sorted(unknown_fields)} are not columns of '{self.path}'")
+
+		if self.deduplicate:
+			self._written_ids.add(record_id)
+		self._buffer.extend(rows)
+		if len(self._buffer) >= self.batch_size:
+			self.flush()
+		return True
+
+
+	def push_many(self, records):
+		for record in records:
+			self.push(record)
+
+
+	def _write_csv(self, rows: list):
+		if self._writer is None:
+			self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, delimiter=self.delimiter)
+			if self._is_new:
+				self._writer.writeheader()
+		self._writer.writerows(rows)
+
+
+	def _write_jsonl(self, rows: list):
+		self._file.writelines(json.dumps(row, ensure_ascii=False, default=str) + '\n' for row in rows)
+
+
+	def _write_parquet(self, rows: list):
+		import pyarrow
+		import pyarrow.parquet
+
+		if self._writer is None:
+			table = pyarrow.Table.from_pylist(rows)
+			table = table.select(self.fieldnames)
+			self._parquet_schema = table.schema
+			self._writer = pyarrow.parquet.ParquetWriter(self._file, self._parquet_schema, compression=self.compression or 'snappy')
+		else:
+			table = pyarrow.Table.from_pylist(rows, schema=self._parquet_schema)
+
+		self._writer.write_table(table)
+
+
+	def flush(self):
+		"""
+		Writes the records of the batch to the file.
+		"""
+
+		if not self._buffer:
+			return
+
+		# The records are checked when they are pushed, the first batch fixes the columns of CSV and Parquet files
+		rows = self._buffer
+		if self.fieldnames is None and self.format != 'jsonl':
+			self.fieldnames = list(dict.fromkeys(field for row in rows for field in row))
+
+		if self.format == 'csv':
+			self._write_csv(rows)
+		elif self.format == 'jsonl':
+			self._write_jsonl(rows)
+		else:
+			self._write_parquet(rows)
+
+		self.rows_written += len(rows)
+		self._buffer = []
+
+
+	def checkpoint(self):
+		"""
+		Writes the batch and syncs the file to disk, after it the pushed records survive a crash.
+
+		The Parquet files are readable only after 'close', which writes their footer.
+		"""
+
+		self.flush()
+		self._file.flush()
+		if self.compression == 'gzip' and self.format != 'parquet':
+			os.fsync(self._file.buffer.fileobj.fileno())
+		else:
+			os.fsync(self._file.fileno())
+
+
+	def close(self, replace: bool = True):
+		"""
+		Writes the pending records and closes the file.
+
+		@param replace Whether the temporary file of an atomic sink replaces the file, otherwise it is removed and the
+			previous file is kept.
+		"""
+
+		if self._file.closed:
+			return
+
+		try:
+			if replace or not self.atomic:
+				self.checkpoint()
+			if self.format == 'parquet' and self._writer is not None:
+				self._writer.close()
+		finally:
+			self._file.close()
+
+		if self.atomic:
+			if replace:
+				os.replace(self._write_path, self.path)
+			else:
+				os.remove(self._write_path)
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		# An atomic sink left by an exception does not replace the file with a partial one
+		self.close(replace=exc_type is None)
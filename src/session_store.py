@@ -0,0 +1,283 @@
+"""
+@file src/session_store.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Persistent store of the authenticated sessions (cookies and localStorage) of each origin
+
+After a successful login the cookies and the localStorage of the origin are saved in a JSON file of the store folder,
+with the time the session expires. A new driver restores them before its first navigation to the origin, so the pooled
+and restarted workers start already logged in without a manual login.
+
+The files contain the session credentials, they are written only readable by the user.
+"""
+
+
+import os
+import json
+import time
+import hashlib
+import weakref
+import threading
+from urllib.parse import urlparse
+
+from src.browser_web_scrapping.element_cache import invalidate_element_cache
+
+
+# Maximum age in seconds of a saved session, when its cookies do not tell a shorter one
+DEFAULT_SESSION_MAX_AGE = 8 * 3600
+
+# Page of the origin opened to set its cookies and localStorage when DevTools can not set them, usually small
+DEFAULT_RESTORE_PATH = '/favicon.ico'
+
+# Keys of the cookies accepted by 'add_cookie' and by the DevTools command 'Network.setCookie'
+cookie_keys = ['name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite', 'expiry']
+
+# Scripts which read and write the localStorage of the current page
+read_storage_script = """
+var items = {};
+for (var i = 0; i < window.localStorage.length; i++) {
+	var key = window.localStorage.key(i);
+	items[key] = window.localStorage.getItem(key);
+}
+return items;
+"""
+write_storage_script = "var items = arguments[0]; for (var key in items) { window.localStorage.setItem(key, items[key]); }"
+
+
+
+def origin_of(url: str) -> str:
+	"""
+	Gets the origin (scheme, host and port) of a URL.
+
+	@param url The URL.
+	@return The origin, e.g. 'https://basename.sharepoint.com'.
+	"""
+
+	parsed = urlparse(url)
+	if not parsed.scheme or not parsed.netloc:
+		raise ValueError(f"The URL '{url}' has no origin")
+	return f"{parsed.scheme}://{parsed.netloc}".lower()
+
+
+
+class SessionStore:
+	"""
+	Folder with a saved session per origin, safe to share between threads and processes.
+	"""
+
+	def __init__(self, folder: str, max_age: float = DEFAULT_SESSION_MAX_AGE, auth_cookies: list = None,
+			restore_path: str = DEFAULT_RESTORE_PATH):
+		"""
+		@param folder The folder of the session files, it is created if it does not exist.
+		@param max_age The maximum age in seconds of a saved session.
+		@param auth_cookies Optional names of the cookies of the login, the session expires with the first of them.
+			By default it expires after 'max_age', the other cookies may belong to analytics and expire sooner.
+		@param restore_path The path of the page of the origin opened to restore a session without DevTools.
+		"""
+
+		self.folder = folder
+		self.max_age = max_age
+		self.auth_cookies = auth_cookies
+		self.restore_path = restore_path
+		os.makedirs(folder, exist_ok=True)
+
+		self._lock = threading.Lock()
+		self._restored = weakref.WeakKeyDictionary()
+
+
+	def __getstate__(self) -> dict:
+		# The restored origins belong to the drivers of this process
+		state = dict(self.__dict__)
+		del state['_lock'], state['_restored']
+		return state
+
+
+	def __setstate__(self, state: dict):
+		self.__dict__.update(state)
+		self._lock = threading.Lock()
+		self._restored = weakref.WeakKeyDictionary()
+
+
+	def _path(self, origin: str) -> str:
+		host = urlparse(origin).hostname or 'origin'
+		return os.path.join(self.folder, f"{host}.{hashlib.sha1(origin.encode()).hexdigest()[:8]}.json")
+
+
+	def load(self, url: str) -> dict | None:
+		"""
+		Reads the saved session of the origin of a URL.
+
+		@param url A URL of the origin.
+		@return The session with the keys 'origin', 'saved_at', 'expires_at', 'cookies' and 'local_storage', or None
+			if there is no session or it expired.
+		"""
+
+		try:
+			with open(self._path(origin_of(url)), encoding='utf-8') as file:
+				session = json.load(file)
+		except (OSError, json.JSONDecodeError):
+			return None
+
+		return session if session['expires_at'] > time.time() else None
+
+
+	def save(self, driver, url: str = None) -> dict:
+		"""
+		Saves the cookies and localStorage of the page opened in a driver, after a successful login.
+
+		@param driver A Selenium WebDriver instance, in a page of the origin.
+		@param url A URL of the origin, defaults to the current URL of the driver.
+		@return The saved session.
+		"""
+
+		origin = origin_of(driver.current_url if url is None else url)
+		now = time.time()
+
+		try:
+			cookies = [{key: cookie[key] for key in cookie_keys if key in cookie} for cookie in driver.get_cookies()]
+			local_storage = driver.execute_script(read_storage_script) or {}
+		except Exception as e:
+			raise Exception(f"An error occurred reading the session of '{origin}': {e}")
+
+		expires_at = now + self.max_age
+		if self.auth_cookies:
+			expiries = [cookie['expiry'] for cookie in cookies if cookie['name'] in self.auth_cookies and 'expiry' in cookie]
+			if expiries:
+				expires_at = min(expires_at, min(expiries))
+
+		session = {
+			'origin': origin,
+			'saved_at': now,
+			'expires_at': expires_at,
+			'cookies': cookies,
+			'local_storage': local_storage
+		}
+
+		# Written in a temporary file which replaces the previous session, readable only by the user
+		path = self._path(origin)
+		temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+		descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+		with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+			json.dump(session, file)
+		os.replace(temporary_path, path)
+
+		with self._lock:
+			self._restored.setdefault(driver, set()).add(origin)
+
+		return session
+
+
+	def restore(self, driver, url: str) -> bool:
+		"""
+		Sets the saved session of the origin of a URL in a driver, before navigating to the URL.
+
+		The cookies are set with DevTools (Chrome) without any navigation. Otherwise, or if the session has
+		localStorage, the driver opens the page 'restore_path' of the origin to set them.
+
+		@param driver A Selenium WebDriver instance.
+		@param url A URL of the origin.
+		@return True if a valid session was restored (or it was already restored in the driver), False otherwise.
+		"""
+
+		origin = origin_of(url)
+		if self.is_restored(driver, url):
+			return True
+
+		session = self.load(url)
+		if session is None:
+			return False
+
+		now = time.time()
+		cookies = [cookie for cookie in session['cookies'] if cookie.get('expiry', now + 1) > now]
+
+		try:
+			needs_page = bool(session['local_storage']) or not hasattr(driver, 'execute_cdp_cmd')
+			if needs_page:
+				invalidate_element_cache(driver)
+				driver.get(origin + self.restore_path)
+
+			if hasattr(driver, 'execute_cdp_cmd'):
+				driver.execute_cdp_cmd('Network.enable', {})
+				for cookie in cookies:
+					parameters = {key: value for key, value in cookie.items() if key != 'expiry'}
+					if 'expiry' in cookie:
+						parameters['expires'] = cookie['expiry']
+					driver.execute_cdp_cmd('Network.setCookie', {'url': origin, **parameters})
+			else:
+				for cookie in cookies:
+					driver.add_cookie(cookie)
+
+			if session['local_storage']:
+				driver.execute_script(write_storage_script, session['local_storage'])
+		except Exception as e:
+			print(f"An error occurred restoring the session of '{origin}': {e}")
+			return False
+
+		with self._lock:
+			self._restored.setdefault(driver, set()).add(origin)
+		return True
+
+
+	def accepted(self, driver, url: str) -> bool:
+		"""
+		Checks the server accepted the restored session of a page opened in a driver, which means it was not redirected
+		to a login page in another origin. A rejected session is removed from the store.
+
+		@param driver A Selenium WebDriver instance, after navigating to the URL.
+		@param url The URL which was opened.
+		@return True if the page stayed in the origin of the URL.
+		"""
+
+		try:
+			if origin_of(driver.current_url) == origin_of(url):
+				return True
+		except ValueError:
+			pass
+
+		self.clear(url)
+		with self._lock:
+			self._restored.get(driver, set()).discard(origin_of(url))
+		return False
+
+
+	def is_restored(self, driver, url: str) -> bool:
+		"""
+		Checks the session of the origin of a URL was restored or saved in a driver.
+		"""
+
+		with self._lock:
+			return origin_of(url) in self._restored.get(driver, ())
+
+
+	def clear(self, url: str):
+		"""
+		Removes the saved session of the origin of a URL, e.g. when the server rejected it.
+		"""
+
+		try:
+			os.remove(self._path(origin_of(url)))
+		except FileNotFoundError:
+			pass
+
+
+	def sessions(self) -> list:
+		"""
+		Lists the saved sessions which have not expired.
+
+		@return A list of dictionaries with the origin and the expiry time of each session.
+		"""
+
+		result = []
+		for name in sorted(os.listdir(self.folder)):
+			if not name.endswith('.json'):
+				continue
+			try:
+				with open(os.path.join(self.folder, name), encoding='utf-8') as file:
+					session = json.load(file)
+			except (OSError, json.JSONDecodeError):
+				continue
+			if session['expires_at'] > time.time():
+				result.append({'origin': session['origin'], 'expires_at': session['expires_at']})
+
+		return result
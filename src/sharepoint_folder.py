@@ -0,0 +1,383 @@
+"""
+@file src/sharepoint_folder.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Bulk download of the files of a SharePoint folder loading the folder view only once
+
+The rows of the folder are read in a single call to the browser per scroll of the list and parsed with lxml, then a
+filtered set of files is downloaded either by selecting their rows and clicking the download command (SharePoint
+sends a ZIP when several files are selected) or by downloading their direct URLs concurrently with HTTP.
+Each file is reported as completed when it is in the downloaded file (or in its ZIP).
+"""
+
+
+import os
+import re
+import zipfile
+import fnmatch
+from datetime import datetime
+from urllib.parse import urlparse, urljoin, parse_qs, quote, unquote
+
+import lxml.html
+
+import src.browser_web_scrapping as browser_ws
+import src.http_downloads as http_ws
+from src.browser_web_scrapping import By
+from src.download_watcher import DownloadWatcher
+from src.static_fetcher import extract_elements_in_document
+
+
+# Rows of the files in the list of the folder, the header row has no button
+DEFAULT_ROW_LOCATOR = "//div[@role='row'][.//button]"
+
+# Fields of a row, evaluated with lxml relative to the row; 'url' is optional, it is built from the folder otherwise
+default_row_schema = {
+	'key': {'type': By.XPATH, 'locator': '.', 'field': 'attribute', 'attribute': 'data-automationkey'},
+	'name': (By.XPATH, ".//button"),
+	'modified': {'type': By.XPATH, 'locator': ".//div[@data-automationkey='modified']//span", 'field': 'attribute',
+		'attribute': 'title'},
+	'url': {'type': By.XPATH, 'locator': ".//*[@data-file-url]", 'field': 'attribute', 'attribute': 'data-file-url'}
+}
+
+# Element of a row which selects it, and the download command once some rows are selected
+DEFAULT_SELECT_LOCATOR = ".//span[@role='checkbox']"
+DEFAULT_DOWNLOAD_LOCATOR = "//button[@data-automationid='downloadCommand' and @aria-disabled='false']"
+
+# Formats of the modification dates shown by SharePoint, in the 'title' of the modified column
+default_date_formats = ['%m/%d/%Y %I:%M %p', '%d/%m/%Y %H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S']
+
+
+
+def parse_modified(text: str, date_formats: list = None) -> datetime | None:
+	"""
+	Parses the modification date of a row.
+
+	@param text The date shown by SharePoint, e.g. '1/5/2025 10:00 AM'.
+	@param date_formats The accepted formats, defaults to 'default_date_formats'.
+	@return The date, None if it does not match any format.
+	"""
+
+	if not text:
+		return None
+
+	for date_format in default_date_formats if date_formats is None else date_formats:
+		try:
+			return datetime.strptime(text.strip(), date_format)
+		except ValueError:
+			continue
+	return None
+
+
+def file_url(folder_url: str, name: str) -> str:
+	"""
+	Builds the direct download URL of a file from the URL of its folder.
+
+	@param folder_url The URL of the folder view, either the folder path or 'AllItems.aspx?id=<folder path>'.
+	@param name The name of the file.
+	@return The URL of the file with 'download=1'.
+	"""
+
+	parsed = urlparse(folder_url)
+	folder_path = parse_qs(parsed.query).get('id', [None])[0]
+	if folder_path is None:
+		folder_path = unquote(parsed.path)
+	return f"{parsed.scheme}://{parsed.netloc}{quote(folder_path.rstrip('/') + '/' + name)}?download=1"
+
+
+def filter_files(files: list, pattern: str = None, regex: str = None, modified_since: datetime = None) -> list:
+	"""
+	Filters the files listed in a folder.
+
+	@param files The files given by 'SharePointFolder.list_files'.
+	@param pattern Optional glob of the names, e.g. '*.docx'.
+	@param regex Optional regular expression searched in the names.
+	@param modified_since Optional date, the files modified before it (or without a known date) are discarded.
+	@return The list of files which match all the given filters.
+	"""
+
+	compiled = re.compile(regex) if regex is not None else None
+
+	selected = []
+	for file in files:
+		if pattern is not None and not fnmatch.fnmatch(file['name'], pattern):
+			continue
+		if compiled is not None and compiled.search(file['name']) is None:
+			continue
+		if modified_since is not None and (file['modified'] is None or file['modified'] < modified_since):
+			continue
+		selected.append(file)
+
+	return selected
+
+
+
+class SharePointFolder:
+	"""
+	Folder view of a SharePoint document library opened in a driver.
+	"""
+
+	def __init__(self, driver, folder_url: str, row_locator: str = DEFAULT_ROW_LOCATOR, row_schema: dict = None,
+			select_locator: str = DEFAULT_SELECT_LOCATOR, download_locator: str = DEFAULT_DOWNLOAD_LOCATOR,
+			date_formats: list = None, timeout: float = browser_ws.DEFAULT_WAIT_TIMEOUT):
+		"""
+		@param driver A Selenium WebDriver instance, e.g. from 'create_browser_connection'.
+		@param folder_url The URL of the folder view.
+		@param row_locator The XPath of the rows of the files.
+		@param row_schema The extraction schema of a row, relative to it, see 'default_row_schema'.
+		@param select_locator The XPath of the element which selects a row, relative to the row.
+		@param download_locator The XPath of the download command.
+		@param date_formats The formats of the modification dates, see 'parse_modified'.
+		@param timeout The maximum time in seconds to wait for the elements.
+		"""
+
+		self.driver = driver
+		self.folder_url = folder_url
+		self.row_locator = row_locator
+		self.row_specs = browser_ws.normalize_extraction_schema(default_row_schema if row_schema is None else row_schema)
+		self.select_locator = select_locator
+		self.download_locator = download_locator
+		self.date_formats = date_formats
+		self.timeout = timeout
+
+
+	def open(self, needs_credentials: bool = False, session_store = None, rate_limiter = None):
+		"""
+		Loads the folder view and waits for its first row.
+
+		@param needs_credentials Whether to wait for a manual login, see 'login_to_url'.
+		@param session_store Optional SessionStore to skip the manual login.
+		@param rate_limiter Optional RateLimiter of the page load.
+		@return The SharePointFolder.
+		"""
+
+		browser_ws.login_to_url(self.driver, self.folder_url, needs_credentials=needs_credentials,
+			wait_condition=browser_ws.element_present(By.XPATH, self.row_locator), timeout=self.timeout,
+			session_store=session_store, rate_limiter=rate_limiter)
+		return self
+
+
+	def _read_rows(self) -> list:
+		"""
+		Reads the rows rendered in the list with a single call to the browser.
+		"""
+
+		schema = {'rows': {'type': By.XPATH, 'locator': self.row_locator, 'field': 'outerHTML', 'many': True}}
+		rows = []
+		for outer_html in browser_ws.extract_elements_in_driver(self.driver, schema)['rows']:
+			values = extract_elements_in_document(lxml.html.fragment_fromstring(outer_html), self.row_specs, self.folder_url)
+			if values.get('name'):
+				rows.append(values)
+		return rows
+
+
+	def _scroll_rows(self, towards_end: bool = True, scroll_timeout: float = 2) -> bool:
+		"""
+		Scrolls the last (or the first) rendered row into view and waits for the list to render other rows.
+
+		@param towards_end Whether to scroll towards the end of the list, otherwise towards its start.
+		@param scroll_timeout The maximum time in seconds to wait for the rows to change.
+		@return False if the rows did not change, the list is at its end (or start).
+		"""
+
+		from selenium.common.exceptions import TimeoutException
+
+		try:
+			rows = self.driver.find_elements(By.XPATH, self.row_locator)
+			if len(rows) == 0:
+				return False
+			edge_row = rows[-1] if towards_end else rows[0]
+			edge_text = edge_row.text
+			self.driver.execute_script(f"arguments[0].scrollIntoView({'true' if towards_end else 'false'});", edge_row)
+
+			# The list renders more rows or recycles the rendered ones for the next files
+			def rows_changed(driver) -> bool:
+				current = driver.find_elements(By.XPATH, self.row_locator)
+				if len(current) != len(rows):
+					return True
+				edge = current[-1] if towards_end else current[0]
+				return edge != edge_row or edge.text != edge_text
+
+			browser_ws.wait_for_condition(self.driver, rows_changed, scroll_timeout)
+			return True
+		except TimeoutException:
+			return False
+		except Exception as e:
+			print(f"An error occurred scrolling the list of '{self.folder_url}': {e}")
+			return False
+
+
+	def list_files(self, max_scrolls: int = 100, scroll_timeout: float = 2) -> list:
+		"""
+		Lists the files of the folder, scrolling the list until no new row is rendered.
+
+		SharePoint renders only the rows near the visible part of the list, so the last row is scrolled into view
+		while new rows appear.
+
+		@param max_scrolls The maximum number of scrolls.
+		@param scroll_timeout The maximum time in seconds to wait for the rows to change after a scroll, the list
+			ends when they do not change.
+		@return A list of dictionaries with the 'name', 'modified' (datetime or None), 'url' and 'key' of each file.
+		"""
+
+		files = {}
+		for scroll in range(max_scrolls + 1):
+			new_rows = 0
+			for row in self._read_rows():
+				if row['name'] in files:
+					continue
+				files[row['name']] = {
+					'name': row['name'],
+					'modified': parse_modified(row.get('modified'), self.date_formats),
+					'url': urljoin(self.folder_url, row['url']) if row.get('url') else file_url(self.folder_url, row['name']),
+					'key': row.get('key')
+				}
+				new_rows += 1
+
+			if new_rows == 0 or scroll == max_scrolls or not self._scroll_rows(True, scroll_timeout):
+				break
+
+		return list(files.values())
+
+
+	def _row_xpath(self, file: dict) -> str:
+		if file.get('key') is not None:
+			return f"{self.row_locator}[@data-automationkey={browser_ws.xpath_literal(file['key'])}]"
+		return f"{self.row_locator}[.//button[normalize-space(.)={browser_ws.xpath_literal(file['name'])}]]"
+
+
+	def _find_row(self, file: dict, max_scrolls: int = 100, scroll_timeout: float = 2):
+		"""
+		Finds the row of a file, scrolling the list towards its end and then towards its start until it is rendered.
+
+		@return The row element, None if it is not in the list.
+		"""
+
+		xpath = self._row_xpath(file)
+		for towards_end in (True, False):
+			for _ in range(max_scrolls + 1):
+				rows = self.driver.find_elements(By.XPATH, xpath)
+				if len(rows) > 0:
+					return rows[0]
+				if not self._scroll_rows(towards_end, scroll_timeout):
+					break
+		return None
+
+
+	def _select(self, files: list, max_scrolls: int = 100, scroll_timeout: float = 2) -> list:
+		"""
+		Clicks the selection element of the rows of the files, the rows which are not rendered are scrolled into view.
+
+		@return The list of the files whose row was selected.
+		"""
+
+		selected = []
+		for file in files:
+			row = self._find_row(file, max_scrolls, scroll_timeout)
+			if row is None:
+				print(f"The row of '{file['name']}' is not in the list of '{self.folder_url}'")
+				continue
+			checkbox = browser_ws.find_element_in_driver(row, By.XPATH, self.select_locator)
+			if checkbox is not None and browser_ws.click_element_in_driver(checkbox, need_scroll=True, driver=self.driver):
+				selected.append(file)
+		return selected
+
+
+	def download_selected(self, files: list, download_folder: str, batch_size: int = 100, timeout: float = 600,
+			on_complete = None, max_scrolls: int = 100, scroll_timeout: float = 2) -> dict:
+		"""
+		Downloads the files selecting their rows and clicking the download command, in batches.
+
+		@param files The files to download, from 'list_files' or 'filter_files'.
+		@param download_folder The download folder of the driver.
+		@param batch_size The maximum number of files selected for a download, SharePoint limits the size of the ZIP.
+		@param timeout The maximum time in seconds to wait for each download.
+		@param on_complete Optional function called as on_complete(name, path, error) when each file ends, the path
+			is the downloaded file or the ZIP which contains it.
+		@param max_scrolls The maximum number of scrolls to render the row of a file, see 'list_files'.
+		@param scroll_timeout The maximum time in seconds to wait for the rows to change after a scroll.
+		@return A dictionary from file name to the path, or to the exception if the file was not downloaded.
+		"""
+
+		results = {}
+
+		def complete(name, path, error):
+			results[name] = error if error is not None else path
+			if on_complete is not None:
+				on_complete(name, path, error)
+
+		for start in range(0, len(files), batch_size):
+			batch = files[start:start + batch_size]
+			try:
+				with DownloadWatcher(download_folder) as download_watcher:
+					selected = self._select(batch, max_scrolls, scroll_timeout)
+					if not selected:
+						raise Exception("No row of the batch could be selected")
+
+					button = browser_ws.find_element_in_driver(self.driver, By.XPATH, self.download_locator,
+						wait_condition='clickable', timeout=self.timeout)
+					if button is None or not browser_ws.click_element_in_driver(button):
+						raise Exception("The download command could not be clicked")
+					paths = download_watcher.wait(timeout=timeout)
+
+				# Unselect the rows for the next batch
+				self._select(selected, max_scrolls, scroll_timeout)
+			except Exception as e:
+				for file in batch:
+					complete(file['name'], None, e)
+				continue
+
+			contents = self._downloaded_names(paths)
+			for file in batch:
+				path = contents.get(file['name'])
+				if path is None:
+					complete(file['name'], None, FileNotFoundError(f"'{file['name']}' is not in the downloaded files {paths}"))
+				else:
+					complete(file['name'], path, None)
+
+		return results
+
+
+	def _downloaded_names(self, paths: list) -> dict:
+		"""
+		Maps the names of the files to the downloaded file which contains them, the file itself or a ZIP.
+		"""
+
+		contents = {}
+		for path in paths:
+			contents[os.path.basename(path)] = path
+			if zipfile.is_zipfile(path):
+				with zipfile.ZipFile(path) as archive:
+					for member in archive.namelist():
+						contents.setdefault(os.path.basename(member), path)
+		return contents
+
+
+	def download_direct(self, files: list, download_folder: str, max_workers: int = 4, on_complete = None,
+			rate_limiter = None, retry_policy = None) -> dict:
+		"""
+		Downloads the files with HTTP from their direct URLs, using the session of the driver.
+
+		@param files The files to download, from 'list_files' or 'filter_files'.
+		@param download_folder The folder where the files are saved.
+		@param max_workers The maximum number of simultaneous downloads.
+		@param on_complete Optional function called as on_complete(name, path, error) when each file ends.
+		@param rate_limiter Optional RateLimiter of the downloads.
+		@param retry_policy Optional RetryPolicy of each download.
+		@return A dictionary from file name to the path, or to the exception if the download failed.
+		"""
+
+		names = {file['url']: file['name'] for file in files}
+
+		def complete(url, path, error):
+			if on_complete is not None:
+				on_complete(names[url], path, error)
+
+		session = http_ws.session_from_driver(self.driver, pool_size=max_workers)
+		try:
+			results = http_ws.download_files(session, names, download_folder, max_workers=max_workers,
+				on_complete=complete, rate_limiter=rate_limiter, retry_policy=retry_policy)
+		finally:
+			session.close()
+
+		return {names[url]: result for url, result in results.items()}
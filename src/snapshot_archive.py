@@ -0,0 +1,553 @@
+"""
+@file src/snapshot_archive.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Compressed archive of the rendered pages, to extract their data again offline with other locators
+
+A SnapshotRecorder saves the DOM rendered by the browser (and the documents of its frames) in an append-only archive
+file, similar to WARC: each snapshot is a record with a small header and its compressed documents. The index of the
+records is kept in a sidecar file '<archive>.idx' and rebuilt from the headers if it is missing or behind the archive.
+The archive is read with mmap, so any snapshot is decompressed without reading the others.
+
+The recording is opt-in: attach a recorder to a driver and 'login_to_url' and TabMultiplexer save each page they
+load, or call 'record' after the clicks which display more content. When a locator turns out to be wrong, the data
+is extracted again from the archives in a process pool, without any browser nor network request:
+
+	python -m src.snapshot_archive extract dat/crawl/snapshots/*.wsa \
+		--schema examples.NGA.crawl_image_pages:page_schema --output dat/data_again.csv --workers 8
+
+An archive is written by a single process, the crawl runner gives one archive to each worker.
+"""
+
+
+import os
+import sys
+import glob
+import json
+import mmap
+import time
+import zlib
+import struct
+import fnmatch
+import weakref
+import argparse
+import threading
+
+from src.instrumentation import note_failure
+
+
+# Start of each record, and the format of the fixed part of its header: mark, header length and body length
+record_magic = b'WSA1'
+record_header = struct.Struct('<4sIQ')
+
+# Compression level of the documents, zlib levels from 1 (fastest) to 9 (smallest)
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Maximum depth of the frames saved by the recorder, e.g. the Word document in 'WacFrame_Word_0' has depth 1
+DEFAULT_MAX_FRAME_DEPTH = 3
+
+# Number of snapshots extracted by each task of the process pool
+DEFAULT_CHUNK_SIZE = 64
+
+# Recorders attached to the drivers
+_recorders = weakref.WeakKeyDictionary()
+_recorders_lock = threading.Lock()
+
+
+
+class SnapshotArchive:
+	"""
+	Append-only file of compressed page snapshots with an index, see the brief of the file.
+	"""
+
+	def __init__(self, path: str, compression_level: int = DEFAULT_COMPRESSION_LEVEL, read_only: bool = False):
+		"""
+		@param path The path of the archive, it is created if it does not exist (and not read only).
+		@param compression_level The zlib compression level of the new snapshots.
+		@param read_only Whether the archive is only read, e.g. by the offline extraction.
+		"""
+
+		self.path = path
+		self.index_path = f"{path}.idx"
+		self.compression_level = compression_level
+		self.read_only = read_only
+
+		self._lock = threading.Lock()
+		self._file = None
+		self._mapping = None
+		self._entries = []
+
+		if not read_only:
+			folder = os.path.dirname(os.path.abspath(path))
+			os.makedirs(folder, exist_ok=True)
+			self._file = open(path, 'ab')
+		elif not os.path.exists(path):
+			raise FileNotFoundError(f"The snapshot archive '{path}' does not exist")
+
+		self._load_index()
+
+
+	def __getstate__(self) -> dict:
+		# The processes open the archive again, only to read it
+		return {'path': self.path, 'compression_level': self.compression_level}
+
+
+	def __setstate__(self, state: dict):
+		self.__init__(state['path'], state['compression_level'], read_only=True)
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+
+	def __iter__(self):
+		for entry in list(self._entries):
+			yield self.read(entry)
+
+
+	def _load_index(self):
+		"""
+		Reads the index file and the headers of the records written after its last entry, e.g. after a crash.
+		"""
+
+		entries = []
+		rebuild = False
+		try:
+			with open(self.index_path, encoding='utf-8') as file:
+				for line in file:
+					try:
+						entries.append(json.loads(line))
+					except ValueError:
+						# The last line of a crash is incomplete, the index is written again
+						rebuild = True
+						break
+		except FileNotFoundError:
+			rebuild = True
+
+		size = os.path.getsize(self.path)
+		end = entries[-1]['offset'] + entries[-1]['length'] if entries else 0
+		if end > size:
+			# The index is from another archive
+			entries, end, rebuild = [], 0, True
+
+		missing = self._scan(end, size)
+		self._entries = entries + missing
+
+		if not self.read_only:
+			valid_end = self._entries[-1]['offset'] + self._entries[-1]['length'] if self._entries else 0
+			if valid_end < size:
+				# An incomplete record at the end is discarded, the next one starts at a valid offset
+				self._file.truncate(valid_end)
+			if rebuild or missing:
+				with open(self.index_path, 'w' if rebuild else 'a', encoding='utf-8') as file:
+					for entry in (self._entries if rebuild else missing):
+						file.write(json.dumps(entry) + '\n')
+
+
+	def _scan(self, start: int, size: int) -> list:
+		"""
+		Reads the headers of the records between two offsets of the archive.
+
+		@return The entries of the complete records.
+		"""
+
+		entries = []
+		if start >= size:
+			return entries
+
+		with open(self.path, 'rb') as file:
+			offset = start
+			while offset + record_header.size <= size:
+				file.seek(offset)
+				magic, header_length, body_length = record_header.unpack(file.read(record_header.size))
+				length = record_header.size + header_length + body_length
+				if magic != record_magic or offset + length > size:
+					break
+				header = json.loads(file.read(header_length))
+				entries.append({'url': header['url'], 'captured_at': header['captured_at'], 'offset': offset, 'length': length})
+				offset += length
+
+		return entries
+
+
+	def append(self, url: str, html: str, frames: list = None, final_url: str = None, captured_at: float = None) -> dict:
+		"""
+		Adds a snapshot at the end of the archive.
+
+		@param url The URL which was loaded.
+		@param html The HTML of the main document.
+		@param frames Optional list of the frame documents, dictionaries with the 'path' (list of frame indexes from the
+			main document), the 'url' (the 'src' of the iframe) and the 'html'.
+		@param final_url The URL of the document after the redirects, defaults to the URL.
+		@param captured_at The time of the snapshot, defaults to now.
+		@return The entry of the snapshot in the index.
+		"""
+
+		if self.read_only:
+			raise Exception(f"The snapshot archive '{self.path}' is read only")
+
+		captured_at = time.time() if captured_at is None else captured_at
+		body = zlib.compress(json.dumps({'html': html, 'frames': frames or []}).encode('utf-8'), self.compression_level)
+		header = json.dumps({
+			'url': url,
+			'final_url': final_url or url,
+			'captured_at': captured_at,
+			'frames': len(frames or []),
+			'codec': 'zlib'
+		}).encode('utf-8')
+
+		with self._lock:
+			offset = self._file.seek(0, os.SEEK_END)
+			self._file.write(record_header.pack(record_magic, len(header), len(body)))
+			self._file.write(header)
+			self._file.write(body)
+			self._file.flush()
+
+			entry = {'url': url, 'captured_at': captured_at, 'offset': offset,
+				'length': record_header.size + len(header) + len(body)}
+			with open(self.index_path, 'a', encoding='utf-8') as file:
+				file.write(json.dumps(entry) + '\n')
+			self._entries.append(entry)
+
+		return entry
+
+
+	def _view(self, end: int) -> mmap.mmap:
+		"""
+		Maps the archive in memory, again if it grew after the last mapping.
+		"""
+
+		if self._mapping is None or len(self._mapping) < end:
+			if self._mapping is not None:
+				self._mapping.close()
+			with open(self.path, 'rb') as file:
+				self._mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+		return self._mapping
+
+
+	def read(self, entry: dict) -> dict:
+		"""
+		Reads a snapshot of the archive.
+
+		@param entry The entry of the snapshot, from 'entries'.
+		@return The dictionary with the 'url', 'final_url', 'captured_at', 'html' and 'frames' of the snapshot.
+		"""
+
+		with self._lock:
+			view = self._view(entry['offset'] + entry['length'])
+			magic, header_length, body_length = record_header.unpack_from(view, entry['offset'])
+			if magic != record_magic:
+				raise Exception(f"No snapshot at the offset {entry['offset']} of '{self.path}'")
+			start = entry['offset'] + record_header.size
+			header = json.loads(view[start:start + header_length])
+			body = json.loads(zlib.decompress(view[start + header_length:start + header_length + body_length]))
+
+		return {'url': header['url'], 'final_url': header['final_url'], 'captured_at': header['captured_at'], **body}
+
+
+	def entries(self, url_pattern: str = None, latest_only: bool = False) -> list:
+		"""
+		Lists the snapshots of the archive.
+
+		@param url_pattern Optional URL pattern (with '*' wildcards) of the listed snapshots.
+		@param latest_only Whether to list only the last snapshot of each URL.
+		@return The list of entries, dictionaries with the 'url', 'captured_at', 'offset' and 'length'.
+		"""
+
+		with self._lock:
+			entries = [entry for entry in self._entries if url_pattern is None or fnmatch.fnmatchcase(entry['url'], url_pattern)]
+
+		if latest_only:
+			entries = list({entry['url']: entry for entry in entries}.values())
+		return entries
+
+
+	def latest(self, url: str) -> dict | None:
+		"""
+		Reads the last snapshot of a URL.
+
+		@return The snapshot, see 'read', None if the URL is not in the archive.
+		"""
+
+		entries = [entry for entry in self.entries() if entry['url'] == url]
+		return self.read(entries[-1]) if entries else None
+
+
+	def close(self):
+		with self._lock:
+			if self._mapping is not None:
+				self._mapping.close()
+				self._mapping = None
+			if self._file is not None:
+				self._file.close()
+				self._file = None
+
+
+
+class SnapshotRecorder:
+	"""
+	Saves the pages opened in the drivers in a SnapshotArchive.
+	"""
+
+	def __init__(self, archive: SnapshotArchive, include_frames: bool = True, max_frame_depth: int = DEFAULT_MAX_FRAME_DEPTH,
+			url_patterns: list = None):
+		"""
+		@param archive The archive of the snapshots.
+		@param include_frames Whether to save the documents of the frames.
+		@param max_frame_depth The maximum depth of the saved frames.
+		@param url_patterns Optional URL patterns (with '*' wildcards) of the recorded pages, by default all of them.
+		"""
+
+		self.archive = archive
+		self.include_frames = include_frames
+		self.max_frame_depth = max_frame_depth
+		self.url_patterns = url_patterns
+
+
+	def attach(self, driver):
+		"""
+		Records the pages loaded by 'login_to_url' and TabMultiplexer in a driver.
+
+		@return The SnapshotRecorder.
+		"""
+
+		with _recorders_lock:
+			_recorders[driver] = self
+		return self
+
+
+	def detach(self, driver):
+		with _recorders_lock:
+			if _recorders.get(driver) is self:
+				del _recorders[driver]
+
+
+	def _frames(self, driver, path: tuple) -> list:
+		"""
+		Reads the documents of the frames of the current document, and of their frames.
+		"""
+
+		if len(path) >= self.max_frame_depth:
+			return []
+
+		frames = []
+		for index, frame in enumerate(driver.find_elements('xpath', '//iframe | //frame')):
+			source = frame.get_attribute('src')
+			driver.switch_to.frame(frame)
+			try:
+				frames.append({'path': list(path + (index,)), 'url': source, 'html': driver.page_source})
+				frames.extend(self._frames(driver, path + (index,)))
+			finally:
+				driver.switch_to.parent_frame()
+
+		return frames
+
+
+	def record(self, driver, url: str = None) -> dict | None:
+		"""
+		Saves the page opened in a driver, it must be in the main document.
+
+		@param driver A Selenium WebDriver instance.
+		@param url The URL which was loaded, defaults to the current URL of the driver.
+		@return The entry of the snapshot in the archive, None if the page is not recorded or it failed.
+		"""
+
+		try:
+			final_url = driver.current_url
+			url = final_url if url is None else url
+			if self.url_patterns and not any(fnmatch.fnmatchcase(url, pattern) for pattern in self.url_patterns):
+				return None
+
+			html = driver.page_source
+			frames = self._frames(driver, ()) if self.include_frames else []
+			return self.archive.append(url, html, frames, final_url)
+		except Exception as e:
+			note_failure(e)
+			print(f"An error occurred recording the snapshot of '{url}': {e}")
+			return None
+
+
+
+def snapshot_recorder_of(driver) -> SnapshotRecorder | None:
+	"""
+	Gets the recorder attached to a driver.
+
+	@return The SnapshotRecorder, None if the pages of the driver are not recorded.
+	"""
+
+	try:
+		with _recorders_lock:
+			return _recorders.get(driver)
+	except TypeError:
+		return None
+
+
+def snapshot_document(snapshot: dict, frame: list = None) -> tuple:
+	"""
+	Gets a document of a snapshot.
+
+	@param snapshot The snapshot, see 'SnapshotArchive.read'.
+	@param frame Optional path of frame indexes, e.g. [0] for the first iframe of the main document.
+	@return The tuple (HTML, base URL) of the document, (None, None) if the frame was not saved.
+	"""
+
+	if not frame:
+		return snapshot['html'], snapshot['final_url']
+
+	for saved in snapshot['frames']:
+		if saved['path'] == list(frame):
+			return saved['html'], saved['url'] or snapshot['final_url']
+	return None, None
+
+
+# Archives opened by each process of the extraction, by path
+_worker_archives = {}
+
+
+def _extract_chunk(path: str, entries: list, specs: dict, frame: list = None) -> list:
+	"""
+	Extracts the data of some snapshots of an archive, in a process of the pool.
+
+	@return The list of tuples (url, values, error) of the snapshots.
+	"""
+
+	import lxml.html
+	from urllib.parse import urljoin
+	from src.static_fetcher import extract_elements_in_document
+
+	archive = _worker_archives.get(path)
+	if archive is None:
+		archive = _worker_archives[path] = SnapshotArchive(path, read_only=True)
+
+	results = []
+	for entry in entries:
+		try:
+			snapshot = archive.read(entry)
+			html, base_url = snapshot_document(snapshot, frame)
+			if html is None:
+				raise Exception(f"The frame {frame} is not in the snapshot of '{entry['url']}'")
+			root = lxml.html.document_fromstring(html)
+			results.append((entry['url'], extract_elements_in_document(root, specs, urljoin(snapshot['final_url'], base_url)), None))
+		except Exception as e:
+			results.append((entry['url'], None, e))
+
+	return results
+
+
+def extract_archives(paths: list, schema: dict, frame: list = None, url_pattern: str = None, latest_only: bool = True,
+		workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+	"""
+	Runs an extraction schema over the snapshots of some archives, without browser nor network.
+
+	@param paths The paths of the archives.
+	@param schema The dictionary of named locators, see 'browser_web_scrapping.normalize_extraction_schema'.
+	@param frame Optional path of frame indexes of the document where the schema is evaluated.
+	@param url_pattern Optional URL pattern (with '*' wildcards) of the extracted snapshots.
+	@param latest_only Whether to extract only the last snapshot of each URL in each archive.
+	@param workers The number of processes, by default the number of CPUs; 1 extracts in this process.
+	@param chunk_size The number of snapshots of each task.
+	@return A generator of tuples (url, values, exception or None), in the order the tasks finish.
+	"""
+
+	from src.browser_web_scrapping import normalize_extraction_schema
+
+	specs = normalize_extraction_schema(schema)
+	tasks = []
+	for path in paths:
+		with SnapshotArchive(path, read_only=True) as archive:
+			entries = archive.entries(url_pattern, latest_only)
+		tasks.extend((path, entries[start:start + chunk_size]) for start in range(0, len(entries), chunk_size))
+
+	workers = (os.cpu_count() or 1) if workers is None else workers
+	if workers <= 1 or len(tasks) <= 1:
+		for path, entries in tasks:
+			yield from _extract_chunk(path, entries, specs, frame)
+		return
+
+	import multiprocessing
+	from concurrent.futures import ProcessPoolExecutor, as_completed
+
+	# The workers are spawned like the crawl runner ones, they open each archive once
+	context = multiprocessing.get_context('spawn')
+	with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context) as executor:
+		futures = [executor.submit(_extract_chunk, path, entries, specs, frame) for path, entries in tasks]
+		for future in as_completed(futures):
+			yield from future.result()
+
+
+def expand_paths(patterns: list) -> list:
+	"""
+	Expands the wildcards of the archive paths, for the shells which do not expand them.
+	"""
+
+	paths = []
+	for pattern in patterns:
+		paths.extend(sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern])
+	return paths
+
+
+def main(argv: list = None):
+	parser = argparse.ArgumentParser(description="Lists the snapshot archives or extracts their data again offline")
+	subparsers = parser.add_subparsers(dest='command', required=True)
+
+	list_parser = subparsers.add_parser('list', help="List the snapshots of the archives")
+	list_parser.add_argument('archives', nargs='+', help="Paths of the archives")
+	list_parser.add_argument('--url-pattern', help="URL pattern (with '*' wildcards) of the listed snapshots")
+
+	extract_parser = subparsers.add_parser('extract', help="Run an extraction schema over the snapshots of the archives")
+	extract_parser.add_argument('archives', nargs='+', help="Paths of the archives")
+	extract_parser.add_argument('--schema', required=True, help="Extraction schema, as 'module:variable'")
+	extract_parser.add_argument('--output', required=True, help="Output file with the records (.csv, .jsonl or .parquet)")
+	extract_parser.add_argument('--frame', type=int, nargs='*', help="Frame indexes of the document of the schema")
+	extract_parser.add_argument('--url-pattern', help="URL pattern (with '*' wildcards) of the extracted snapshots")
+	extract_parser.add_argument('--all-snapshots', action='store_true', help="Extract every snapshot, not only the last of each URL")
+	extract_parser.add_argument('--workers', type=int, help="Number of processes, by default the number of CPUs")
+	extract_parser.add_argument('--url-field', default='URL', help="Name of the field with the URL in the records")
+	extract_parser.add_argument('--delimiter', default=',', help="Delimiter of the output if it is a CSV")
+	args = parser.parse_args(argv)
+
+	paths = expand_paths(args.archives)
+
+	if args.command == 'list':
+		count = 0
+		for path in paths:
+			with SnapshotArchive(path, read_only=True) as archive:
+				for entry in archive.entries(args.url_pattern):
+					captured_at = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['captured_at']))
+					print(f"{captured_at}  {entry['length']:>10}  {entry['url']}")
+					count += 1
+		print(f"{count} snapshots in {len(paths)} archives")
+		return count
+
+	from src.crawl_runner import load_handler
+	from src.record_sink import RecordSink
+
+	schema = load_handler(args.schema)
+	extracted = 0
+	failed = 0
+	start = time.perf_counter()
+	with RecordSink(args.output, delimiter=args.delimiter) as sink:
+		for url, values, error in extract_archives(paths, schema, args.frame, args.url_pattern, not args.all_snapshots,
+				args.workers):
+			if error is not None:
+				print(f"An error occurred extracting '{url}': {error}")
+				failed += 1
+				continue
+			sink.push({args.url_field: url, **values})
+			extracted += 1
+
+	print(f"{extracted} snapshots extracted in {time.perf_counter() - start:.1f} seconds, {failed} errors")
+	return extracted
+
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,446 @@
+"""
+@file src/static_fetcher.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Fetcher which reads the server-side rendered pages with HTTP and lxml, falling back to the browser if needed
+
+The pages are downloaded with a pooled HTTP session and the same locators and extraction schemas of
+'src/browser_web_scrapping' are evaluated with lxml, without launching a browser. A page is read with the driver
+instead when the HTTP response is not a usable HTML page (an error, a login redirect or a denied access) or when a
+required locator is missing, which happens in the pages rendered with JavaScript.
+"""
+
+
+import re
+import time
+from contextlib import nullcontext
+from urllib.parse import urljoin
+
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+
+import src.browser_web_scrapping as browser_ws
+import src.http_downloads as http_ws
+from src.instrumentation import instrumented, note_failure, url_host
+from src.rate_limiter import congestion_statuses, retry_after_seconds
+
+
+# Tags which start a new line in the rendered text of the page
+block_tags = {
+	'address', 'article', 'aside', 'blockquote', 'br', 'dd', 'div', 'dl', 'dt', 'footer', 'form', 'h1', 'h2', 'h3',
+	'h4', 'h5', 'h6', 'header', 'hr', 'li', 'main', 'nav', 'ol', 'p', 'pre', 'section', 'table', 'tr', 'ul'
+}
+
+# HTTP statuses of the pages which need the session of a logged in browser
+auth_statuses = (401, 403)
+
+# Time in seconds the last fetched page is reused, e.g. by a 'find_element' and an 'extract' of the same URL
+DEFAULT_PAGE_TTL = 5
+
+
+
+def inner_text(node) -> str:
+	"""
+	Approximates the 'innerText' of an element: the text with a line per block and the whitespace collapsed.
+
+	@param node The lxml element.
+	@return The text of the element.
+	"""
+
+	parts = []
+
+	def walk(element):
+		tag = element.tag.lower() if isinstance(element.tag, str) else None
+		if tag in ('script', 'style', 'head') or tag is None:
+			return
+		if tag in block_tags:
+			parts.append('\n')
+		if element.text:
+			parts.append(element.text)
+		for child in element:
+			walk(child)
+			if child.tail:
+				parts.append(child.tail)
+		if tag in block_tags:
+			parts.append('\n')
+
+	walk(node)
+	lines = [' '.join(line.split()) for line in ''.join(parts).split('\n')]
+	return '\n'.join(line for line in lines if line)
+
+
+def node_displayed(node) -> bool:
+	"""
+	Checks an element and its ancestors are not hidden by the 'hidden' attribute or an inline 'display: none'.
+	"""
+
+	while node is not None:
+		style = (node.get('style') or '').replace(' ', '')
+		if node.get('hidden') is not None or 'display:none' in style:
+			return False
+		node = node.getparent()
+	return True
+
+
+def read_node_attribute(node, name: str, base_url: str = None):
+	"""
+	Reads an attribute of an element like the browser, the 'href' and 'src' are absolute URLs.
+
+	@param node The lxml element.
+	@param name The name of the attribute, or 'outerHTML' / 'innerHTML'.
+	@param base_url The URL of the page, to resolve the relative links.
+	@return The value, None if the element has no such attribute.
+	"""
+
+	if name == 'outerHTML':
+		return lxml.html.tostring(node, encoding='unicode', with_tail=False)
+	if name == 'innerHTML':
+		return (node.text or '') + ''.join(lxml.html.tostring(child, encoding='unicode') for child in node)
+	if name in ('href', 'src') and node.get(name) is not None and base_url is not None:
+		return urljoin(base_url, node.get(name))
+	return node.get(name)
+
+
+def locator_to_xpath(type_element: str, element: str) -> str:
+	"""
+	Translates a Selenium locator to the XPath evaluated by lxml.
+
+	@param type_element The type of locator (e.g., By.ID, By.CLASS_NAME, By.XPATH).
+	@param element The element selector string.
+	@return The XPath.
+	"""
+
+	kind, locator = browser_ws.locator_to_xpath_or_css(type_element, element)
+	if kind == 'xpath':
+		return locator
+
+	# The selectors of the simple locators, without the optional 'cssselect' package, the escapes of the CSS strings
+	# are undone since the XPath literals have none
+	match = re.fullmatch(r'\[(id|name)="((?:[^"\\]|\\.)*)"\]', locator)
+	if match:
+		value = re.sub(r'\\([0-9a-fA-F]{1,6}) ?|\\(.)', lambda escape: escape.group(2) or chr(int(escape.group(1), 16)),
+			match.group(2))
+		return f"//*[@{match.group(1)}={browser_ws.xpath_literal(value)}]"
+	match = re.fullmatch(r'\.([\w-]+)', locator)
+	if match:
+		return f"//*[contains(concat(' ', normalize-space(@class), ' '), ' {match.group(1)} ')]"
+	if re.fullmatch(r'[A-Za-z][\w-]*', locator):
+		return f"//{locator}"
+
+	try:
+		from lxml.cssselect import CSSSelector
+	except ImportError:
+		raise ImportError(f"The package 'cssselect' is required to evaluate the CSS selector '{locator}' with lxml")
+	return CSSSelector(locator).path
+
+
+def find_nodes(node, type_element: str, element: str) -> list:
+	"""
+	Finds the elements matching a locator, relative to an element.
+
+	@param node The lxml element, e.g. the root of the document.
+	@param type_element The type of locator (e.g., By.ID, By.CLASS_NAME, By.XPATH).
+	@param element The element selector string.
+	@return The list of lxml elements, without the text and comment nodes.
+	"""
+
+	return [found for found in node.xpath(locator_to_xpath(type_element, element)) if isinstance(found.tag, str)]
+
+
+def extract_elements_in_document(node, specs: dict, base_url: str = None) -> dict:
+	"""
+	Evaluates the specs of an extraction schema with lxml, with the results of 'extract_elements_in_driver'.
+
+	@param node The lxml element the locators are relative to, e.g. the root of the document.
+	@param specs The complete specs, see 'browser_web_scrapping.normalize_extraction_schema'.
+	@param base_url The URL of the page, to resolve the relative links.
+	@return A dictionary with the same keys as the specs, missing elements are None (or [] if 'many').
+	"""
+
+	result = {}
+	for name, spec in specs.items():
+		try:
+			xpath = spec['locator'] if spec['kind'] == 'xpath' else locator_to_xpath('css selector', spec['locator'])
+			nodes = [found for found in node.xpath(xpath) if isinstance(found.tag, str)]
+		except Exception:
+			result[name] = [] if spec['many'] else None
+			continue
+
+		def read(found):
+			if spec['field'] == 'text':
+				return inner_text(found) if node_displayed(found) else ''
+			name = spec['attribute'] if spec['field'] == 'attribute' else spec['field']
+			return read_node_attribute(found, name, base_url)
+
+		if spec['many']:
+			result[name] = [read(found) for found in nodes]
+		else:
+			result[name] = read(nodes[0]) if nodes else None
+
+	return result
+
+
+
+class StaticElement:
+	"""
+	Element of a static page with the read methods of a Selenium WebElement.
+	"""
+
+	def __init__(self, page, node):
+		self._page = page
+		self._node = node
+
+
+	@property
+	def tag_name(self) -> str:
+		return self._node.tag.lower()
+
+
+	@property
+	def text(self) -> str:
+		return inner_text(self._node) if node_displayed(self._node) else ''
+
+
+	def get_attribute(self, name: str):
+		return read_node_attribute(self._node, name, self._page.url)
+
+
+	def is_displayed(self) -> bool:
+		return node_displayed(self._node)
+
+
+	def find_element(self, type_element: str, element: str):
+		nodes = find_nodes(self._node, type_element, element)
+		return StaticElement(self._page, nodes[0]) if nodes else None
+
+
+	def find_elements(self, type_element: str, element: str) -> list:
+		return [StaticElement(self._page, found) for found in find_nodes(self._node, type_element, element)]
+
+
+
+class StaticPage:
+	"""
+	HTML page downloaded with HTTP and parsed with lxml.
+	"""
+
+	def __init__(self, url: str, html: str | bytes):
+		"""
+		@param url The final URL of the page, after the redirects.
+		@param html The HTML of the page.
+		"""
+
+		self.url = url
+		self.root = lxml.html.document_fromstring(html)
+
+
+	def find_element(self, type_element: str, element: str) -> StaticElement | None:
+		"""
+		Finds the first element matching a locator.
+
+		@return The element, None if it is not found.
+		"""
+
+		nodes = find_nodes(self.root, type_element, element)
+		return StaticElement(self, nodes[0]) if nodes else None
+
+
+	def find_elements(self, type_element: str, element: str) -> list:
+		return [StaticElement(self, found) for found in find_nodes(self.root, type_element, element)]
+
+
+	def extract(self, schema: dict) -> dict:
+		"""
+		Reads several elements of the page, see 'browser_web_scrapping.extract_elements_in_driver'.
+		"""
+
+		return extract_elements_in_document(self.root, browser_ws.normalize_extraction_schema(schema), self.url)
+
+
+
+class StaticFetcher:
+	"""
+	Reads pages with HTTP and lxml, and with the browser driver only for the pages which need it.
+	"""
+
+	def __init__(self, driver = None, session: requests.Session = None, pool_size: int = 8, timeout: float = 10,
+			rate_limiter = None, retry_policy = None, needs_browser = None,
+			wait_condition = None, browser_timeout: float = browser_ws.DEFAULT_WAIT_TIMEOUT,
+			page_ttl: float = DEFAULT_PAGE_TTL):
+		"""
+		@param driver Optional Selenium WebDriver used for the pages which can not be read statically.
+		@param session The HTTP session, by default a pooled session with the cookies of the driver (if it is given).
+		@param pool_size The number of connections kept open per host of the default session.
+		@param timeout The timeout in seconds of the HTTP requests.
+		@param rate_limiter Optional RateLimiter (see 'src/rate_limiter.py') of the HTTP requests and the page loads.
+		@param retry_policy Optional RetryPolicy of the HTTP requests.
+		@param needs_browser Optional function which receives a StaticPage and returns True if it must be read with
+			the browser, e.g. to detect a page whose content is loaded with JavaScript.
+		@param wait_condition Optional condition to wait after loading a page in the browser, e.g. document_ready().
+		@param browser_timeout The maximum time in seconds to wait for the condition.
+		@param page_ttl The time in seconds the last fetched page is reused for the same URL, 0 to always fetch it.
+		"""
+
+		self.driver = driver
+		self.session = session
+		self.pool_size = pool_size
+		self.timeout = timeout
+		self.rate_limiter = rate_limiter
+		self.retry_policy = retry_policy
+		self.needs_browser = needs_browser
+		self.wait_condition = wait_condition
+		self.browser_timeout = browser_timeout
+		self.page_ttl = page_ttl
+
+		# Number of pages read in each mode
+		self.stats = {'static': 0, 'browser': 0}
+		self._page = None
+		self._own_session = session is None
+
+
+	def _session(self) -> requests.Session:
+		if self.session is None:
+			if self.driver is not None:
+				self.session = http_ws.session_from_driver(self.driver, pool_size=self.pool_size)
+			else:
+				self.session = requests.Session()
+				adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+				self.session.mount('http://', adapter)
+				self.session.mount('https://', adapter)
+		return self.session
+
+
+	def _get(self, url: str) -> StaticPage | None:
+		with self.rate_limiter.slot(url) if self.rate_limiter is not None else nullcontext() as ticket, \
+				self._session().get(url, timeout=self.timeout) as response:
+
+			if ticket is not None:
+				ticket.status = response.status_code
+				retry_after = retry_after_seconds(response)
+				if response.status_code in congestion_statuses and retry_after is not None:
+					self.rate_limiter.pause(url, retry_after)
+
+			# The server errors are raised to be retried, the other failures mean the browser is needed
+			if response.status_code >= 500 or response.status_code in congestion_statuses:
+				response.raise_for_status()
+			if response.status_code in auth_statuses or response.status_code >= 400:
+				return None
+			if 'html' not in response.headers.get('Content-Type', 'text/html'):
+				return None
+
+			# A redirect to other host is a login page
+			if url_host(response.url) != url_host(url):
+				return None
+
+			return StaticPage(response.url, response.content)
+
+
+	@instrumented(failure_results=(None,))
+	def fetch(self, url: str, refresh: bool = False) -> StaticPage | None:
+		"""
+		Downloads and parses a page with HTTP, the last page is kept for 'page_ttl' seconds to read it several times.
+
+		@param url The URL of the page.
+		@param refresh Whether to download the page again even if it was fetched less than 'page_ttl' seconds ago.
+		@return The page, None if it can not be read statically.
+		"""
+
+		if not refresh and self._page is not None and self._page[0] == url \
+				and time.monotonic() - self._page[2] < self.page_ttl:
+			return self._page[1]
+
+		try:
+			page = self._get(url) if self.retry_policy is None else self.retry_policy.call(self._get, url)
+			if page is not None and self.needs_browser is not None and self.needs_browser(page):
+				page = None
+		except Exception as e:
+			note_failure(e)
+			print(f"An error occurred fetching '{url}': {e}")
+			page = None
+
+		self._page = (url, page, time.monotonic())
+		return page
+
+
+	def _open_in_browser(self, url: str):
+		"""
+		Loads the page in the driver, unless it is already open.
+		"""
+
+		if self.driver is None:
+			return None
+
+		if self.driver.current_url != url:
+			browser_ws.login_to_url(self.driver, url, wait_condition=self.wait_condition, timeout=self.browser_timeout,
+				rate_limiter=self.rate_limiter)
+		self.stats['browser'] += 1
+		return self.driver
+
+
+	def find_element(self, url: str, type_element: str, element: str, wait_condition = None, refresh: bool = False):
+		"""
+		Finds an element of a page, with the arguments and results of 'find_element_in_driver'.
+
+		@param url The URL of the page.
+		@param type_element The type of locator (e.g., By.ID, By.CLASS_NAME, By.XPATH).
+		@param element The element selector string.
+		@param wait_condition Optional 'present', 'visible', 'clickable' or a condition, only used in the browser.
+		@param refresh Whether to download the page again, see 'fetch'.
+		@return A StaticElement, or a WebElement if the page was read with the browser; None if it is not found.
+		"""
+
+		page = self.fetch(url, refresh)
+		if page is not None:
+			found = page.find_element(type_element, element)
+			if found is not None or self.driver is None:
+				self.stats['static'] += 1
+				return found
+
+		if self._open_in_browser(url) is None:
+			return None
+		return browser_ws.find_element_in_driver(self.driver, type_element, element, wait_condition=wait_condition,
+			timeout=self.browser_timeout)
+
+
+	def extract(self, url: str, schema: dict, required: list = None, refresh: bool = False) -> dict:
+		"""
+		Reads several elements of a page, with the schema and results of 'extract_elements_in_driver'.
+
+		@param url The URL of the page.
+		@param schema The dictionary of named locators, see 'normalize_extraction_schema'.
+		@param required The names which must be found to accept the static page, defaults to all the names which are
+			not 'many'.
+		@param refresh Whether to download the page again, see 'fetch'.
+		@return A dictionary with the same keys as the schema, missing elements are None (or [] if 'many').
+		"""
+
+		specs = browser_ws.normalize_extraction_schema(schema)
+		if required is None:
+			required = [name for name, spec in specs.items() if not spec['many']]
+
+		page = self.fetch(url, refresh)
+		if page is not None:
+			result = extract_elements_in_document(page.root, specs, page.url)
+			if self.driver is None or all(result[name] is not None for name in required):
+				self.stats['static'] += 1
+				return result
+
+		if self._open_in_browser(url) is None:
+			return {name: [] if spec['many'] else None for name, spec in specs.items()}
+		return browser_ws.extract_elements_in_driver(self.driver, schema)
+
+
+	def close(self):
+		if self._own_session and self.session is not None:
+			self.session.close()
+			self.session = None
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
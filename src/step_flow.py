@@ -0,0 +1,313 @@
+"""
+@file src/step_flow.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Engine which runs a declared sequence of browser steps, e.g. the clicks of a download menu
+
+A flow is an ordered list of steps, each one a dictionary with an 'action' and its options:
+
+	{'action': 'navigate', 'url': url}
+	{'action': 'switch_frame', 'locator': (By.XPATH, "//iframe[@id='WacFrame_Word_0']")}
+	{'action': 'click', 'locator': (By.XPATH, "//button[@id='FileMenuFlyoutLauncher']")}
+	{'action': 'await_download', 'timeout': 300}
+
+Every step waits its own readiness condition instead of a fixed delay, it is retried 'retries' times and its
+duration is reported. A failed run can be resumed from the failed step: the frames entered before are switched again,
+so the page is not reloaded.
+"""
+
+
+import time
+
+import src.browser_web_scrapping as browser_ws
+from src.download_watcher import DownloadWatcher, DownloadTimeout
+
+
+# Actions of the steps and the keys each one requires
+step_actions = {
+	'navigate': ['url'],
+	'switch_frame': [],
+	'return_frame': [],
+	'find': ['locator'],
+	'click': [],
+	'context_click': [],
+	'wait_for': ['condition'],
+	'await_download': []
+}
+
+# Condition waited before acting on the element of the step, if the step does not give one
+default_element_conditions = {
+	'switch_frame': 'present',
+	'find': 'present',
+	'click': 'clickable',
+	'context_click': 'visible'
+}
+
+
+
+class FlowState:
+	"""
+	Progress of a run of a flow, returned by 'StepFlow.run' and given back to it to resume a failed run.
+	"""
+
+	def __init__(self, total_steps: int):
+		"""
+		@param total_steps The number of steps of the flow.
+		"""
+
+		self.total_steps = total_steps
+		self.next_step = 0
+		self.frame_steps = []
+		self.elements = {}
+		self.timings = []
+		self.downloads = []
+		self.step_downloads = 0
+		self.error = None
+		self.failed_step = None
+		self.download_watcher = None
+
+
+	@property
+	def completed(self) -> bool:
+		return self.error is None and self.next_step >= self.total_steps
+
+
+	def report(self) -> str:
+		"""
+		Builds a table with the duration and attempts of each executed step.
+
+		@return The text of the table, one line per step.
+		"""
+
+		lines = [f"{'step':<32}{'action':<16}{'attempts':>9}{'seconds':>10}  status"]
+		for timing in self.timings:
+			lines.append(
+				f"{timing['step']:<32}{timing['action']:<16}{timing['attempts']:>9}{timing['seconds']:>10.3f}  {timing['status']}"
+			)
+		return '\n'.join(lines)
+
+
+	def close(self):
+		"""
+		Releases the download watcher, call it if a failed run will not be resumed.
+		"""
+
+		if self.download_watcher is not None:
+			self.download_watcher.close()
+			self.download_watcher = None
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+
+class StepFlow:
+	"""
+	A declared sequence of browser steps, see the brief of the file.
+
+	Keys of every step:
+		action: One of 'step_actions'.
+		name: Optional name used in the timings and to store the found element, defaults to '<index>:<action>'.
+		timeout: The maximum time in seconds of each attempt, defaults to the one of the flow.
+		retries: The number of extra attempts if the step fails, defaults to the one of the flow.
+
+	Keys of each action:
+		navigate: 'url' and optional 'condition' (defaults to document_ready()).
+		switch_frame: 'locator' (type, selector) of the iframe, or 'frame' with its name or index.
+		return_frame: Nothing, it goes back to the main document.
+		find: 'locator' and optional 'condition' ('present', 'visible', 'clickable' or a callable).
+		click, context_click: 'locator', or 'element' with the name of a previous 'find' step. Optional 'condition' to
+			wait before, 'wait_condition' to wait after the click and 'scroll'.
+		wait_for: 'condition', a callable which receives the driver.
+		await_download: Optional 'expected_count' and 'stable_time', it needs the download folder of the flow.
+	"""
+
+	def __init__(self, steps: list, download_folder: str = None, timeout: float = browser_ws.DEFAULT_WAIT_TIMEOUT,
+			retries: int = 0):
+		"""
+		Validates the steps of the flow.
+
+		@param steps The ordered list of steps.
+		@param download_folder The download folder of the browser, mandatory if there are 'await_download' steps.
+		@param timeout The default timeout in seconds of the steps.
+		@param retries The default number of extra attempts of the steps.
+		"""
+
+		for index, step in enumerate(steps):
+			action = step.get('action')
+			if action not in step_actions:
+				raise ValueError(f"Action '{action}' of step {index} not in available actions {list(step_actions)}")
+
+			missing_keys = [key for key in step_actions[action] if key not in step]
+			if missing_keys:
+				raise ValueError(f"Step {index} '{action}' needs the keys {missing_keys}")
+
+			if action in ('click', 'context_click') and 'locator' not in step and 'element' not in step:
+				raise ValueError(f"Step {index} '{action}' needs a 'locator' or the 'element' of a previous step")
+			if action == 'switch_frame' and 'locator' not in step and 'frame' not in step:
+				raise ValueError(f"Step {index} 'switch_frame' needs a 'locator' or a 'frame'")
+			if action == 'await_download' and download_folder is None:
+				raise ValueError(f"Step {index} 'await_download' needs the download folder of the flow")
+
+		self.steps = [{'name': f"{index}:{step['action']}", **step} for index, step in enumerate(steps)]
+		self.download_folder = download_folder
+		self.timeout = timeout
+		self.retries = retries
+
+
+	def _find(self, driver, step: dict, state: FlowState):
+		"""
+		Gets the element of a step, from a previous step or waiting its condition.
+		"""
+
+		if 'element' in step:
+			return state.elements[step['element']]
+
+		condition = step.get('condition', default_element_conditions[step['action']])
+		element = browser_ws.find_element_in_driver(driver, *step['locator'], wait_condition=condition,
+			timeout=step.get('timeout', self.timeout))
+		if element is None:
+			raise LookupError(f"Element {step['locator']} of step '{step['name']}' not found")
+
+		return element
+
+
+	def _switch_frame(self, driver, step: dict, state: FlowState):
+		frame = step['frame'] if 'frame' in step else self._find(driver, step, state)
+		if not browser_ws.switch_to_frame_in_browser(driver, frame):
+			raise RuntimeError(f"Frame of step '{step['name']}' could not be switched")
+
+
+	def _run_step(self, driver, step: dict, state: FlowState):
+		"""
+		Runs one attempt of a step.
+
+		@throws Exception If the step fails.
+		"""
+
+		action = step['action']
+		timeout = step.get('timeout', self.timeout)
+
+		if action == 'navigate':
+			# The cached elements belong to the previous page
+			browser_ws.invalidate_element_cache(driver)
+			driver.get(step['url'])
+			state.frame_steps = []
+			browser_ws.wait_for_condition(driver, step.get('condition', browser_ws.document_ready()), timeout)
+
+		elif action == 'switch_frame':
+			self._switch_frame(driver, step, state)
+			state.frame_steps.append(state.next_step)
+
+		elif action == 'return_frame':
+			if not browser_ws.return_from_frame_in_browser(driver):
+				raise RuntimeError(f"Step '{step['name']}' could not return to the main document")
+			state.frame_steps = []
+
+		elif action == 'find':
+			state.elements[step['name']] = self._find(driver, step, state)
+
+		elif action == 'click':
+			element = self._find(driver, step, state)
+			if not browser_ws.click_element_in_driver(element, need_scroll=step.get('scroll', False), driver=driver,
+					wait_condition=step.get('wait_condition'), timeout=timeout):
+				raise RuntimeError(f"Element of step '{step['name']}' could not be clicked")
+
+		elif action == 'context_click':
+			element = self._find(driver, step, state)
+			if not browser_ws.context_click_element_in_driver(driver, element):
+				raise RuntimeError(f"Element of step '{step['name']}' could not be context clicked")
+			if step.get('wait_condition') is not None:
+				browser_ws.wait_for_condition(driver, step['wait_condition'], timeout)
+
+		elif action == 'wait_for':
+			browser_ws.wait_for_condition(driver, step['condition'], timeout)
+
+		elif action == 'await_download':
+			# The files finished before a timeout are not reported again, the next attempt waits only the others
+			try:
+				paths = state.download_watcher.wait(expected_count=step.get('expected_count', 1) - state.step_downloads,
+					timeout=timeout, stable_time=step.get('stable_time', 0.5))
+			except DownloadTimeout as e:
+				state.downloads.extend(e.finished)
+				state.step_downloads += len(e.finished)
+				raise
+			state.downloads.extend(paths)
+
+
+	def _restore_frames(self, driver, state: FlowState):
+		"""
+		Enters again the frames switched before the failed step, starting from the main document.
+		"""
+
+		if not state.frame_steps:
+			return
+
+		browser_ws.return_from_frame_in_browser(driver)
+		for index in state.frame_steps:
+			self._switch_frame(driver, self.steps[index], state)
+
+
+	def run(self, driver, state: FlowState = None) -> FlowState:
+		"""
+		Runs the steps of the flow, or resumes a failed run from its failed step.
+
+		@param driver A Selenium WebDriver instance.
+		@param state The state returned by a failed run to resume it, None to start from the first step.
+		@return The state of the run, check 'completed', 'error' and 'timings'. If the run failed its download
+			watcher is kept open for the resume, call 'close' if it will not be resumed.
+		"""
+
+		if state is None:
+			state = FlowState(len(self.steps))
+		else:
+			self._restore_frames(driver, state)
+			state.error = None
+			state.failed_step = None
+
+		# The watcher must exist before the click which starts the download
+		if self.download_folder is not None and state.download_watcher is None \
+				and any(step['action'] == 'await_download' for step in self.steps[state.next_step:]):
+			state.download_watcher = DownloadWatcher(self.download_folder)
+
+		while state.next_step < len(self.steps):
+			step = self.steps[state.next_step]
+			retries = step.get('retries', self.retries)
+
+			start = time.perf_counter()
+			attempts = 0
+			error = None
+			while attempts <= retries:
+				attempts += 1
+				try:
+					self._run_step(driver, step, state)
+					error = None
+					break
+				except Exception as e:
+					error = e
+
+			state.timings.append({
+				'step': step['name'],
+				'action': step['action'],
+				'attempts': attempts,
+				'seconds': time.perf_counter() - start,
+				'status': 'failed' if error else 'done'
+			})
+
+			if error is not None:
+				print(f"An error occurred in step '{step['name']}' of the flow: {error}")
+				state.error = error
+				state.failed_step = state.next_step
+				return state
+
+			state.next_step += 1
+			state.step_downloads = 0
+
+		state.close()
+		return state
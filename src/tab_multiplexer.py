@@ -0,0 +1,220 @@
+"""
+@file src/tab_multiplexer.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Scheduler which loads several pages at once in the tabs of a single browser
+
+The navigations are started with JavaScript, so the driver does not block until the page is loaded, and the tab
+which becomes ready first is processed first. The driver should be created with a non-blocking page load strategy,
+e.g. the 'multiplexed' performance profile of 'create_browser_connection', otherwise some drivers wait the pending
+navigation of a tab before running the next command in it. The URL patterns blocked by the performance profile are
+blocked again in each new tab, since Chrome blocks them per tab.
+"""
+
+
+import time
+
+from src.browser_web_scrapping import block_urls_in_current_tab, note_window_switch
+from src.driver_pool import note_page_load
+from src.instrumentation import note_failure
+from src.snapshot_archive import snapshot_recorder_of
+
+
+# Script which marks the current document and starts the navigation, the new document does not have the mark
+navigation_script = "window.__wst_pending = true; window.location.href = arguments[0];"
+
+# Script which checks the navigation replaced the marked document and it reached one of the ready states
+ready_script = "return window.__wst_pending !== true && arguments[0].indexOf(document.readyState) >= 0;"
+
+# End of the URLs to process
+_end = object()
+
+
+
+class TabMultiplexer:
+	"""
+	Opens a number of tabs in a driver and processes a list of URLs overlapping their page loads.
+
+	Usage:
+		with TabMultiplexer(driver, tabs=4) as multiplexer:
+			for url, result, error in multiplexer.process(urls, read_page):
+				...
+	"""
+
+	def __init__(self, driver, tabs: int = 4, ready_states: tuple = ('interactive', 'complete'), page_ready = None,
+			timeout: float = 30, poll_interval: float = 0.05, rate_limiter = None):
+		"""
+		@param driver A Selenium WebDriver instance, e.g. from 'create_browser_connection'.
+		@param tabs The number of tabs loading pages at the same time.
+		@param ready_states The accepted values of 'document.readyState' to process a tab.
+		@param page_ready Optional condition which must also hold to process a tab, e.g. element_present(...).
+		@param timeout The maximum time in seconds to load a page.
+		@param poll_interval The time in seconds between two checks of the tabs when none is ready.
+		@param rate_limiter Optional RateLimiter (see 'src/rate_limiter.py'), a navigation starts when the host of its URL
+			allows it, and the time to get ready adapts the rate of the host.
+		"""
+
+		if tabs < 1:
+			raise ValueError(f"The number of tabs must be at least 1, got {tabs}")
+
+		self.driver = driver
+		self.tabs = tabs
+		self.ready_states = list(ready_states)
+		self.page_ready = page_ready
+		self.timeout = timeout
+		self.poll_interval = poll_interval
+		self.rate_limiter = rate_limiter
+
+		self._original_handle = None
+		self._handles = []
+
+
+	def open(self):
+		"""
+		Opens the tabs, the current tab of the driver is the first of them.
+		"""
+
+		if self._handles:
+			return self
+
+		self._original_handle = self.driver.current_window_handle
+		self._handles = [self._original_handle]
+		try:
+			for _ in range(self.tabs - 1):
+				self.driver.switch_to.new_window('tab')
+				self._handles.append(self.driver.current_window_handle)
+				note_window_switch(self.driver, self._handles[-1])
+				# The URL patterns blocked by the performance profile only apply to the tab where they are set
+				block_urls_in_current_tab(self.driver)
+		except Exception as e:
+			self.close()
+			raise Exception(f"An error occurred opening the tabs: {e}")
+
+		return self
+
+
+	def _start(self, handle: str, url: str):
+		self.driver.switch_to.window(handle)
+		note_window_switch(self.driver, handle, navigated=True)
+		# The navigation does not call 'driver.get', it is counted for the recycling of a pooled driver
+		note_page_load(self.driver)
+		self.driver.execute_script(navigation_script, url)
+
+
+	def _is_ready(self, handle: str) -> bool:
+		self.driver.switch_to.window(handle)
+		note_window_switch(self.driver, handle)
+		if not self.driver.execute_script(ready_script, self.ready_states):
+			return False
+		return self.page_ready is None or bool(self.page_ready(self.driver))
+
+
+	def _release(self, ticket, error: bool = False):
+		if ticket is not None:
+			self.rate_limiter.release(ticket, error=error)
+
+
+	def process(self, urls, handler):
+		"""
+		Loads the URLs in the tabs and applies the handler in each tab once its page is ready.
+
+		@param urls An iterable of URLs, it is consumed as the tabs are free.
+		@param handler A function called as handler(driver, url) with the driver switched to the tab of the page,
+			e.g. a function which calls 'extract_elements_in_driver'. The page is saved before by the SnapshotRecorder
+			attached to the driver, if there is one.
+		@return A generator of tuples (url, result of the handler, exception or None), in the order the pages got ready.
+		"""
+
+		self.open()
+		pending_urls = iter(urls)
+		next_url = next(pending_urls, _end)
+		free_handles = list(self._handles)
+		loading = {}
+
+		while loading or next_url is not _end:
+
+			# Start the navigations in the free tabs, as far as the rate limiter allows them
+			while free_handles and next_url is not _end:
+				ticket = None
+				if self.rate_limiter is not None:
+					ticket = self.rate_limiter.try_acquire(next_url)
+					if ticket is None:
+						break
+
+				url = next_url
+				next_url = next(pending_urls, _end)
+				handle = free_handles.pop()
+				try:
+					self._start(handle, url)
+					loading[handle] = (url, time.monotonic(), ticket)
+				except Exception as e:
+					note_failure(e)
+					self._release(ticket, error=True)
+					free_handles.append(handle)
+					yield (url, None, e)
+
+			processed = False
+			for handle in list(loading):
+				url, start, ticket = loading[handle]
+				try:
+					ready = self._is_ready(handle)
+				except Exception:
+					ready = False
+
+				if ready:
+					self._release(ticket)
+					recorder = snapshot_recorder_of(self.driver)
+					if recorder is not None:
+						recorder.record(self.driver, url)
+					try:
+						outcome = (url, handler(self.driver, url), None)
+					except Exception as e:
+						note_failure(e)
+						outcome = (url, None, e)
+				elif time.monotonic() - start > self.timeout:
+					self._release(ticket, error=True)
+					outcome = (url, None, TimeoutError(f"The page '{url}' was not ready in {self.timeout} seconds"))
+				else:
+					continue
+
+				processed = True
+				del loading[handle]
+				free_handles.append(handle)
+				yield outcome
+
+			if not processed:
+				time.sleep(self.poll_interval)
+
+
+	def close(self):
+		"""
+		Closes the tabs opened by the multiplexer and switches back to the original tab.
+		"""
+
+		for handle in self._handles:
+			if handle == self._original_handle:
+				continue
+			try:
+				self.driver.switch_to.window(handle)
+				self.driver.close()
+			except Exception as e:
+				print(f"An error occurred closing the tab {handle}: {e}")
+
+		if self._original_handle is not None:
+			try:
+				self.driver.switch_to.window(self._original_handle)
+				note_window_switch(self.driver, self._original_handle)
+			except Exception as e:
+				print(f"An error occurred returning to the original tab: {e}")
+
+		self._handles = []
+		self._original_handle = None
+
+
+	def __enter__(self):
+		return self.open()
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
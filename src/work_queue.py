@@ -0,0 +1,755 @@
+"""
+@file src/work_queue.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Work queue shared by the scrappers of several hosts, with leases, heartbeats, retries and dead letters
+
+A worker leases messages for a visibility timeout, extends the lease with heartbeats while it works and acknowledges
+the message with its result. A message whose lease expires is given to another worker, and a message which fails too
+many times is moved to the dead letters. Every lease has a token, so a worker whose lease expired can not acknowledge
+the message leased again by another worker, and the IDs are unique, so an URL enqueued twice is fetched once.
+
+The backend is pluggable ('WorkQueueBackend'), the built-in one is a SQLite database ('SqliteWorkQueue') which can be
+served to other hosts with TCP ('WorkQueueServer' and 'RemoteWorkQueue'):
+
+	export WORK_QUEUE_TOKEN=<shared secret>
+	python -m src.work_queue serve --database dat/queue.sqlite --host 0.0.0.0 --port 8765
+	python -m src.work_queue enqueue --server host:8765 dat/data_pages.csv --url-column ImageLink --id-column ImageID --delimiter '|'
+	python -m src.work_queue work --server host:8765 --handler examples.NGA.crawl_image_pages:read_image_page
+	python -m src.work_queue export --server host:8765 dat/data.jsonl
+
+The server listens only in the loopback address by default. Listening in another address requires a shared token,
+sent by the clients in every request ('--token' or the environment variable WORK_QUEUE_TOKEN), since the requests
+change the queue and read the scraped results. The token is not encrypted, use a trusted network or an SSH tunnel.
+"""
+
+
+import os
+import sys
+import abc
+import hmac
+import json
+import time
+import uuid
+import socket
+import ipaddress
+import sqlite3
+import argparse
+import threading
+import socketserver
+
+# Status of the messages
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+DEAD = 'dead'
+statuses = [PENDING, LEASED, DONE, DEAD]
+
+# Address where the server listens by default, only reachable from the same host
+DEFAULT_SERVER_HOST = '127.0.0.1'
+
+# Environment variable with the shared token of the server and its clients
+token_environment_variable = 'WORK_QUEUE_TOKEN'
+
+
+
+class WorkQueueBackend(abc.ABC):
+	"""
+	Interface of the work queue backends, the messages are dictionaries which can be serialized as JSON.
+	"""
+
+	@abc.abstractmethod
+	def put(self, items, max_attempts: int = None) -> int:
+		"""
+		Adds messages, the IDs already in the queue are ignored.
+
+		@param items Iterable of IDs, or of tuples (ID, payload).
+		@param max_attempts The number of leases of a message before it is moved to the dead letters.
+		@return The number of new messages.
+		"""
+
+
+	@abc.abstractmethod
+	def lease(self, worker: str, limit: int = 1, visibility_timeout: float = 60) -> list:
+		"""
+		Takes available messages for a time, the pending ones and the ones whose lease expired.
+
+		@param worker The name of the worker.
+		@param limit The maximum number of messages.
+		@param visibility_timeout The time in seconds the messages are hidden from the other workers.
+		@return A list of dictionaries with the keys 'id', 'payload', 'token' and 'attempts'.
+		"""
+
+
+	@abc.abstractmethod
+	def heartbeat(self, message_id: str, token: str, visibility_timeout: float = 60) -> bool:
+		"""
+		Extends the lease of a message.
+
+		@return False if the lease was lost, e.g. it expired and the message was leased again.
+		"""
+
+
+	@abc.abstractmethod
+	def ack(self, message_id: str, token: str, result = None) -> bool:
+		"""
+		Marks a leased message as done and saves its result.
+
+		@return False if the lease was lost, the result is then ignored.
+		"""
+
+
+	@abc.abstractmethod
+	def nack(self, message_id: str, token: str, error: str = None, retry_delay: float = 0) -> bool:
+		"""
+		Gives back a leased message which failed, it is retried after the delay or moved to the dead letters.
+
+		@return False if the lease was lost.
+		"""
+
+
+	@abc.abstractmethod
+	def counts(self) -> dict:
+		"""
+		Counts the messages in each status.
+		"""
+
+
+	@abc.abstractmethod
+	def results(self, offset: int = 0, limit: int = 1000) -> list:
+		"""
+		Reads the results of the done messages, in order of completion.
+
+		@return A list of tuples (ID, result).
+		"""
+
+
+	@abc.abstractmethod
+	def dead_letters(self, offset: int = 0, limit: int = 1000) -> list:
+		"""
+		Reads the messages which failed too many times.
+
+		@return A list of dictionaries with the keys 'id', 'payload', 'attempts' and 'error'.
+		"""
+
+
+	@abc.abstractmethod
+	def requeue_dead(self) -> int:
+		"""
+		Gives the dead letters back to pending, with their attempts reset.
+
+		@return The number of messages given back.
+		"""
+
+
+	def close(self):
+		pass
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+
+class SqliteWorkQueue(WorkQueueBackend):
+	"""
+	Work queue stored in a SQLite database, safe to share between threads and between the processes of a host.
+	"""
+
+	def __init__(self, path: str, max_attempts: int = 3, timeout: float = 30):
+		"""
+		Opens (or creates) the queue.
+
+		@param path The path of the SQLite database.
+		@param max_attempts The default number of leases of a message before it is moved to the dead letters.
+		@param timeout The time in seconds to wait when another process is writing the database.
+		"""
+
+		self.path = path
+		self.max_attempts = max_attempts
+		self._lock = threading.Lock()
+		self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+		self.connection.execute("PRAGMA journal_mode=WAL")
+		self.connection.execute("PRAGMA synchronous=NORMAL")
+		self.connection.execute(
+			"CREATE TABLE IF NOT EXISTS messages ("
+			"id TEXT PRIMARY KEY, "
+			"payload TEXT, "
+			"status TEXT NOT NULL DEFAULT 'pending', "
+			"attempts INTEGER NOT NULL DEFAULT 0, "
+			"max_attempts INTEGER NOT NULL, "
+			"available_at REAL NOT NULL DEFAULT 0, "
+			"token TEXT, "
+			"worker TEXT, "
+			"error TEXT, "
+			"result TEXT, "
+			"finished_at REAL)"
+		)
+		self.connection.execute("CREATE INDEX IF NOT EXISTS messages_available ON messages (status, available_at)")
+
+
+	def _transaction(self, function):
+		"""
+		Runs a function inside an immediate transaction, so concurrent processes do not lease the same messages.
+		"""
+
+		with self._lock:
+			self.connection.execute("BEGIN IMMEDIATE")
+			try:
+				result = function(self.connection)
+			except Exception:
+				self.connection.execute("ROLLBACK")
+				raise
+			self.connection.execute("COMMIT")
+			return result
+
+
+	def put(self, items, max_attempts: int = None) -> int:
+		max_attempts = self.max_attempts if max_attempts is None else max_attempts
+		rows = []
+		for item in items:
+			message_id, payload = item if isinstance(item, (tuple, list)) else (item, None)
+			rows.append((str(message_id), json.dumps(payload), max_attempts))
+
+		def insert(connection):
+			before = connection.total_changes
+			connection.executemany("INSERT OR IGNORE INTO messages (id, payload, max_attempts) VALUES (?, ?, ?)", rows)
+			return connection.total_changes - before
+
+		return self._transaction(insert)
+
+
+	def lease(self, worker: str, limit: int = 1, visibility_timeout: float = 60) -> list:
+		def take(connection):
+			now = time.time()
+
+			# The expired leases which used all their attempts are dead, the worker stopped while processing them
+			connection.execute(
+				"UPDATE messages SET status = ?, token = NULL, error = COALESCE(error, 'lease expired') "
+				"WHERE status = ? AND available_at <= ? AND attempts >= max_attempts",
+				(DEAD, LEASED, now)
+			)
+
+			rows = connection.execute(
+				"SELECT id, payload, attempts FROM messages WHERE status IN (?, ?) AND available_at <= ? "
+				"ORDER BY available_at, rowid LIMIT ?",
+				(PENDING, LEASED, now, limit)
+			).fetchall()
+
+			messages = []
+			for message_id, payload, attempts in rows:
+				token = uuid.uuid4().hex
+				connection.execute(
+					"UPDATE messages SET status = ?, token = ?, worker = ?, attempts = attempts + 1, available_at = ? "
+					"WHERE id = ?",
+					(LEASED, token, worker, now + visibility_timeout, message_id)
+				)
+				messages.append({'id': message_id, 'payload': json.loads(payload), 'token': token, 'attempts': attempts + 1})
+			return messages
+
+		return self._transaction(take)
+
+
+	def heartbeat(self, message_id: str, token: str, visibility_timeout: float = 60) -> bool:
+		with self._lock:
+			cursor = self.connection.execute(
+				"UPDATE messages SET available_at = ? WHERE id = ? AND token = ? AND status = ?",
+				(time.time() + visibility_timeout, str(message_id), token, LEASED)
+			)
+		return cursor.rowcount == 1
+
+
+	def ack(self, message_id: str, token: str, result = None) -> bool:
+		with self._lock:
+			cursor = self.connection.execute(
+				"UPDATE messages SET status = ?, token = NULL, result = ?, error = NULL, finished_at = ? "
+				"WHERE id = ? AND token = ? AND status = ?",
+				(DONE, json.dumps(result, ensure_ascii=False, default=str), time.time(), str(message_id), token, LEASED)
+			)
+		return cursor.rowcount == 1
+
+
+	def nack(self, message_id: str, token: str, error: str = None, retry_delay: float = 0) -> bool:
+		with self._lock:
+			cursor = self.connection.execute(
+				"UPDATE messages SET status = CASE WHEN attempts >= max_attempts THEN ? ELSE ? END, token = NULL, "
+				"error = ?, available_at = ? WHERE id = ? AND token = ? AND status = ?",
+				(DEAD, PENDING, error, time.time() + retry_delay, str(message_id), token, LEASED)
+			)
+		return cursor.rowcount == 1
+
+
+	def counts(self) -> dict:
+		with self._lock:
+			rows = self.connection.execute("SELECT status, COUNT(*) FROM messages GROUP BY status").fetchall()
+		return {**dict.fromkeys(statuses, 0), **dict(rows)}
+
+
+	def results(self, offset: int = 0, limit: int = 1000) -> list:
+		with self._lock:
+			rows = self.connection.execute(
+				"SELECT id, result FROM messages WHERE status = ? ORDER BY finished_at, rowid LIMIT ? OFFSET ?",
+				(DONE, limit, offset)
+			).fetchall()
+		return [(message_id, json.loads(result)) for message_id, result in rows]
+
+
+	def dead_letters(self, offset: int = 0, limit: int = 1000) -> list:
+		with self._lock:
+			rows = self.connection.execute(
+				"SELECT id, payload, attempts, error FROM messages WHERE status = ? ORDER BY rowid LIMIT ? OFFSET ?",
+				(DEAD, limit, offset)
+			).fetchall()
+		return [
+			{'id': message_id, 'payload': json.loads(payload), 'attempts': attempts, 'error': error}
+			for message_id, payload, attempts, error in rows
+		]
+
+
+	def requeue_dead(self) -> int:
+		with self._lock:
+			return self.connection.execute(
+				"UPDATE messages SET status = ?, attempts = 0, available_at = 0 WHERE status = ?", (PENDING, DEAD)
+			).rowcount
+
+
+	def close(self):
+		with self._lock:
+			self.connection.close()
+
+
+
+# Methods of the backend which can be called with TCP
+remote_methods = ['put', 'lease', 'heartbeat', 'ack', 'nack', 'counts', 'results', 'dead_letters', 'requeue_dead']
+
+
+
+def is_loopback_host(host: str) -> bool:
+	"""
+	Tells whether an address is only reachable from the same host, e.g. '127.0.0.1', '::1' or 'localhost'.
+	"""
+
+	try:
+		return ipaddress.ip_address(host).is_loopback
+	except ValueError:
+		pass
+
+	try:
+		return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+	except (OSError, ValueError):
+		return False
+
+
+
+class _WorkQueueHandler(socketserver.StreamRequestHandler):
+	"""
+	Handler of a TCP connection, each line is a JSON request {"method": ..., "params": {...}, "auth": ...} answered
+	with a JSON line {"result": ...} or {"error": ...}.
+	"""
+
+	def handle(self):
+		for line in self.rfile:
+			try:
+				request = json.loads(line)
+				expected = self.server.auth_token
+				if expected is not None and not hmac.compare_digest(str(request.get('auth') or '').encode('utf-8'),
+						expected.encode('utf-8')):
+					raise PermissionError("Invalid token of the work queue server")
+				if request.get('method') not in remote_methods:
+					raise ValueError(f"Method '{request.get('method')}' not in available methods {remote_methods}")
+				result = getattr(self.server.backend, request['method'])(**request.get('params', {}))
+				response = {'result': result}
+			except Exception as e:
+				response = {'error': f"{type(e).__name__}: {e}"}
+
+			self.wfile.write((json.dumps(response, ensure_ascii=False, default=str) + '\n').encode('utf-8'))
+			self.wfile.flush()
+
+
+
+class WorkQueueServer:
+	"""
+	Serves a backend to the workers of other hosts with TCP.
+	"""
+
+	def __init__(self, backend: WorkQueueBackend, host: str = DEFAULT_SERVER_HOST, port: int = 8765,
+			token: str = None):
+		"""
+		@param backend The backend of the queue, e.g. a SqliteWorkQueue.
+		@param host The address where the server listens, by default only the same host.
+		@param port The port of the server, 0 takes a free one.
+		@param token The shared token the clients must send, mandatory if the host is not a loopback address.
+		@throws ValueError If the server listens in a non loopback address without a token.
+		"""
+
+		if not token and not is_loopback_host(host):
+			raise ValueError(f"A token is required to serve the work queue in the address '{host}', "
+				f"give it with '--token' or the environment variable {token_environment_variable}")
+
+		socketserver.ThreadingTCPServer.allow_reuse_address = True
+		self.server = socketserver.ThreadingTCPServer((host, port), _WorkQueueHandler)
+		self.server.daemon_threads = True
+		self.server.backend = backend
+		self.server.auth_token = token or None
+		self.address = self.server.server_address
+		self._thread = None
+
+
+	def serve_forever(self):
+		self.server.serve_forever()
+
+
+	def start(self):
+		"""
+		Serves in a background thread.
+		"""
+
+		self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+		self._thread.start()
+		return self
+
+
+	def stop(self):
+		self.server.shutdown()
+		self.server.server_close()
+
+
+	def __enter__(self):
+		return self.start()
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.stop()
+
+
+
+class RemoteWorkQueue(WorkQueueBackend):
+	"""
+	Client of a WorkQueueServer, it has the same methods as the backend.
+	"""
+
+	def __init__(self, host: str, port: int = 8765, timeout: float = 30, token: str = None):
+		"""
+		@param host The address of the server.
+		@param port The port of the server.
+		@param timeout The time in seconds to wait the answer of the server.
+		@param token The shared token of the server, if it requires one.
+		"""
+
+		self.host = host
+		self.port = port
+		self.timeout = timeout
+		self.token = token
+		self._lock = threading.Lock()
+		self._socket = None
+		self._file = None
+
+
+	def _connect(self):
+		self._socket = socket.create_connection((self.host, self.port), timeout=self.timeout)
+		self._file = self._socket.makefile('rwb')
+
+
+	def _disconnect(self):
+		for resource in (self._file, self._socket):
+			if resource is not None:
+				try:
+					resource.close()
+				except OSError:
+					pass
+		self._socket = None
+		self._file = None
+
+
+	def call(self, method: str, **params):
+		"""
+		Calls a method of the backend in the server, reconnecting once if the connection was lost.
+
+		@param method The name of the method.
+		@param params The arguments of the method.
+		@return The value returned by the method.
+		"""
+
+		request = {'method': method, 'params': params}
+		if self.token:
+			request['auth'] = self.token
+		request = (json.dumps(request, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+		with self._lock:
+			for attempt in range(2):
+				try:
+					if self._file is None:
+						self._connect()
+					self._file.write(request)
+					self._file.flush()
+					line = self._file.readline()
+					if not line:
+						raise ConnectionError("The work queue server closed the connection")
+					break
+				except (OSError, ConnectionError):
+					self._disconnect()
+					if attempt == 1:
+						raise
+
+		response = json.loads(line)
+		if 'error' in response:
+			raise Exception(f"An error occurred in the work queue server: {response['error']}")
+		return response['result']
+
+
+	def put(self, items, max_attempts: int = None) -> int:
+		items = [list(item) if isinstance(item, (tuple, list)) else item for item in items]
+		return self.call('put', items=items, max_attempts=max_attempts)
+
+
+	def lease(self, worker: str, limit: int = 1, visibility_timeout: float = 60) -> list:
+		return self.call('lease', worker=worker, limit=limit, visibility_timeout=visibility_timeout)
+
+
+	def heartbeat(self, message_id: str, token: str, visibility_timeout: float = 60) -> bool:
+		return self.call('heartbeat', message_id=message_id, token=token, visibility_timeout=visibility_timeout)
+
+
+	def ack(self, message_id: str, token: str, result = None) -> bool:
+		return self.call('ack', message_id=message_id, token=token, result=result)
+
+
+	def nack(self, message_id: str, token: str, error: str = None, retry_delay: float = 0) -> bool:
+		return self.call('nack', message_id=message_id, token=token, error=error, retry_delay=retry_delay)
+
+
+	def counts(self) -> dict:
+		return self.call('counts')
+
+
+	def results(self, offset: int = 0, limit: int = 1000) -> list:
+		return [tuple(row) for row in self.call('results', offset=offset, limit=limit)]
+
+
+	def dead_letters(self, offset: int = 0, limit: int = 1000) -> list:
+		return self.call('dead_letters', offset=offset, limit=limit)
+
+
+	def requeue_dead(self) -> int:
+		return self.call('requeue_dead')
+
+
+	def close(self):
+		with self._lock:
+			self._disconnect()
+
+
+
+class _Heartbeat:
+	"""
+	Thread which extends the lease of the message in process, while the handler works on it.
+	"""
+
+	def __init__(self, queue: WorkQueueBackend, message: dict, visibility_timeout: float, interval: float):
+		self.lost = False
+		self._stop = threading.Event()
+
+		def beat():
+			while not self._stop.wait(interval):
+				try:
+					if not queue.heartbeat(message['id'], message['token'], visibility_timeout):
+						self.lost = True
+						return
+				except Exception as e:
+					print(f"An error occurred sending the heartbeat of '{message['id']}': {e}")
+
+		self._thread = threading.Thread(target=beat, daemon=True)
+		self._thread.start()
+
+
+	def stop(self):
+		self._stop.set()
+		self._thread.join()
+
+
+def run_queue_worker(queue: WorkQueueBackend, handler, download_folder: str, worker: str = None,
+		visibility_timeout: float = 120, heartbeat_interval: float = None, retry_delay: float = 30,
+		poll_interval: float = 5, stop_when_empty: bool = True, stop_event: threading.Event = None,
+		**connection_kwargs) -> dict:
+	"""
+	Processes the messages of a queue with a browser until the queue is empty or the stop event is set.
+
+	@param queue The backend, e.g. a RemoteWorkQueue.
+	@param handler A function called as handler(driver, payload, download_folder) which returns the result of the
+		message, e.g. the record of a page.
+	@param download_folder The download folder of the browser.
+	@param worker The name of the worker, defaults to '<host>-<process ID>'.
+	@param visibility_timeout The time in seconds of each lease.
+	@param heartbeat_interval The time in seconds between heartbeats, defaults to a third of the visibility timeout.
+	@param retry_delay The time in seconds before a failed message is leased again.
+	@param poll_interval The time in seconds to wait when there are no available messages.
+	@param stop_when_empty Whether to stop when there are no pending or leased messages.
+	@param stop_event Optional event to stop the worker from another thread.
+	@param connection_kwargs Other arguments passed to 'create_browser_connection'.
+	@return A dictionary with the number of messages 'done', 'failed' and 'lost'.
+	"""
+
+	import src.browser_web_scrapping as browser_ws
+
+	worker = f"{socket.gethostname()}-{os.getpid()}" if worker is None else worker
+	heartbeat_interval = visibility_timeout / 3 if heartbeat_interval is None else heartbeat_interval
+	summary = {'done': 0, 'failed': 0, 'lost': 0}
+
+	os.makedirs(download_folder, exist_ok=True)
+	driver = browser_ws.create_browser_connection(download_folder, **connection_kwargs)
+	try:
+		while stop_event is None or not stop_event.is_set():
+			messages = queue.lease(worker, limit=1, visibility_timeout=visibility_timeout)
+			if len(messages) == 0:
+				counts = queue.counts()
+				if stop_when_empty and counts[PENDING] == 0 and counts[LEASED] == 0:
+					break
+				time.sleep(poll_interval)
+				continue
+
+			message = messages[0]
+			heartbeat = _Heartbeat(queue, message, visibility_timeout, heartbeat_interval)
+			try:
+				result = handler(driver, message['payload'], download_folder)
+				error = None
+			except Exception as e:
+				error = e
+			finally:
+				heartbeat.stop()
+
+			if error is None:
+				acknowledged = queue.ack(message['id'], message['token'], result)
+				summary['done' if acknowledged else 'lost'] += 1
+			else:
+				print(f"An error occurred in {worker} processing '{message['id']}': {error}")
+				acknowledged = queue.nack(message['id'], message['token'], str(error), retry_delay)
+				summary['failed' if acknowledged else 'lost'] += 1
+	finally:
+		driver.quit()
+
+	return summary
+
+
+def _queue_from_arguments(args) -> WorkQueueBackend:
+	if args.server is not None:
+		host, _, port = args.server.rpartition(':')
+		return RemoteWorkQueue(host, int(port), token=args.token)
+	return SqliteWorkQueue(args.database)
+
+
+def main(argv: list = None):
+	"""
+	Entry point of the command line, run it with 'python -m src.work_queue --help'.
+
+	@param argv The arguments, defaults to the ones of the command line.
+	"""
+
+	from src.crawl_runner import load_handler, read_input_items
+	from src.record_sink import RecordSink
+	from src.session_store import SessionStore
+
+	parser = argparse.ArgumentParser(description="Work queue shared by the scrappers of several hosts")
+	commands = parser.add_subparsers(dest='command', required=True)
+
+	def add_token_argument(command):
+		command.add_argument('--token', default=os.environ.get(token_environment_variable),
+			help=f"Shared token of the queue server, defaults to the environment variable {token_environment_variable}")
+
+	def add_queue_arguments(command):
+		command.add_argument('--server', help="Address 'host:port' of the queue server")
+		command.add_argument('--database', default=os.path.join('dat', 'queue.sqlite'), help="SQLite database of a local queue")
+		add_token_argument(command)
+
+	serve = commands.add_parser('serve', help="Serve a SQLite queue with TCP")
+	serve.add_argument('--database', default=os.path.join('dat', 'queue.sqlite'), help="SQLite database of the queue")
+	serve.add_argument('--host', default=DEFAULT_SERVER_HOST, help="Address where the server listens, other than "
+		"the loopback address requires a token")
+	serve.add_argument('--port', type=int, default=8765, help="Port of the server")
+	serve.add_argument('--max-attempts', type=int, default=3, help="Leases of a message before it is a dead letter")
+	add_token_argument(serve)
+
+	enqueue = commands.add_parser('enqueue', help="Add the URLs of a CSV to the queue")
+	add_queue_arguments(enqueue)
+	enqueue.add_argument('input_csv', help="CSV with the URLs")
+	enqueue.add_argument('--url-column', default='URL', help="Column of the URLs")
+	enqueue.add_argument('--id-column', help="Column of the IDs, the URL is the ID by default")
+	enqueue.add_argument('--delimiter', default=',', help="Delimiter of the CSV")
+
+	work = commands.add_parser('work', help="Process the queue with a browser")
+	add_queue_arguments(work)
+	work.add_argument('--handler', required=True, help="Function which reads a page, as 'module:function'")
+	work.add_argument('--download-folder', default=os.path.join('dat', 'downloads'), help="Download folder of the browser")
+	work.add_argument('--browser', default='Firefox', help="Browser of the worker")
+	work.add_argument('--performance-profile', help="Performance profile of the browser, e.g. 'fast'")
+	work.add_argument('--session-store', help="Folder of the saved sessions (see src/session_store.py) restored in the browser")
+	work.add_argument('--session-url', nargs='*', default=[], help="URLs whose saved sessions are restored in the browser")
+	work.add_argument('--visibility-timeout', type=float, default=120, help="Time in seconds of each lease")
+	work.add_argument('--keep-polling', action='store_true', help="Wait for new messages when the queue is empty")
+
+	status = commands.add_parser('status', help="Print the number of messages in each status and the dead letters")
+	add_queue_arguments(status)
+
+	export = commands.add_parser('export', help="Write the results in a CSV, JSONL or Parquet file")
+	add_queue_arguments(export)
+	export.add_argument('output', help="Output file")
+	export.add_argument('--delimiter', default=',', help="Delimiter of a CSV output")
+
+	args = parser.parse_args(argv)
+
+	if args.command == 'serve':
+		with SqliteWorkQueue(args.database, max_attempts=args.max_attempts) as backend:
+			server = WorkQueueServer(backend, args.host, args.port, token=args.token)
+			print(f"Serving the queue '{args.database}' in {server.address[0]}:{server.address[1]}")
+			try:
+				server.serve_forever()
+			except KeyboardInterrupt:
+				pass
+			finally:
+				server.server.server_close()
+		return
+
+	with _queue_from_arguments(args) as queue:
+		if args.command == 'enqueue':
+			added = queue.put(read_input_items(args.input_csv, args.url_column, args.id_column, args.delimiter))
+			print(f"{added} new messages, state of the queue: {queue.counts()}")
+
+		elif args.command == 'work':
+			session_kwargs = {}
+			if args.session_store is not None:
+				session_kwargs = {'session_store': SessionStore(args.session_store), 'session_urls': args.session_url}
+			summary = run_queue_worker(queue, load_handler(args.handler), args.download_folder,
+				visibility_timeout=args.visibility_timeout, stop_when_empty=not args.keep_polling,
+				browser=args.browser, performance_profile=args.performance_profile, **session_kwargs)
+			print(f"Messages processed by this worker: {summary}")
+
+		elif args.command == 'status':
+			print(f"State of the queue: {queue.counts()}")
+			for message in queue.dead_letters():
+				print(f"Dead letter '{message['id']}' after {message['attempts']} attempts: {message['error']}")
+
+		elif args.command == 'export':
+			def all_results():
+				offset = 0
+				while True:
+					rows = queue.results(offset=offset)
+					if len(rows) == 0:
+						break
+					for message_id, result in rows:
+						yield {'ID': message_id, **(result or {})}
+					offset += len(rows)
+
+			# The columns are all the fields of the results, the output replaces the previous one at the end
+			fieldnames = list(dict.fromkeys(field for record in all_results() for field in record))
+			with RecordSink(args.output, fieldnames=fieldnames, delimiter=args.delimiter, atomic=True) as sink:
+				exported = 0
+				for record in all_results():
+					sink.push(record)
+					exported += 1
+			print(f"{exported} results written in '{args.output}'")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,10 @@
+"""
+@file tests/__init__.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the helpers, run them from the root of the repository with 'python -m pytest tests'
+
+The browser is replaced by the FakeWebDriver and the sites by the LocalSite of 'benchmarks', so the tests need
+neither network access nor a browser.
+"""
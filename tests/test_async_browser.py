@@ -0,0 +1,118 @@
+"""
+@file tests/test_async_browser.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the asyncio facade: same behavior as the helpers, in the thread of the driver
+"""
+
+
+import asyncio
+import threading
+
+import pytest
+
+# The fake driver evaluates the locators with lxml, the fake elements are Selenium elements
+pytest.importorskip('lxml')
+pytest.importorskip('selenium')
+
+import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+from src.async_browser import AsyncDriver
+from src.rate_limiter import RateLimiter
+from src.snapshot_archive import SnapshotArchive, SnapshotRecorder
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.local_site import LocalSite
+
+
+xpath_drawer_button = "//button[@id='drawer-control-0']"
+
+
+@pytest.fixture(scope='module')
+def site():
+	with LocalSite() as local_site:
+		yield local_site
+
+
+def object_url(site, object_id: int = 1000) -> str:
+	return f"{site.base_url}/collection/art-object-page.{object_id}.html"
+
+
+def test_login_records_the_page_and_binds_the_rate_limiter(site, tmp_path):
+	driver = FakeWebDriver()
+	limiter = RateLimiter(initial_rate=20, burst=5)
+
+	async def login():
+		async with AsyncDriver(driver) as async_driver:
+			with SnapshotArchive(str(tmp_path / 'pages.wsa')) as archive:
+				await async_driver.login_to_url(object_url(site), wait_condition=browser_ws.document_ready(),
+					rate_limiter=limiter, snapshot_recorder=SnapshotRecorder(archive))
+				return [entry['url'] for entry in archive.entries()]
+
+	assert asyncio.run(login()) == [object_url(site)]
+	assert limiter.host_of(driver) is not None
+	assert limiter.get_state(object_url(site))['in_flight'] == 0
+
+
+def test_find_and_click_use_the_element_cache(site):
+	driver = FakeWebDriver()
+	browser_ws.enable_element_cache(driver)
+
+	async def find_twice_and_click():
+		async with AsyncDriver(driver) as async_driver:
+			await async_driver.login_to_url(object_url(site))
+			first = await async_driver.find_element_in_driver(By.XPATH, xpath_drawer_button)
+			second = await async_driver.find_element_in_driver(By.XPATH, xpath_drawer_button, wait_condition='visible')
+
+			# A navigation which the helpers do not see, the stale cached button is searched again to click it
+			await async_driver.run(driver.get, object_url(site))
+			return first, second, await async_driver.click_element_in_driver(first)
+
+	first, second, clicked = asyncio.run(find_twice_and_click())
+	assert first is not None and second is first and clicked
+	assert browser_ws.element_cache_of(driver).stats()['hits'] >= 1
+
+
+def test_calls_run_in_the_thread_of_the_driver_in_order(site):
+	driver = FakeWebDriver()
+	threads = []
+
+	def visit(url: str):
+		threads.append(threading.current_thread().name)
+		driver.get(url)
+		return driver.current_url
+
+	async def visit_all(async_driver):
+		return await asyncio.gather(*(async_driver.run(visit, object_url(site, object_id)) for object_id in range(1000, 1004)))
+
+	async def run():
+		async with AsyncDriver(driver) as async_driver:
+			return await visit_all(async_driver)
+
+	assert asyncio.run(run()) == [object_url(site, object_id) for object_id in range(1000, 1004)]
+	assert len(set(threads)) == 1 and threads[0] != threading.current_thread().name
+
+
+def test_failed_login_closes_the_driver(site):
+	driver = FakeWebDriver()
+
+	async def login():
+		async_driver = AsyncDriver(driver)
+		with pytest.raises(Exception, match='logging in'):
+			await async_driver.login_to_url(f"{site.base_url}/not-found.html")
+		with pytest.raises(RuntimeError):
+			await async_driver.run(driver.get, object_url(site))
+
+	asyncio.run(login())
+	assert driver.window_handles == []
+
+
+def test_wait_for_condition_times_out():
+	from selenium.common.exceptions import TimeoutException
+
+	async def wait():
+		async with AsyncDriver(FakeWebDriver()) as async_driver:
+			await async_driver.wait_for_condition(lambda driver: False, timeout=0.1, poll_frequency=0.02)
+
+	with pytest.raises(TimeoutException):
+		asyncio.run(wait())
@@ -0,0 +1,119 @@
+"""
+@file tests/test_conditions.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the wait conditions and of 'wait_for_condition'
+"""
+
+
+import pytest
+
+# The conditions are the expected conditions of Selenium, the fake driver evaluates the locators with lxml
+pytest.importorskip('lxml')
+pytest.importorskip('selenium')
+
+from selenium.common.exceptions import TimeoutException
+
+import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.local_site import LocalSite
+
+
+drawer_button = (By.ID, 'drawer-control-0')
+drawer_content = (By.ID, 'drawer-content-0')
+
+
+@pytest.fixture(scope='module')
+def site():
+	with LocalSite() as local_site:
+		yield local_site
+
+
+@pytest.fixture
+def driver(site):
+	fake_driver = FakeWebDriver()
+	fake_driver.get(object_url(site))
+	return fake_driver
+
+
+def object_url(site, object_id: int = 1000) -> str:
+	return f"{site.base_url}/collection/art-object-page.{object_id}.html"
+
+
+def wait(driver, condition, timeout: float = 0.3):
+	return browser_ws.wait_for_condition(driver, condition, timeout=timeout, poll_frequency=0.02)
+
+
+class ScriptDriver:
+	"""
+	Driver whose scripts return the given values, one per call.
+	"""
+
+	def __init__(self, values: list):
+		self.values = list(values)
+		self.calls = []
+
+	def execute_script(self, script: str, *args):
+		self.calls.append((script, args))
+		return self.values.pop(0) if len(self.values) > 1 else self.values[0]
+
+
+def test_present_element_is_returned(driver):
+	button = wait(driver, browser_ws.element_present(*drawer_button))
+	assert button.get_attribute('id') == 'drawer-control-0'
+
+	with pytest.raises(TimeoutException):
+		wait(driver, browser_ws.element_present(By.ID, 'missing'))
+
+
+def test_hidden_element_is_present_but_not_visible(driver):
+	assert wait(driver, browser_ws.element_present(*drawer_content)) is not None
+	with pytest.raises(TimeoutException):
+		wait(driver, browser_ws.element_visible(*drawer_content))
+
+	wait(driver, browser_ws.element_clickable(*drawer_button)).click()
+	content = wait(driver, browser_ws.element_visible(*drawer_content))
+	assert 'Description of the painting' in content.text
+	assert wait(driver, browser_ws.element_visible(content)) is content
+
+
+def test_clickable_element_given_as_element(driver):
+	button = driver.find_element(*drawer_button)
+	assert wait(driver, browser_ws.element_clickable(button)) is button
+
+
+def test_element_is_stale_after_a_navigation(site, driver):
+	button = driver.find_element(*drawer_button)
+	with pytest.raises(TimeoutException):
+		wait(driver, browser_ws.element_stale(button))
+
+	driver.get(object_url(site, 1001))
+	assert wait(driver, browser_ws.element_stale(button))
+
+
+def test_url_changes(site, driver):
+	with pytest.raises(TimeoutException):
+		wait(driver, browser_ws.url_changes(object_url(site)))
+
+	driver.get(object_url(site, 1001))
+	assert wait(driver, browser_ws.url_changes(object_url(site)))
+
+
+def test_document_ready():
+	assert wait(ScriptDriver(['loading', 'loading', 'complete']), browser_ws.document_ready())
+	assert wait(ScriptDriver(['interactive']), browser_ws.document_ready(('interactive', 'complete')))
+	with pytest.raises(TimeoutException):
+		wait(ScriptDriver(['interactive']), browser_ws.document_ready())
+
+
+def test_js_predicate_returns_the_value_of_the_script():
+	driver = ScriptDriver([None, 0, {'rows': 3}])
+	assert wait(driver, browser_ws.js_predicate('return window.rows;', 'argument')) == {'rows': 3}
+	assert len(driver.calls) == 3
+	assert driver.calls[0] == ('return window.rows;', ('argument',))
+
+
+def test_locator_conditions():
+	assert set(browser_ws.locator_conditions) == {'present', 'visible', 'clickable'}
@@ -0,0 +1,91 @@
+"""
+@file tests/test_crawl_runner.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the shards of the crawl runner: records with different fields and runs of the job done again
+"""
+
+
+import csv
+import json
+
+import pytest
+
+# The workers run in this process with the fake driver instead of a browser
+pytest.importorskip('lxml')
+pytest.importorskip('selenium')
+
+import src.crawl_runner as crawl_runner
+from src.job_state import JobStateStore, DONE
+from benchmarks.fake_webdriver import FakeWebDriver
+
+
+# Fields of the records read by 'read_page', each page has different ones
+page_fields = {
+	'a': {'Title': 'A'},
+	'b': {'Author': 'X', 'Date': '1900'},
+	'c': {'Title': 'C', 'Medium': 'Oil'}
+}
+
+
+def read_page(driver, url, download_folder) -> dict:
+	return dict(page_fields[url.rsplit('/', 1)[1]])
+
+
+@pytest.fixture
+def settings(tmp_path, monkeypatch):
+	monkeypatch.setattr(crawl_runner.browser_ws, 'create_browser_connection', lambda folder, **kwargs: FakeWebDriver())
+	settings = {
+		'handler': f"{__name__}:read_page",
+		'work_folder': str(tmp_path),
+		'job_state_path': str(tmp_path / 'jobs.sqlite'),
+		'shard_folder': str(tmp_path / 'shards'),
+		'claim_size': 2,
+		'checkpoint_every': 2,
+		'id_field': 'ID',
+		'connection_kwargs': {}
+	}
+	(tmp_path / 'shards').mkdir()
+	with JobStateStore(settings['job_state_path']) as job_state:
+		job_state.add_items((item_id, f"http://site/{item_id}") for item_id in page_fields)
+	return settings
+
+
+def read_csv(path) -> list:
+	with open(path, encoding='utf-8', newline='') as file:
+		return list(csv.DictReader(file))
+
+
+def test_shard_of_records_with_different_fields(settings, tmp_path):
+	crawl_runner.run_worker('worker-0.0', settings)
+
+	with open(tmp_path / 'shards' / 'worker-0.0.jsonl', encoding='utf-8') as file:
+		records = [json.loads(line) for line in file]
+	assert records == [{'ID': item_id, **fields} for item_id, fields in page_fields.items()]
+	with JobStateStore(settings['job_state_path']) as job_state:
+		assert job_state.counts()[DONE] == 3
+
+	output = str(tmp_path / 'data.csv')
+	assert crawl_runner.merge_shards(settings, output) == 3
+	rows = read_csv(output)
+	assert list(rows[0]) == ['ID', 'Title', 'Author', 'Date', 'Medium']
+	assert [row['ID'] for row in rows] == ['a', 'b', 'c']
+
+
+def test_new_run_does_not_append_to_the_previous_shards(settings, tmp_path):
+	# A previous run wrote the record of 'a' and stopped before marking it as done
+	with open(tmp_path / 'shards' / 'worker-0.0.jsonl', 'w', encoding='utf-8') as file:
+		file.write(json.dumps({'ID': 'a', 'Title': 'partial'}) + '\n')
+
+	runs = crawl_runner.next_runs(settings['shard_folder'], ['worker-0', 'worker-1'])
+	assert runs == {'worker-0': 1, 'worker-1': 0}
+
+	crawl_runner.run_worker(f"worker-0.{runs['worker-0']}", settings)
+	output = str(tmp_path / 'data.csv')
+	assert crawl_runner.merge_shards(settings, output) == 3
+	assert [(row['ID'], row['Title']) for row in read_csv(output)] == [('a', 'A'), ('b', ''), ('c', 'C')]
+
+	# Merging again replaces the output
+	assert crawl_runner.merge_shards(settings, output) == 3
+	assert len(read_csv(output)) == 3
@@ -0,0 +1,108 @@
+"""
+@file tests/test_download_watcher.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the detection of the finished downloads, with inotify and with polling
+"""
+
+
+import os
+import asyncio
+
+import pytest
+
+from src.download_watcher import DownloadWatcher, DownloadTimeout
+from src.step_flow import StepFlow
+
+
+def write(folder, name: str, content: str = 'data') -> str:
+	path = os.path.join(folder, name)
+	with open(path, 'w') as file:
+		file.write(content)
+	return path
+
+
+@pytest.fixture(params=[True, False], ids=['inotify', 'polling'])
+def use_inotify(request):
+	return request.param
+
+
+def test_files_present_before_the_watcher_are_ignored(tmp_path, use_inotify):
+	write(tmp_path, 'old.pdf')
+
+	with DownloadWatcher(str(tmp_path), use_inotify=use_inotify) as watcher:
+		new_path = write(tmp_path, 'new.pdf')
+		assert watcher.wait(timeout=5, stable_time=0.05, poll_interval=0.02) == [new_path]
+
+
+def test_each_download_is_reported_once(tmp_path, use_inotify):
+	with DownloadWatcher(str(tmp_path), use_inotify=use_inotify) as watcher:
+		write(tmp_path, 'a.pdf')
+		with pytest.raises(TimeoutError):
+			watcher.wait(expected_count=2, timeout=0.5, stable_time=0.05, poll_interval=0.02)
+
+		second_path = write(tmp_path, 'b.pdf')
+		assert watcher.wait(timeout=5, stable_time=0.05, poll_interval=0.02) == [second_path]
+
+
+def test_timeout_keeps_the_finished_downloads(tmp_path, use_inotify):
+	with DownloadWatcher(str(tmp_path), use_inotify=use_inotify) as watcher:
+		first_path = write(tmp_path, 'a.pdf')
+		with pytest.raises(DownloadTimeout) as error:
+			watcher.wait(expected_count=2, timeout=0.3, stable_time=0.05, poll_interval=0.02)
+		assert isinstance(error.value, TimeoutError)
+		assert error.value.finished == [first_path]
+
+		second_path = write(tmp_path, 'b.pdf')
+		with pytest.raises(DownloadTimeout) as error:
+			asyncio.run(watcher.wait_async(expected_count=2, timeout=0.3, stable_time=0.05, poll_interval=0.02))
+		assert error.value.finished == [second_path]
+
+
+def test_retried_step_waits_only_the_missing_downloads(tmp_path):
+	flow = StepFlow([{'action': 'await_download', 'expected_count': 2, 'timeout': 0.3, 'stable_time': 0.05}],
+		download_folder=str(tmp_path))
+	state = flow.run(None)
+	write(tmp_path, 'a.pdf')
+
+	# The first download finished during the failed attempt, the resumed run waits only the second one
+	state = flow.run(None, state)
+	assert isinstance(state.error, DownloadTimeout) and state.downloads == [os.path.join(tmp_path, 'a.pdf')]
+
+	write(tmp_path, 'b.pdf')
+	state = flow.run(None, state)
+	assert state.completed
+	assert state.downloads == [os.path.join(tmp_path, 'a.pdf'), os.path.join(tmp_path, 'b.pdf')]
+
+
+def test_several_downloads(tmp_path, use_inotify):
+	with DownloadWatcher(str(tmp_path), use_inotify=use_inotify) as watcher:
+		paths = [write(tmp_path, f"{name}.pdf") for name in ('a', 'b', 'c')]
+		finished = watcher.wait(expected_count=3, timeout=5, stable_time=0.05, poll_interval=0.02)
+		assert sorted(finished) == sorted(paths)
+
+
+def test_download_in_progress_is_not_finished(tmp_path, use_inotify):
+	with DownloadWatcher(str(tmp_path), use_inotify=use_inotify) as watcher:
+		# Firefox writes the '.part' file and creates the final file empty
+		write(tmp_path, 'report.pdf.part')
+		write(tmp_path, 'report.pdf', '')
+		with pytest.raises(TimeoutError):
+			watcher.wait(timeout=0.3, stable_time=0.05, poll_interval=0.02)
+
+		os.replace(os.path.join(tmp_path, 'report.pdf.part'), os.path.join(tmp_path, 'report.pdf'))
+		assert watcher.wait(timeout=5, stable_time=0.05, poll_interval=0.02) == [os.path.join(tmp_path, 'report.pdf')]
+
+
+def test_wait_async(tmp_path, use_inotify):
+	async def download_and_wait(watcher):
+		waiting = asyncio.ensure_future(watcher.wait_async(expected_count=2, timeout=5, stable_time=0.05,
+			poll_interval=0.02))
+		await asyncio.sleep(0.05)
+		paths = [write(tmp_path, 'a.pdf'), write(tmp_path, 'b.pdf')]
+		return paths, await waiting
+
+	with DownloadWatcher(str(tmp_path), use_inotify=use_inotify) as watcher:
+		paths, finished = asyncio.run(download_and_wait(watcher))
+		assert sorted(finished) == sorted(paths)
@@ -0,0 +1,77 @@
+"""
+@file tests/test_driver_pool.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the driver pool: reuse of the drivers and their recycling after the page loads of both navigations
+"""
+
+
+import pytest
+
+# The pool launches fake drivers, which read the pages of the local site with lxml
+pytest.importorskip('lxml')
+pytest.importorskip('selenium')
+
+from src import driver_pool
+from src.driver_pool import DriverPool, note_page_load
+from src.tab_multiplexer import TabMultiplexer
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.local_site import LocalSite
+
+
+@pytest.fixture(scope='module')
+def site():
+	with LocalSite() as local_site:
+		yield local_site
+
+
+@pytest.fixture
+def launched(monkeypatch):
+	drivers = []
+
+	def create_browser_connection(download_folder, browser, pref_dict, **kwargs):
+		drivers.append(FakeWebDriver())
+		return drivers[-1]
+
+	monkeypatch.setattr(driver_pool.browser_ws, 'create_browser_connection', create_browser_connection)
+	return drivers
+
+
+def object_url(site, object_id: int) -> str:
+	return f"{site.base_url}/collection/art-object-page.{object_id}.html"
+
+
+def test_driver_is_reused_until_its_page_loads(site, launched, tmp_path):
+	with DriverPool(1, str(tmp_path), max_page_loads=3) as pool:
+		with pool.driver() as driver:
+			driver.get(object_url(site, 1000))
+			driver.get(object_url(site, 1001))
+		with pool.driver() as driver:
+			assert driver is launched[0]
+			driver.get(object_url(site, 1002))
+
+		with pool.driver() as driver:
+			assert driver is launched[1]
+		assert launched[0] not in pool._drivers and len(launched) == 2
+
+
+def test_multiplexer_navigations_recycle_the_driver(site, launched, tmp_path):
+	with DriverPool(1, str(tmp_path), max_page_loads=3) as pool:
+		with pool.driver() as driver:
+			with TabMultiplexer(driver, tabs=2, poll_interval=0.005, timeout=5) as multiplexer:
+				urls = [object_url(site, object_id) for object_id in range(1000, 1003)]
+				results = list(multiplexer.process(urls, lambda driver, url: driver.title))
+			assert all(error is None for url, result, error in results)
+			assert pool._page_loads[id(driver)] == 3
+
+		with pool.driver() as driver:
+			assert driver is launched[1]
+
+
+def test_page_loads_of_other_drivers_are_ignored(launched, tmp_path):
+	with DriverPool(1, str(tmp_path), max_page_loads=1) as pool:
+		note_page_load(FakeWebDriver())
+		note_page_load(object())
+		with pool.driver() as driver:
+			assert driver is launched[0]
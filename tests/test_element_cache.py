@@ -0,0 +1,145 @@
+"""
+@file tests/test_element_cache.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the element cache: scope by window and frame, eviction and invalidation of the stale elements
+"""
+
+
+import pytest
+
+# The fake driver and the local site evaluate the locators with lxml, the fake elements are Selenium elements
+pytest.importorskip('lxml')
+pytest.importorskip('selenium')
+
+import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By, ElementCache
+from src.step_flow import StepFlow
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.local_site import LocalSite
+
+
+xpath_frame = "//iframe[@id='WacFrame_Word_0']"
+xpath_file_menu = "//button[@id='FileMenuFlyoutLauncher']"
+xpath_drawer_button = "//button[@id='drawer-control-0']"
+
+
+@pytest.fixture(scope='module')
+def site():
+	with LocalSite() as local_site:
+		yield local_site
+
+
+@pytest.fixture
+def driver():
+	fake_driver = FakeWebDriver()
+	browser_ws.enable_element_cache(fake_driver)
+	yield fake_driver
+	browser_ws.disable_element_cache(fake_driver)
+
+
+def document_url(site) -> str:
+	return f"{site.base_url}/sites/docs/Document.aspx"
+
+
+def object_url(site) -> str:
+	return f"{site.base_url}/collection/art-object-page.1000.html"
+
+
+def test_cache_is_scoped_by_window_and_frame():
+	cache = ElementCache(max_size=2)
+	cache.switch_window('window-1')
+	cache.put(By.ID, 'a', 'element-a')
+	assert cache.get(By.ID, 'a') == 'element-a'
+
+	cache.enter_frame('frame')
+	assert cache.get(By.ID, 'a') is None
+	cache.leave_frames()
+	cache.switch_window('window-2')
+	assert cache.get(By.ID, 'a') is None
+
+	cache.switch_window('window-1')
+	assert cache.locator_of('element-a') == (By.ID, 'a')
+	cache.clear(window='window-1')
+	assert cache.get(By.ID, 'a') is None
+
+
+def test_least_recently_used_element_is_evicted():
+	cache = ElementCache(max_size=2)
+	cache.put(By.ID, 'a', 'element-a')
+	cache.put(By.ID, 'b', 'element-b')
+	cache.get(By.ID, 'a')
+	cache.put(By.ID, 'c', 'element-c')
+
+	assert cache.get(By.ID, 'b') is None
+	assert cache.get(By.ID, 'a') == 'element-a'
+	assert cache.stats()['evictions'] == 1
+
+
+def test_repeated_search_returns_the_cached_element(site, driver):
+	browser_ws.login_to_url(driver, object_url(site))
+	first = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_button)
+
+	round_trips = driver.round_trips
+	assert browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_button, wait_condition='visible') is first
+	assert driver.round_trips - round_trips == 1
+
+
+def test_login_to_url_clears_the_cache(site, driver):
+	browser_ws.login_to_url(driver, object_url(site))
+	browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_button)
+
+	browser_ws.login_to_url(driver, object_url(site))
+	assert browser_ws.element_cache_of(driver).stats()['size'] == 0
+
+
+@pytest.mark.parametrize('wait_condition', [None, 'present', 'visible', 'clickable'])
+def test_stale_cached_element_is_searched_again(site, driver, wait_condition):
+	browser_ws.login_to_url(driver, object_url(site))
+	first = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_button)
+
+	# A navigation which the helpers do not see
+	driver.get(object_url(site))
+	found = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_button, wait_condition=wait_condition)
+	assert found is not None and found is not first
+	assert found.is_enabled()
+
+
+def test_stale_cached_element_is_clicked_again(site, driver):
+	browser_ws.login_to_url(driver, object_url(site))
+	button = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_drawer_button)
+
+	driver.get(object_url(site))
+	assert browser_ws.click_element_in_driver(button, driver=driver)
+
+
+def test_stale_cached_frame_is_searched_again(site, driver):
+	browser_ws.login_to_url(driver, document_url(site))
+	frame = browser_ws.find_element_in_driver(driver, By.XPATH, xpath_frame)
+
+	driver.get(document_url(site))
+	assert browser_ws.switch_to_frame_in_browser(driver, frame)
+	assert browser_ws.find_element_in_driver(driver, By.XPATH, xpath_file_menu) is not None
+
+
+def test_fake_driver_rejects_stale_frames(site):
+	fake_driver = FakeWebDriver()
+	browser_ws.login_to_url(fake_driver, document_url(site))
+	frame = browser_ws.find_element_in_driver(fake_driver, By.XPATH, xpath_frame)
+
+	fake_driver.get(document_url(site))
+	assert not browser_ws.switch_to_frame_in_browser(fake_driver, frame)
+
+
+def test_step_flow_navigations_clear_the_cache(site, driver):
+	flow = StepFlow([
+		{'action': 'navigate', 'url': document_url(site)},
+		{'action': 'switch_frame', 'locator': (By.XPATH, xpath_frame)},
+		{'action': 'find', 'locator': (By.XPATH, xpath_file_menu)},
+		{'action': 'return_frame'}
+	])
+
+	for _ in range(2):
+		state = flow.run(driver)
+		assert state.completed, state.error
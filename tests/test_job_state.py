@@ -0,0 +1,103 @@
+"""
+@file tests/test_job_state.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the job state store: claims, retries of the failed items and restart after a stopped job
+"""
+
+
+import multiprocessing
+
+import pytest
+
+from src.job_state import JobStateStore, PENDING, IN_PROGRESS, DONE, FAILED
+
+
+@pytest.fixture
+def store(tmp_path):
+	with JobStateStore(str(tmp_path / 'jobs.sqlite')) as job_state:
+		yield job_state
+
+
+def claim_all(path: str, worker: str, queue):
+	with JobStateStore(path) as job_state:
+		claimed = []
+		while True:
+			items = job_state.claim(worker, limit=3)
+			if not items:
+				break
+			claimed.extend(item_id for item_id, _ in items)
+		queue.put(claimed)
+
+
+def test_add_items_ignores_the_ids_already_in_the_store(store):
+	assert store.add_items([('a', {'url': 'http://site/a'}), 'b']) == 2
+	assert store.add_items(['a', 'c']) == 1
+	assert store.counts() == {PENDING: 3, IN_PROGRESS: 0, DONE: 0, FAILED: 0}
+	assert store.get_item('a')['payload'] == {'url': 'http://site/a'}
+	assert store.get_item('missing') is None
+
+
+def test_claimed_items_are_not_claimed_again(store):
+	store.add_items(['a', 'b', 'c'])
+
+	assert store.claim('worker-1', limit=2) == [('a', None), ('b', None)]
+	assert store.claim('worker-2', limit=2) == [('c', None)]
+	assert store.claim('worker-2') == []
+
+	item = store.get_item('a')
+	assert item['status'] == IN_PROGRESS and item['worker'] == 'worker-1' and item['attempts'] == 1
+
+
+def test_done_and_failed_items(store):
+	store.add_items(['a', 'b'])
+	store.claim('worker-1', limit=2)
+	store.mark_done('a')
+	store.mark_failed('b', 'broken page')
+
+	assert store.is_done('a') and not store.is_done('b')
+	assert store.get_item('b')['error'] == 'broken page'
+	assert store.get_item('a')['duration'] >= 0
+	assert store.item_workers(DONE) == {'a': 'worker-1'}
+
+	assert store.retry_failed(max_attempts=1) == 0
+	assert store.retry_failed() == 1
+	assert store.claim('worker-2') == [('b', None)]
+	assert store.get_item('b')['attempts'] == 2
+
+
+def test_items_of_a_stopped_worker_are_pending_again(store):
+	store.add_items(['a', 'b', 'c'])
+	store.claim('worker-1')
+	store.claim('worker-2')
+
+	assert store.reset_in_progress('worker-1') == 1
+	assert store.get_item('a')['status'] == PENDING and store.get_item('a')['worker'] is None
+	assert store.reset_in_progress() == 1
+	assert store.counts()[PENDING] == 3
+
+
+def test_iter_items_in_batches(store):
+	store.add_items([(str(index), index) for index in range(10)])
+	store.claim(limit=4)
+
+	assert list(store.iter_items(batch_size=3)) == [(str(index), index) for index in range(10)]
+	assert [item_id for item_id, _ in store.iter_items(PENDING, batch_size=4)] == [str(index) for index in range(4, 10)]
+
+
+def test_processes_do_not_claim_the_same_items(tmp_path):
+	path = str(tmp_path / 'jobs.sqlite')
+	with JobStateStore(path) as job_state:
+		job_state.add_items(str(index) for index in range(60))
+
+	context = multiprocessing.get_context('spawn')
+	queue = context.Queue()
+	processes = [context.Process(target=claim_all, args=(path, f"worker-{index}", queue)) for index in range(3)]
+	for process in processes:
+		process.start()
+	claimed = [item_id for _ in processes for item_id in queue.get(timeout=60)]
+	for process in processes:
+		process.join()
+
+	assert sorted(claimed, key=int) == [str(index) for index in range(60)]
@@ -0,0 +1,52 @@
+"""
+@file tests/test_locators.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the translation of the locators to XPath and CSS, with quotes and accents in the values
+"""
+
+
+import pytest
+
+from src.browser_web_scrapping import By, xpath_literal, css_string, locator_to_xpath_or_css
+
+
+values = ['Peinture à l’huile', "Van Gogh's room", 'The "Starry" night', 'It\'s "quoted"', 'Ñandú']
+
+
+@pytest.mark.parametrize('value', values)
+def test_xpath_literal(value):
+	etree = pytest.importorskip('lxml.etree')
+	assert etree.XPath(f"string({xpath_literal(value)})")(etree.fromstring('<a/>')) == value
+
+
+@pytest.mark.parametrize('value', values)
+@pytest.mark.parametrize('type_element', [By.LINK_TEXT, By.PARTIAL_LINK_TEXT])
+def test_link_text_locators_find_the_link(value, type_element):
+	html = pytest.importorskip('lxml.html')
+	document = html.fromstring("<div><a href='/other'>Other</a><a href='/link'></a></div>")
+	document.xpath("//a[@href='/link']")[0].text = f" {value} "
+
+	kind, locator = locator_to_xpath_or_css(type_element, value if type_element == By.LINK_TEXT else value[2:-2])
+	assert kind == 'xpath'
+	assert [link.get('href') for link in document.xpath(locator)] == ['/link']
+
+
+def test_css_string_escapes_the_quotes():
+	assert css_string('plain') == '"plain"'
+	assert css_string('a"b\\c') == '"a\\"b\\\\c"'
+	assert css_string('line\nbreak') == '"line\\a break"'
+
+
+@pytest.mark.parametrize('value', values + ['back\\slash'])
+@pytest.mark.parametrize('type_element', [By.ID, By.NAME])
+def test_id_and_name_locators_find_the_element(value, type_element):
+	html = pytest.importorskip('lxml.html')
+	static_fetcher = pytest.importorskip('src.static_fetcher')
+	document = html.fromstring("<div><input name='other' id='other'/><input/></div>")
+	document.xpath('//input')[1].set(type_element, value)
+
+	kind, locator = locator_to_xpath_or_css(type_element, value)
+	assert kind == 'css' and locator.startswith(f"[{type_element}=\"")
+	assert static_fetcher.find_nodes(document, type_element, value) == [document.xpath('//input')[1]]
@@ -0,0 +1,112 @@
+"""
+@file tests/test_network_capture.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the capture of the JSON responses, with the performance log of DevTools and with the page hook
+"""
+
+
+import re
+
+import pytest
+
+from src.network_capture import NetworkCapture, url_pattern_regex, parse_body, capture_json_from_url
+
+
+class HookDriver:
+	"""
+	Driver without DevTools whose page returns the given responses to the hook, or raises if 'error' is set.
+	"""
+
+	def __init__(self, captured: list):
+		self.captured = list(captured)
+		self.scripts = []
+		self.error = None
+
+	def execute_script(self, script: str, *args):
+		self.scripts.append(script)
+		if self.error is not None:
+			raise self.error
+		if 'return captured' not in script:
+			return None
+		captured, self.captured = self.captured, []
+		return captured
+
+
+def captured(url: str, body: str, mime_type: str = 'application/json') -> dict:
+	return {'url': url, 'status': 200, 'mime_type': mime_type, 'body': body}
+
+
+@pytest.mark.parametrize('url, matches', [
+	('https://site/_api/web/lists?x=1', True),
+	('https://site/api/collection-search?page=2', True),
+	('https://site/api/collection-search', False),
+	('https://other/_api/other', False)
+])
+def test_url_patterns(url, matches):
+	regex = re.compile(url_pattern_regex(['https://site/_api/web/*', '*/collection-search?*']))
+	assert bool(regex.match(url)) == matches
+	assert re.compile(url_pattern_regex(None)).match(url)
+
+
+def test_parse_body():
+	assert parse_body('{"a": 1}') == {'a': 1}
+	assert parse_body(")]}'\n[1, 2]") == [1, 2]
+	assert parse_body('for(;;);{"a": true}') == {'a': True}
+	assert parse_body('<html></html>') is None
+	assert parse_body(None) is None
+
+
+def test_hook_keeps_the_matching_json_responses():
+	driver = HookDriver([
+		captured('https://site/api/search?page=1', '{"page": 1}'),
+		captured('https://site/api/search?page=1.css', 'body {}', 'text/css'),
+		captured('https://site/other', '{"other": true}')
+	])
+
+	with NetworkCapture(driver, ['*/api/search?*']) as capture:
+		assert capture.method == 'hook'
+		assert capture.json_payloads() == [{'page': 1}]
+
+		driver.captured = [captured('https://site/api/search?page=2', '{"page": 2}')]
+		assert [response['json'] for response in capture.wait_for(count=2, timeout=1)] == [{'page': 1}, {'page': 2}]
+		assert capture.json_payloads('*page=2') == [{'page': 2}]
+
+		capture.clear()
+		assert capture.responses() == []
+
+	# Without BiDi the hook is installed again with each read, in case the page changed
+	assert all('__wstCaptureInstalled' in script for script in driver.scripts)
+
+
+def test_failed_read_returns_none():
+	driver = HookDriver([])
+	capture = NetworkCapture(driver).start()
+	driver.error = RuntimeError("The browser stopped")
+	assert capture.poll() is None
+
+	with pytest.raises(TimeoutError):
+		capture.wait_for(timeout=0.1, poll_frequency=0.02)
+
+
+def test_poll_needs_a_started_capture():
+	with pytest.raises(Exception, match='not started'):
+		NetworkCapture(HookDriver([])).poll()
+
+
+def test_devtools_capture_of_the_search_results():
+	# The fake driver writes the responses of the scripts of the page in its performance log
+	pytest.importorskip('lxml')
+	pytest.importorskip('selenium')
+	from benchmarks.fake_webdriver import FakeWebDriver
+	from benchmarks.local_site import LocalSite
+
+	with LocalSite(search_pages=2, results_per_page=3) as site:
+		driver = FakeWebDriver()
+		url = f"{site.base_url}/collection-search-result.html?classification=painting&page=2"
+		payloads = capture_json_from_url(driver, url, ['*/api/collection-search?*'], timeout=2)
+
+	assert len(payloads) == 1
+	assert payloads[0]['page'] == 2
+	assert [result['id'] for result in payloads[0]['results']] == [1003, 1004, 1005]
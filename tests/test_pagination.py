@@ -0,0 +1,87 @@
+"""
+@file tests/test_pagination.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the harvest of the paginated links: deduplication, limit of pages and resume with a persistent key set
+"""
+
+
+import csv
+
+import pytest
+
+# The fake driver evaluates the locators with lxml, the waits are the expected conditions of Selenium
+pytest.importorskip('lxml')
+pytest.importorskip('selenium')
+
+import src.browser_web_scrapping as browser_ws
+from src.pagination import SqliteKeySet, iter_paginated_pages, harvest_paginated_links, harvest_links_to_csv
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.local_site import LocalSite
+
+
+search_pages = 3
+results_per_page = 4
+
+
+@pytest.fixture(scope='module')
+def site():
+	with LocalSite(search_pages=search_pages, results_per_page=results_per_page) as local_site:
+		yield local_site
+
+
+@pytest.fixture
+def driver(site):
+	fake_driver = FakeWebDriver()
+	browser_ws.login_to_url(fake_driver, f"{site.base_url}/collection-search-result.html?classification=painting")
+	return fake_driver
+
+
+def object_links(link: str) -> bool:
+	return 'art-object-page' in link
+
+
+def object_id(link: str) -> str:
+	return link.split('.')[-2]
+
+
+def test_links_of_each_page_are_deduplicated(driver):
+	pages = list(iter_paginated_pages(driver, link_filter=object_links, key_function=object_id))
+
+	assert len(pages) == search_pages
+	assert 'page=2' in pages[1][0]
+	# Each result has two links to its object page, only the first one is kept
+	for page, (_, records) in enumerate(pages):
+		first_id = 1000 + page * results_per_page
+		assert [record['key'] for record in records] == [str(first_id + index) for index in range(results_per_page)]
+		assert [record['position'] for record in records] == list(range(results_per_page))
+
+
+def test_harvest_stops_after_max_pages(driver):
+	records = list(harvest_paginated_links(driver, link_filter=object_links, key_function=object_id, max_pages=2))
+	assert len(records) == 2 * results_per_page
+
+
+def test_harvest_to_csv_continues_with_the_persistent_keys(site, tmp_path):
+	csv_path = str(tmp_path / 'links.csv')
+	seen = SqliteKeySet(str(tmp_path / 'keys.sqlite'))
+	first = FakeWebDriver()
+	browser_ws.login_to_url(first, f"{site.base_url}/collection-search-result.html?classification=painting")
+	assert harvest_links_to_csv(first, csv_path, column_names={'key': 'ID'}, link_filter=object_links,
+		key_function=object_id, seen=seen, max_pages=1) == results_per_page
+	seen.close()
+
+	# A second run over all the pages writes only the links not harvested before
+	seen = SqliteKeySet(str(tmp_path / 'keys.sqlite'))
+	second = FakeWebDriver()
+	browser_ws.login_to_url(second, f"{site.base_url}/collection-search-result.html?classification=painting")
+	assert harvest_links_to_csv(second, csv_path, column_names={'key': 'ID'}, link_filter=object_links,
+		key_function=object_id, seen=seen) == (search_pages - 1) * results_per_page
+	assert len(seen) == search_pages * results_per_page
+	seen.close()
+
+	with open(csv_path, encoding='utf-8', newline='') as file:
+		rows = list(csv.DictReader(file))
+	assert list(rows[0]) == ['ID', 'link', 'position', 'page']
+	assert [row['ID'] for row in rows] == [str(1000 + index) for index in range(search_pages * results_per_page)]
@@ -0,0 +1,162 @@
+"""
+@file tests/test_rate_limiter.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the adaptive rate limiter, of the retry policy and of the latency of the downloads
+"""
+
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from src.rate_limiter import RateLimiter, RetryPolicy, retry_after_seconds
+from src.http_downloads import download_file
+
+
+class SlowBodyHandler(BaseHTTPRequestHandler):
+	"""
+	Sends the headers at once and the body after a delay.
+	"""
+
+	body_delay = 0.3
+
+	def log_message(self, format, *args):
+		pass
+
+	def do_GET(self):
+		self.send_response(200)
+		self.send_header('Content-Type', 'application/octet-stream')
+		self.send_header('Content-Length', '4')
+		self.end_headers()
+		self.wfile.flush()
+		time.sleep(self.body_delay)
+		self.wfile.write(b'data')
+
+
+class Response:
+	def __init__(self, status_code: int, headers: dict = None):
+		self.status_code = status_code
+		self.headers = headers or {}
+
+
+class HTTPError(Exception):
+	def __init__(self, status_code: int, headers: dict = None):
+		super().__init__(f"HTTP {status_code}")
+		self.response = Response(status_code, headers)
+
+
+@pytest.fixture
+def slow_server():
+	server = ThreadingHTTPServer(('127.0.0.1', 0), SlowBodyHandler)
+	server.daemon_threads = True
+	thread = threading.Thread(target=server.serve_forever, daemon=True)
+	thread.start()
+	yield f"http://127.0.0.1:{server.server_address[1]}"
+	server.shutdown()
+	server.server_close()
+
+
+def test_rate_of_a_new_host_is_the_initial_rate():
+	limiter = RateLimiter(initial_rate=10, burst=1, initial_concurrency=4)
+	start = time.monotonic()
+	for _ in range(4):
+		limiter.release(limiter.acquire('https://site/page'), feedback=False)
+	assert time.monotonic() - start >= 0.25
+
+	assert limiter.get_state('site')['in_flight'] == 0
+
+
+def test_concurrency_limit():
+	limiter = RateLimiter(initial_rate=20, burst=5, initial_concurrency=2)
+	tickets = [limiter.try_acquire('site') for _ in range(2)]
+	assert all(tickets)
+	assert limiter.try_acquire('site') is None
+	with pytest.raises(TimeoutError):
+		limiter.acquire('site', timeout=0.05)
+
+	limiter.release(tickets[0], feedback=False)
+	assert limiter.try_acquire('site') is not None
+
+
+def test_congestion_decreases_and_successes_increase_the_rate():
+	limiter = RateLimiter(initial_rate=4, increase=1, decrease=0.5, initial_concurrency=4, burst=4)
+	limiter.release(limiter.acquire('site'), status=429)
+	state = limiter.get_state('site')
+	assert state['rate'] == 2 and state['concurrency'] == 2 and state['errors'] == 1
+
+	limiter._state('site').tokens = 1
+	limiter.release(limiter.acquire('site'), status=200)
+	assert limiter.get_state('site')['rate'] == 3
+
+
+def test_pause_stops_the_host():
+	limiter = RateLimiter(initial_rate=20, burst=5)
+	limiter.pause('https://site/page', 0.2)
+	assert limiter.try_acquire('site') is None
+	assert limiter.try_acquire('other') is not None
+
+	start = time.monotonic()
+	limiter.acquire('site')
+	assert time.monotonic() - start >= 0.15
+
+
+def test_slot_releases_with_an_error():
+	limiter = RateLimiter(initial_rate=4, initial_concurrency=2, burst=2)
+	with pytest.raises(ValueError):
+		with limiter.slot('site'):
+			raise ValueError("Connection reset")
+
+	state = limiter.get_state('site')
+	assert state['in_flight'] == 0 and state['errors'] == 1
+
+
+def test_latency_of_a_download_is_the_time_to_the_headers(slow_server, tmp_path):
+	limiter = RateLimiter(initial_rate=20, burst=5)
+	with requests.Session() as session:
+		path = download_file(session, f"{slow_server}/file.bin", str(tmp_path), rate_limiter=limiter)
+
+	with open(path, 'rb') as file:
+		assert file.read() == b'data'
+	state = limiter.get_state(slow_server)
+	assert state['latency'] < SlowBodyHandler.body_delay and state['in_flight'] == 0
+
+
+def test_retry_after_seconds():
+	assert retry_after_seconds(Response(429, {'Retry-After': '3'})) == 3
+	assert retry_after_seconds(Response(429, {'Retry-After': 'Wed, 21 Oct 2026 07:28:00 GMT'})) is None
+	assert retry_after_seconds(None) is None
+
+
+def test_retry_policy_retries_the_retryable_statuses(monkeypatch):
+	monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+	policy = RetryPolicy(max_attempts=3, base_delay=0.01)
+	errors = [HTTPError(503), HTTPError(429, {'Retry-After': '1'})]
+
+	def flaky():
+		if errors:
+			raise errors.pop(0)
+		return 'done'
+
+	assert policy.call(flaky) == 'done'
+
+	attempts = []
+
+	def failing(status_code):
+		attempts.append(status_code)
+		raise HTTPError(status_code)
+
+	with pytest.raises(HTTPError):
+		policy.call(failing, 404)
+	with pytest.raises(HTTPError):
+		policy.call(failing, 500)
+	assert attempts == [404, 500, 500, 500]
+
+
+def test_retry_delay_is_bounded():
+	policy = RetryPolicy(base_delay=1, max_delay=4)
+	assert all(0 <= policy.delay(attempt) <= min(4, 2 ** (attempt - 1)) for attempt in range(1, 8) for _ in range(20))
@@ -0,0 +1,127 @@
+"""
+@file tests/test_record_sink.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the record sink: columns of the CSV, JSONL records with different fields, deduplication and atomic
+replacement of the file
+"""
+
+
+import os
+import csv
+import json
+
+import pytest
+
+from src.record_sink import RecordSink
+
+
+def read_csv(path) -> list:
+	with open(path, encoding='utf-8', newline='') as file:
+		return list(csv.DictReader(file))
+
+
+def read_jsonl(path) -> list:
+	with open(path, encoding='utf-8') as file:
+		return [json.loads(line) for line in file]
+
+
+def test_csv_header_is_written_once(tmp_path):
+	path = str(tmp_path / 'data.csv')
+	with RecordSink(path, batch_size=1) as sink:
+		sink.push({'ID': 1, 'Title': 'A'})
+		sink.push({'ID': 2, 'Title': 'B'})
+
+	with RecordSink(path) as sink:
+		sink.push({'ID': 3, 'Title': 'C'})
+
+	with open(path, encoding='utf-8') as file:
+		assert file.read().splitlines()[0] == 'ID,Title'
+	assert read_csv(path) == [{'ID': '1', 'Title': 'A'}, {'ID': '2', 'Title': 'B'}, {'ID': '3', 'Title': 'C'}]
+
+
+def test_csv_columns_are_the_fields_of_the_first_batch(tmp_path):
+	path = str(tmp_path / 'data.csv')
+	with RecordSink(path, batch_size=2) as sink:
+		sink.push({'ID': 1, 'Title': 'A'})
+		sink.push({'ID': 2, 'Author': 'X'})
+		assert sink.fieldnames == ['ID', 'Title', 'Author']
+
+		# The rejected record is not kept in the batch, the next records are written
+		with pytest.raises(ValueError):
+			sink.push({'ID': 3, 'Date': '2026'})
+		sink.push({'ID': 4})
+
+	assert [row['ID'] for row in read_csv(path)] == ['1', '2', '4']
+
+
+def test_jsonl_records_with_different_fields(tmp_path):
+	path = str(tmp_path / 'data.jsonl')
+	records = [{'ID': 1, 'Title': 'A'}, {'ID': 2, 'Author': 'X'}, {'ID': 3, 'Título': 'Ñ', 'Date': None}]
+	with RecordSink(path, batch_size=1) as sink:
+		sink.push_many(records)
+
+	assert read_jsonl(path) == records
+
+
+def test_long_layout(tmp_path):
+	path = str(tmp_path / 'data.csv')
+	with RecordSink(path, layout='long', id_fields=['ID']) as sink:
+		sink.push({'ID': 1, 'Title': 'A', 'Author': 'X'})
+
+	assert read_csv(path) == [
+		{'ID': '1', 'Attribute': 'Title', 'Value': 'A'},
+		{'ID': '1', 'Attribute': 'Author', 'Value': 'X'}
+	]
+
+
+@pytest.mark.parametrize('name', ['data.csv', 'data.jsonl', 'data.jsonl.gz'])
+def test_deduplication_skips_the_ids_already_written(tmp_path, name):
+	path = str(tmp_path / name)
+	compression = 'gzip' if name.endswith('.gz') else None
+	with RecordSink(path, id_fields=['ID'], deduplicate=True, compression=compression) as sink:
+		assert sink.push({'ID': 1, 'Title': 'A'})
+		assert not sink.push({'ID': 1, 'Title': 'again'})
+
+	# The IDs of the file which is appended are skipped too
+	with RecordSink(path, id_fields=['ID'], deduplicate=True, compression=compression) as sink:
+		assert not sink.push({'ID': 1, 'Title': 'A'})
+		assert sink.push({'ID': 2, 'Title': 'B'})
+		assert sink.rows_written == 0
+
+	with RecordSink(path, id_fields=['ID'], deduplicate=True, compression=compression) as sink:
+		assert not sink.push({'ID': 2, 'Title': 'B'})
+
+
+def test_deduplication_needs_the_id_fields(tmp_path):
+	with pytest.raises(ValueError):
+		RecordSink(str(tmp_path / 'data.csv'), deduplicate=True)
+
+
+def test_atomic_sink_replaces_the_file_when_it_is_closed(tmp_path):
+	path = str(tmp_path / 'data.csv')
+	with RecordSink(path) as sink:
+		sink.push({'ID': 1, 'Title': 'old'})
+
+	sink = RecordSink(path, atomic=True, batch_size=1)
+	sink.push({'ID': 2, 'Title': 'new'})
+	assert read_csv(path) == [{'ID': '1', 'Title': 'old'}]
+
+	sink.close()
+	assert read_csv(path) == [{'ID': '2', 'Title': 'new'}]
+	assert os.listdir(tmp_path) == ['data.csv']
+
+
+def test_atomic_sink_keeps_the_file_after_an_error(tmp_path):
+	path = str(tmp_path / 'data.csv')
+	with RecordSink(path) as sink:
+		sink.push({'ID': 1, 'Title': 'old'})
+
+	with pytest.raises(RuntimeError):
+		with RecordSink(path, atomic=True, batch_size=1) as sink:
+			sink.push({'ID': 2, 'Title': 'new'})
+			raise RuntimeError("The scrapper stopped")
+
+	assert read_csv(path) == [{'ID': '1', 'Title': 'old'}]
+	assert os.listdir(tmp_path) == ['data.csv']
@@ -0,0 +1,136 @@
+"""
+@file tests/test_session_store.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the session store: save, restore and expiry of the sessions, and their use by 'login_to_url'
+"""
+
+
+import os
+import time
+
+import pytest
+
+import src.browser_web_scrapping as browser_ws
+from src.session_store import SessionStore, origin_of
+
+
+login_url = 'https://login.example.com/authorize'
+
+
+class SessionDriver:
+	"""
+	Driver with the cookies of its browser, whose site redirects to the login page without the session cookie.
+	"""
+
+	def __init__(self, cookies: list = None, storage: dict = None):
+		self.cookies = list(cookies or [])
+		self.storage = dict(storage or {})
+		self.current_url = 'about:blank'
+		self.visited = []
+		self.quit_called = False
+
+	def get(self, url: str):
+		self.visited.append(url)
+		logged_in = any(cookie['name'] == 'auth' and cookie['value'] == 'valid' for cookie in self.cookies)
+		self.current_url = url if logged_in or url.endswith('/favicon.ico') else login_url
+
+	def get_cookies(self) -> list:
+		return [dict(cookie) for cookie in self.cookies]
+
+	def add_cookie(self, cookie: dict):
+		self.cookies.append(dict(cookie))
+
+	def execute_script(self, script: str, *args):
+		if args:
+			self.storage.update(args[0])
+			return None
+		return dict(self.storage)
+
+	def quit(self):
+		self.quit_called = True
+
+
+@pytest.fixture
+def store(tmp_path):
+	return SessionStore(str(tmp_path / 'sessions'))
+
+
+def test_origin_of():
+	assert origin_of('HTTPS://Site.example.com:8443/a/b?c=1') == 'https://site.example.com:8443'
+	with pytest.raises(ValueError):
+		origin_of('/relative/path')
+
+
+def test_saved_session_is_restored_in_a_new_driver(store):
+	url = 'https://site.example.com/page'
+	first = SessionDriver([{'name': 'auth', 'value': 'valid', 'domain': 'site.example.com', 'extra': 1}], {'token': 'a'})
+	first.get(url)
+	session = store.save(first)
+	assert session['cookies'] == [{'name': 'auth', 'value': 'valid', 'domain': 'site.example.com'}]
+	assert store.sessions()[0]['origin'] == 'https://site.example.com'
+	assert oct(os.stat(store._path(session['origin'])).st_mode & 0o777) == '0o600'
+
+	second = SessionDriver()
+	assert store.restore(second, url)
+	assert second.cookies == session['cookies'] and second.storage == {'token': 'a'}
+	assert second.visited == ['https://site.example.com/favicon.ico']
+	assert store.is_restored(second, url)
+
+	# The session is restored once per driver
+	assert store.restore(second, url)
+	assert len(second.visited) == 1
+
+
+def test_expired_session_is_not_restored(tmp_path):
+	store = SessionStore(str(tmp_path / 'sessions'), auth_cookies=['auth'])
+	driver = SessionDriver([{'name': 'auth', 'value': 'valid', 'expiry': int(time.time()) - 10}])
+	store.save(driver, 'https://site.example.com/page')
+
+	assert store.load('https://site.example.com/other') is None
+	assert not store.restore(SessionDriver(), 'https://site.example.com/page')
+
+
+def test_login_restores_the_session_without_credentials(store, monkeypatch):
+	monkeypatch.setattr('builtins.input', lambda: pytest.fail("The login asked for the credentials"))
+	url = 'https://site.example.com/page'
+	store.save(SessionDriver([{'name': 'auth', 'value': 'valid'}]), url)
+
+	driver = SessionDriver()
+	browser_ws.login_to_url(driver, url, needs_credentials=True, session_store=store)
+	assert driver.current_url == url
+	assert store.load(url)['cookies'] == [{'name': 'auth', 'value': 'valid'}]
+
+
+@pytest.mark.parametrize('needs_credentials', [False, True])
+def test_rejected_session_is_not_saved_again(store, monkeypatch, needs_credentials):
+	url = 'https://site.example.com/page'
+	store.save(SessionDriver([{'name': 'auth', 'value': 'revoked'}]), url)
+
+	driver = SessionDriver()
+	credentials = []
+
+	def enter_credentials():
+		credentials.append(True)
+		driver.cookies = [{'name': 'auth', 'value': 'valid'}]
+		driver.get(url)
+
+	monkeypatch.setattr('builtins.input', enter_credentials)
+	browser_ws.login_to_url(driver, url, needs_credentials=needs_credentials, session_store=store)
+
+	assert credentials == ([True] if needs_credentials else [])
+	if needs_credentials:
+		assert store.load(url)['cookies'] == [{'name': 'auth', 'value': 'valid'}]
+	else:
+		# The login page of the rejected session is not saved and the rejected session is removed
+		assert store.load(url) is None
+		assert not store.is_restored(driver, url)
+
+
+def test_login_without_a_saved_session_saves_nothing(store):
+	url = 'https://site.example.com/page'
+	driver = SessionDriver([{'name': 'auth', 'value': 'valid'}])
+	browser_ws.login_to_url(driver, url, session_store=store)
+
+	assert store.load(url) is None
@@ -0,0 +1,70 @@
+"""
+@file tests/test_sharepoint_folder.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the SharePoint folder with a virtualized list taller than the viewport
+"""
+
+
+import pytest
+
+# The fake driver evaluates the locators with lxml and renders only a window of the rows, like SharePoint
+pytest.importorskip('lxml')
+pytest.importorskip('selenium')
+
+from src.sharepoint_folder import SharePointFolder, filter_files
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.local_site import LocalSite
+
+
+folder_files = 30
+rendered_rows = 8
+
+
+@pytest.fixture(scope='module')
+def site():
+	with LocalSite(folder_files=folder_files, folder_rendered_rows=rendered_rows) as local_site:
+		yield local_site
+
+
+@pytest.fixture
+def folder(site):
+	driver = FakeWebDriver()
+	return SharePointFolder(driver, f"{site.base_url}/sites/docs/Shared%20Documents/Forms/AllItems.aspx", timeout=2).open()
+
+
+def rendered_names(folder) -> list:
+	return [row['name'] for row in folder._read_rows()]
+
+
+def test_list_files_scrolls_the_whole_list(folder):
+	assert len(rendered_names(folder)) == rendered_rows
+
+	files = folder.list_files(scroll_timeout=0.2)
+	assert [file['name'] for file in files] == [f"Report{index}.docx" for index in range(folder_files)]
+	assert files[3]['key'] == '3' and files[3]['modified'].day == 4
+
+
+def test_rows_out_of_the_viewport_are_selected(folder):
+	files = folder.list_files(scroll_timeout=0.2)
+	assert 'Report0.docx' not in rendered_names(folder)
+
+	# The first rows were scrolled out at the end of the listing, the middle ones are rendered again on the way back
+	batch = [files[0], files[15], files[29], files[2]]
+	assert folder._select(batch, scroll_timeout=0.2) == batch
+	assert folder._select(files, scroll_timeout=0.2) == files
+
+
+def test_file_not_in_the_list_is_not_selected(folder):
+	files = folder.list_files(scroll_timeout=0.2)
+	missing = {'name': 'Missing.docx', 'key': 'missing'}
+
+	assert folder._select([missing, files[5]], max_scrolls=10, scroll_timeout=0.1) == [files[5]]
+
+
+def test_filter_files(folder):
+	files = folder.list_files(scroll_timeout=0.2)
+	assert [file['name'] for file in filter_files(files, pattern='Report2*.docx')] == \
+		['Report2.docx'] + [f"Report{index}.docx" for index in range(20, 30)]
+	assert [file['name'] for file in filter_files(files, regex=r'Report1\d\.')] == [f"Report{index}.docx" for index in range(10, 20)]
@@ -0,0 +1,119 @@
+"""
+@file tests/test_snapshot_archive.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the snapshot archive: records, index recovery after a crash and offline extraction
+"""
+
+
+import os
+
+import pytest
+
+from src.snapshot_archive import SnapshotArchive, SnapshotRecorder, snapshot_document, snapshot_recorder_of, \
+	extract_archives
+
+
+def page(title: str) -> str:
+	return f"<html><body><h1>{title}</h1><p class='medium'>oil on canvas</p></body></html>"
+
+
+def test_snapshots_are_read_back(tmp_path):
+	path = str(tmp_path / 'pages.wsa')
+	frames = [{'path': [0], 'url': 'https://site/frame.html', 'html': page('Frame')}]
+	with SnapshotArchive(path) as archive:
+		archive.append('https://site/a', page('A'), final_url='https://site/a?redirected=1')
+		archive.append('https://site/b', page('B'), frames)
+		archive.append('https://site/a', page('A again'))
+
+	with SnapshotArchive(path, read_only=True) as archive:
+		assert len(archive) == 3
+		assert [entry['url'] for entry in archive.entries(latest_only=True)] == ['https://site/a', 'https://site/b']
+		assert [entry['url'] for entry in archive.entries('*/b')] == ['https://site/b']
+		assert 'A again' in archive.latest('https://site/a')['html']
+		assert archive.latest('https://site/missing') is None
+
+		first = archive.read(archive.entries()[0])
+		assert first['final_url'] == 'https://site/a?redirected=1'
+		snapshot = archive.latest('https://site/b')
+		assert snapshot_document(snapshot, [0]) == (page('Frame'), 'https://site/frame.html')
+		assert snapshot_document(snapshot, [1]) == (None, None)
+
+		with pytest.raises(Exception, match='read only'):
+			archive.append('https://site/c', page('C'))
+
+
+def test_index_is_rebuilt_after_a_crash(tmp_path):
+	path = str(tmp_path / 'pages.wsa')
+	with SnapshotArchive(path) as archive:
+		archive.append('https://site/a', page('A'))
+		archive.append('https://site/b', page('B'))
+		size = os.path.getsize(path)
+
+	# The index is lost and the last record was written in part
+	os.remove(f"{path}.idx")
+	with open(path, 'ab') as file:
+		file.write(b'WSA1\x10')
+
+	with SnapshotArchive(path) as archive:
+		assert [entry['url'] for entry in archive.entries()] == ['https://site/a', 'https://site/b']
+		assert os.path.getsize(path) == size
+		archive.append('https://site/c', page('C'))
+
+	with SnapshotArchive(path, read_only=True) as archive:
+		assert [snapshot['url'] for snapshot in archive] == ['https://site/a', 'https://site/b', 'https://site/c']
+
+
+class PageDriver:
+	"""
+	Driver with an open page and without frames.
+	"""
+
+	def __init__(self, url: str, html: str):
+		self.current_url = url
+		self.page_source = html
+
+	def find_elements(self, by: str, value: str) -> list:
+		return []
+
+
+def test_recorder_saves_the_matching_pages(tmp_path):
+	driver = PageDriver('https://site/collection/1', page('Painting'))
+	with SnapshotArchive(str(tmp_path / 'pages.wsa')) as archive:
+		recorder = SnapshotRecorder(archive, url_patterns=['*/collection/*']).attach(driver)
+		assert snapshot_recorder_of(driver) is recorder
+
+		assert recorder.record(driver)['url'] == 'https://site/collection/1'
+		driver.current_url = 'https://site/other'
+		assert recorder.record(driver) is None
+		assert len(archive) == 1
+
+		recorder.detach(driver)
+		assert snapshot_recorder_of(driver) is None
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_extraction_from_the_archives(tmp_path, workers):
+	pytest.importorskip('lxml')
+	pytest.importorskip('selenium')
+	from src.browser_web_scrapping import By
+
+	paths = []
+	for index in range(2):
+		path = str(tmp_path / f"worker{index}.wsa")
+		with SnapshotArchive(path) as archive:
+			for number in range(3):
+				archive.append(f"https://site/{index}/{number}", page(f"Page {index}.{number}"))
+		paths.append(path)
+
+	schema = {'Title': (By.TAG_NAME, 'h1'), 'Medium': (By.CLASS_NAME, 'medium')}
+	results = list(extract_archives(paths, schema, workers=workers, chunk_size=2))
+
+	# With several processes the results come in the order the chunks finish
+	assert sorted((url, values['Title']) for url, values, error in results) == \
+		[(f"https://site/{index}/{number}", f"Page {index}.{number}") for index in range(2) for number in range(3)]
+	assert all(error is None and values['Medium'] == 'oil on canvas' for url, values, error in results)
+
+	results = list(extract_archives(paths, schema, frame=[0], workers=workers))
+	assert len(results) == 6 and all(values is None and 'frame' in str(error) for url, values, error in results)
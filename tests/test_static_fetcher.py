@@ -0,0 +1,125 @@
+"""
+@file tests/test_static_fetcher.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the static fetcher: same results as the browser, reuse of the last page and fallback to the browser
+"""
+
+
+import time
+
+import pytest
+
+# The pages are parsed with lxml, the fallback uses the fake driver whose elements are Selenium elements
+pytest.importorskip('lxml')
+pytest.importorskip('selenium')
+
+import requests
+
+import src.browser_web_scrapping as browser_ws
+from src.browser_web_scrapping import By
+from src.static_fetcher import StaticFetcher, inner_text
+from benchmarks.fake_webdriver import FakeWebDriver
+from benchmarks.local_site import LocalSite
+
+
+object_schema = {
+	'Collection': (By.XPATH, "//div[@id='oe-strip-wrap']"),
+	'Medium': (By.CLASS_NAME, 'medium'),
+	'Headers': {'type': By.TAG_NAME, 'locator': 'h3', 'many': True},
+	'Drawer': (By.ID, 'drawer-content-0'),
+	'ImageURL': {'type': By.XPATH, 'locator': "//a[@title='download image']", 'field': 'attribute', 'attribute': 'href'},
+	'Missing': (By.ID, 'missing')
+}
+
+
+@pytest.fixture(scope='module')
+def site():
+	with LocalSite() as local_site:
+		yield local_site
+
+
+class CountingSession(requests.Session):
+	"""
+	HTTP session which counts its requests.
+	"""
+
+	def __init__(self):
+		super().__init__()
+		self.requests = 0
+
+	def request(self, *args, **kwargs):
+		self.requests += 1
+		return super().request(*args, **kwargs)
+
+
+def object_url(site, object_id: int = 1000) -> str:
+	return f"{site.base_url}/collection/art-object-page.{object_id}.html"
+
+
+def test_static_extraction_is_the_browser_extraction(site):
+	driver = FakeWebDriver()
+	browser_ws.login_to_url(driver, object_url(site))
+
+	with StaticFetcher() as fetcher:
+		result = fetcher.extract(object_url(site), object_schema)
+	assert result == browser_ws.extract_elements_in_driver(driver, object_schema)
+	assert result['ImageURL'] == f"{site.base_url}/download/image?filename=painting-1000.jpg"
+	assert result['Drawer'] == '' and result['Missing'] is None
+	assert fetcher.stats == {'static': 1, 'browser': 0}
+
+
+def test_found_element_reads_like_a_web_element(site):
+	with StaticFetcher() as fetcher:
+		medium = fetcher.find_element(object_url(site), By.XPATH, "//div[@class='object-attr medium']")
+		assert medium.text == 'Medium\noil on canvas'
+		assert medium.find_element(By.TAG_NAME, 'p').text == 'oil on canvas'
+		assert not fetcher.find_element(object_url(site), By.ID, 'drawer-content-0').is_displayed()
+		assert fetcher.find_element(object_url(site), By.ID, 'missing') is None
+
+
+def test_inner_text_has_a_line_per_block():
+	lxml_html = pytest.importorskip('lxml.html')
+	node = lxml_html.fromstring("<div><p>First   line</p>text <b>bold</b><script>ignored()</script><p>Last</p></div>")
+	assert inner_text(node) == 'First line\ntext bold\nLast'
+
+
+def test_last_page_is_reused_until_it_expires(site):
+	session = CountingSession()
+	with StaticFetcher(session=session, page_ttl=0.2) as fetcher:
+		first = fetcher.fetch(object_url(site))
+		assert fetcher.fetch(object_url(site)) is first
+		assert fetcher.fetch(object_url(site), refresh=True) is not first
+		assert session.requests == 2
+
+		time.sleep(0.25)
+		assert fetcher.fetch(object_url(site)) is not first
+		assert fetcher.fetch(object_url(site, 1001)).url == object_url(site, 1001)
+		assert session.requests == 4
+
+
+def test_unreadable_page_is_read_with_the_browser(site):
+	driver = FakeWebDriver()
+	with StaticFetcher(driver=driver, session=requests.Session()) as fetcher:
+		# The static page misses a required element, e.g. it is rendered with JavaScript
+		result = fetcher.extract(object_url(site), {'Medium': (By.CLASS_NAME, 'medium'), 'Missing': (By.ID, 'missing')})
+		assert result == {'Medium': 'Medium\noil on canvas', 'Missing': None}
+		assert fetcher.stats == {'static': 0, 'browser': 1}
+		assert driver.current_url == object_url(site)
+
+		# The page already open in the browser is not loaded again
+		assert fetcher.find_element(object_url(site), By.ID, 'missing') is None
+		assert fetcher.stats == {'static': 0, 'browser': 2}
+
+
+def test_error_page_is_not_read_statically(site):
+	with StaticFetcher() as fetcher:
+		assert fetcher.fetch(f"{site.base_url}/not-found.html") is None
+		assert fetcher.find_element(f"{site.base_url}/not-found.html", By.TAG_NAME, 'body') is None
+
+
+def test_needs_browser_rejects_the_static_page(site):
+	with StaticFetcher(needs_browser=lambda page: page.find_element(By.ID, 'drawer-control-0') is not None) as fetcher:
+		assert fetcher.fetch(object_url(site)) is None
+		assert fetcher.extract(object_url(site), {'Medium': (By.CLASS_NAME, 'medium')}) == {'Medium': None}
@@ -0,0 +1,118 @@
+"""
+@file tests/test_work_queue.py
+@date 2026-10-18
+@author Daniel Felipe <danielfoc@protonmail.com>
+
+@brief Tests of the leases, acknowledgements, retries and dead letters of the work queue
+"""
+
+
+import time
+
+import pytest
+
+from src.work_queue import (
+	SqliteWorkQueue, WorkQueueBackend, WorkQueueServer, RemoteWorkQueue, is_loopback_host, PENDING, LEASED, DONE, DEAD
+)
+
+
+@pytest.fixture
+def work_queue(tmp_path):
+	with SqliteWorkQueue(str(tmp_path / 'queue.sqlite'), max_attempts=2) as queue:
+		yield queue
+
+
+def test_put_ignores_the_ids_already_in_the_queue(work_queue):
+	assert work_queue.put([('a', 'http://site/a'), ('b', 'http://site/b')]) == 2
+	assert work_queue.put([('a', 'http://site/a'), 'c']) == 1
+	assert work_queue.counts()[PENDING] == 3
+
+
+def test_leased_message_is_hidden_from_the_other_workers(work_queue):
+	work_queue.put(['a'])
+
+	leased = work_queue.lease('worker-1', visibility_timeout=30)
+	assert [message['id'] for message in leased] == ['a']
+	assert leased[0]['attempts'] == 1
+	assert work_queue.lease('worker-2', visibility_timeout=30) == []
+	assert work_queue.counts()[LEASED] == 1
+
+
+def test_ack_saves_the_result(work_queue):
+	work_queue.put([('a', 'http://site/a')])
+	message = work_queue.lease('worker-1')[0]
+
+	assert work_queue.ack(message['id'], message['token'], {'title': 'A'})
+	assert work_queue.counts()[DONE] == 1
+	assert work_queue.results() == [('a', {'title': 'A'})]
+	assert not work_queue.ack(message['id'], message['token'], {'title': 'again'})
+
+
+def test_expired_lease_can_not_be_acknowledged(work_queue):
+	work_queue.put(['a'])
+	expired = work_queue.lease('worker-1', visibility_timeout=0.05)[0]
+	time.sleep(0.1)
+
+	current = work_queue.lease('worker-2', visibility_timeout=30)[0]
+	assert current['id'] == expired['id'] and current['token'] != expired['token']
+	assert not work_queue.heartbeat(expired['id'], expired['token'])
+	assert not work_queue.ack(expired['id'], expired['token'], {'worker': 1})
+	assert work_queue.ack(current['id'], current['token'], {'worker': 2})
+	assert work_queue.results() == [('a', {'worker': 2})]
+
+
+def test_heartbeat_extends_the_lease(work_queue):
+	work_queue.put(['a'])
+	message = work_queue.lease('worker-1', visibility_timeout=0.2)[0]
+
+	time.sleep(0.1)
+	assert work_queue.heartbeat(message['id'], message['token'], visibility_timeout=30)
+	time.sleep(0.15)
+	assert work_queue.lease('worker-2') == []
+
+
+def test_failed_message_is_retried_then_dead(work_queue):
+	work_queue.put(['a'])
+
+	first = work_queue.lease('worker-1')[0]
+	assert work_queue.nack(first['id'], first['token'], 'broken page')
+	assert work_queue.counts()[PENDING] == 1
+
+	second = work_queue.lease('worker-1')[0]
+	assert second['attempts'] == 2
+	assert work_queue.nack(second['id'], second['token'], 'broken page')
+	assert work_queue.counts()[DEAD] == 1
+	assert work_queue.lease('worker-1') == []
+	assert work_queue.dead_letters()[0]['error'] == 'broken page'
+
+	assert work_queue.requeue_dead() == 1
+	assert work_queue.lease('worker-1')[0]['attempts'] == 1
+
+
+def test_backend_interface_is_abstract():
+	with pytest.raises(TypeError):
+		WorkQueueBackend()
+
+
+def test_remote_queue_requires_the_token(work_queue):
+	work_queue.put(['a'])
+
+	with WorkQueueServer(work_queue, '127.0.0.1', 0, token='secret') as server:
+		host, port = server.address
+		with pytest.raises(Exception, match='Invalid token'):
+			RemoteWorkQueue(host, port).counts()
+		with pytest.raises(Exception, match='Invalid token'):
+			RemoteWorkQueue(host, port, token='wrong').counts()
+
+		with RemoteWorkQueue(host, port, token='secret') as remote:
+			message = remote.lease('remote-worker')[0]
+			assert remote.ack(message['id'], message['token'], {'remote': True})
+			assert remote.results() == [('a', {'remote': True})]
+
+
+def test_server_outside_loopback_requires_a_token(work_queue):
+	assert is_loopback_host('127.0.0.1') and is_loopback_host('localhost')
+	assert not is_loopback_host('0.0.0.0')
+
+	with pytest.raises(ValueError):
+		WorkQueueServer(work_queue, '0.0.0.0', 0)